@@ -0,0 +1,153 @@
+"""
+Module providing the in-process library API.
+A MaxSession holds a logged in browser that can be reused for any number of fetches,
+fetch_transactions streams the transactions of a window as typed Transaction records.
+Nothing here reads the command line, prints to stdout or writes files, unless the month cache
+or the saved login session are turned on explicitly.
+
+    with api.MaxSession.login(email, password) as max_session:
+        window = datetime.date(2024, 1, 1), datetime.date(2024, 3, 31)
+        for transaction in api.fetch_transactions(max_session, *window):
+            ...
+"""
+# pylint: disable=import-outside-toplevel
+import datetime
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from loguru import logger
+
+import func
+import pipeline
+from transactions import Transaction, TransactionBatch
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+ENGINES: tuple = ('script', 'html', 'capture', 'http', 'paged', 'elements')
+
+
+@dataclass
+class MaxSession:
+    """
+    A logged in browser and the options its fetches run with
+    driver: a webdriver logged in to Max, see login
+    engine: how the transactions are extracted, see func.scrape_rows
+    concurrency: month chunks, or billing months over http, fetched at the same time
+    cache: reuse and fill the month cache on disk
+    """
+    driver: 'webdriver.Chrome | None'
+    email: str
+    engine: str = 'script'
+    concurrency: int = 1
+    cache: bool = False
+    password: str | None = None         # in memory only, to log in again once the session expired
+
+    def __post_init__(self):
+        if self.engine not in ENGINES:
+            raise ValueError(f"unknown engine {self.engine!r}, "
+                             f"expected one of {', '.join(ENGINES)}")
+
+    @classmethod
+    def login(cls, email: str, password: str, headless: bool = True, lean_mode: bool = True,
+              remember: bool = False, **options) -> 'MaxSession':
+        """
+        Starts a browser and logs it in
+        :param email:
+        :param password:
+        :param headless: run the browser without a window
+        :param lean_mode: block images, fonts and trackers, see the lean module
+        :param remember: restore and save the encrypted login session on disk
+        :param options: engine, concurrency and cache, see MaxSession
+        :return: the logged in session
+        """
+        import waits
+
+        # the options are checked before any browser is started,
+        # a wrong one must not leave chrome running
+        max_session = cls(None, email, password=password, **options)
+
+        max_session.driver = func.driver(headless, max_session.engine, lean_mode)
+        try:
+            waits.page_ready(max_session.driver)
+            func.login(max_session.driver, email, password, use_session=remember)
+
+        except BaseException:
+            max_session.close()
+            raise
+
+        return max_session
+
+    def ensure_logged_in(self) -> None:
+        """
+        Checks the site still knows the session, and logs in again when it expired.
+        Worth calling before a fetch on a session that sat idle for a while.
+        :return:
+        """
+        if func.session_alive(self.driver):
+            return
+
+        if self.password is None:
+            raise RuntimeError(f"the session of {self.email} expired "
+                               "and no password was kept to log in again")
+
+        logger.info("the session expired, logging in again")
+        func.max_login(self.driver, self.email, self.password)
+
+    def close(self) -> None:
+        """quits the browser"""
+        if self.driver is not None:
+            self.driver.quit()
+
+    def __enter__(self) -> 'MaxSession':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def request_options(max_session: MaxSession, start: datetime.date, end: datetime.date) -> dict:
+    """The fetch options of the session and the window, in the shape the func module reads them"""
+    if start > end:
+        raise ValueError(f"the window starts on {start} after it ends on {end}")
+
+    return {'email': max_session.email, 'engine': max_session.engine,
+            'concurrency': max_session.concurrency, 'cache': max_session.cache,
+            'start_date': str(start), 'end_date': str(end)}
+
+
+def fetch_rows(max_session: MaxSession, start: datetime.date, end: datetime.date):
+    """
+    Streams the rows of the transactions purchased within a window, page by page
+    :param max_session: a logged in session
+    :param start: first purchase date
+    :param end: last purchase date
+    :return: generator of (date, place, card, amount) rows as the site shows them
+    """
+    pages = func.fetch_pages(max_session.driver, 'range', request_options(max_session, start, end))
+    return pipeline.flatten(pages)
+
+
+def fetch_transactions(max_session: MaxSession, start: datetime.date,
+                       end: datetime.date) -> Iterator[Transaction]:
+    """
+    Streams the transactions purchased within a window, page by page as the site hands them over
+    :param max_session: a logged in session, reused as is
+    :param start: first purchase date
+    :param end: last purchase date
+    :return: iterator of transactions, in the order the site lists them
+    """
+    return map(Transaction.from_row, fetch_rows(max_session, start, end))
+
+
+def fetch_batch(max_session: MaxSession, start: datetime.date,
+                end: datetime.date) -> TransactionBatch:
+    """
+    Fetches the transactions purchased within a window into a compact batch
+    :param max_session: a logged in session, reused as is
+    :param start: first purchase date
+    :param end: last purchase date
+    :return: the batch, see transactions.TransactionBatch
+    """
+    return TransactionBatch.from_rows(fetch_rows(max_session, start, end))
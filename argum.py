@@ -14,7 +14,7 @@ parser.add_argument_group('Required Arguments')
 parser.add_argument('-r', '--request',
                     help='what transactions time frame do you want to extract?',
                     type=str,
-                    choices={'this_month', 'ytd', 'month', 'range'},
+                    choices={'this_month', 'ytd', 'month', 'range', 'sync', 'daemon'},
                     required=True)
 
 parser.add_argument_group('Completing Arguments According to Request')
@@ -45,13 +45,72 @@ parser.add_argument('-nh', '--nohead',
                     help='use this flag in order to run in headless mode',
                     type=bool,
                     action=BooleanOptionalAction)
-
-args: Namespace = parser.parse_args()
+parser.add_argument('-f', '--format',
+                    help='the output format: a "csv" file, or a "parquet" / "jsonl" directory '
+                         'partitioned by year-month',
+                    type=str,
+                    choices={'csv', 'parquet', 'jsonl'},
+                    default='csv')
+parser.add_argument('-en', '--engine',
+                    help='how to extract the transactions table: "script" pulls every row with one '
+                         'in-browser call, "html" parses one page source snapshot outside the browser, '
+                         '"capture" decodes the JSON the page fetches, "http" calls the same endpoint without a page, '
+                         '"paged" scrolls a lazily loaded table until no new rows appear, '
+                         '"elements" reads every cell through WebDriver',
+                    type=str,
+                    choices={'script', 'html', 'capture', 'http', 'paged', 'elements'},
+                    default='script')
+parser.add_argument('-cc', '--concurrency',
+                    help='split ytd and range requests into month chunks '
+                         'and load this many of them at the same time in browser tabs',
+                    type=int,
+                    default=1)
+parser.add_argument('-ss', '--session',
+                    help='reuse the encrypted login session saved by the last run '
+                         '(use --no-session to always log in from scratch)',
+                    type=bool,
+                    default=True,
+                    action=BooleanOptionalAction)
+parser.add_argument('-db', '--database',
+                    help='the SQLite file the sync request stores the transactions in (default: transactions.db)',
+                    type=str)
+parser.add_argument('-sk', '--socket',
+                    help='the Unix socket the daemon request listens on '
+                         '(default: MAX_DAEMON_SOCKET or /tmp/max-get-transactions.sock)',
+                    type=str)
+parser.add_argument('-ca', '--cache',
+                    help='reuse month results cached on disk, closed months are never fetched twice '
+                         '(use --no-cache to always fetch)',
+                    type=bool,
+                    default=True,
+                    action=BooleanOptionalAction)
+parser.add_argument('-ln', '--lean',
+                    help='block images, fonts and trackers, hand pages over once parsed and skip the homepage '
+                         '(use --no-lean to browse the full site)',
+                    type=bool,
+                    default=True,
+                    action=BooleanOptionalAction)
+parser.add_argument('-hf', '--html_file',
+                    help='parse a transactions page saved on disk instead of logging in to Max',
+                    type=str)
+parser.add_argument('-tr', '--trace',
+                    help='time every phase of the run and write the spans to this JSON trace file, '
+                         'it opens in chrome://tracing and Perfetto',
+                    type=str)
+parser.add_argument('-pm', '--metrics',
+                    help='time every phase of the run and write them to this Prometheus .prom file, '
+                         'for the node exporter textfile collector',
+                    type=str)
+parser.add_argument('-pr', '--profile',
+                    help='sample the stacks and trace the allocations of every phase of the run '
+                         'and write cpu.collapsed and allocations.txt into this directory',
+                    type=str)
 
 
-def args_check_creds() -> None:
+def args_check_creds(args: Namespace) -> None:
     """
     check credentials were entered
+    :param args: the parsed arguments
     :return:
     """
     if args.email and args.password:
@@ -63,14 +122,24 @@ def args_check_creds() -> None:
         sys.exit('No credentials were given')
 
 
-def get_cli_arguments() -> dict:
-    """Returns the CLI arguments as dictionary to main"""
-    args_check_creds()
+def get_cli_arguments(argv: list | None = None) -> dict:
+    """
+    Parses and validates the CLI arguments, nothing is parsed before it is called
+    :param argv: the arguments to parse, sys.argv by default
+    :return: the arguments as dictionary to main
+    """
+    args: Namespace = parser.parse_args(argv)
+
+    if not args.html_file and args.request != 'daemon':
+        args_check_creds(args)
     month: str = month_converter(args.month)
 
     if args.request == 'range':
         range_date_validation(args.start_date, args.end_date)
 
+    elif args.request == 'sync' and args.start_date:
+        range_date_validation(args.start_date, str(datetime.date.today()))
+
     elif args.request == 'month':
         year_validation(args.year)
         month_validation(args.year, args.month)
@@ -78,7 +147,11 @@ def get_cli_arguments() -> dict:
     argx: dict = {"request": args.request, "email": args.email,
                   "password": args.password, "month": month, "year": args.year,
                   "start_date": args.start_date, "end_date": args.end_date,
-                  "headless_mode": args.nohead}
+                  "headless_mode": args.nohead, "format": args.format, "engine": args.engine, "concurrency": args.concurrency,
+                  "html_file": args.html_file, "session": args.session, "cache": args.cache,
+                  "socket": args.socket, "lean": args.lean,
+                  "database": args.database, "trace": args.trace, "metrics": args.metrics,
+                  "profile": args.profile}
 
     return argx
 
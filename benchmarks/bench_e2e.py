@@ -0,0 +1,322 @@
+"""
+End-to-end benchmark of the scraper against the local fake site.
+Every case runs in its own process, so its peak RSS is its own, and reports the wall time
+of every phase, the time to the first written row, the WebDriver round trips, the peak RSS
+of python and the peak RSS summed over the browser's processes, chromedriver and every
+chrome process below it. Results can be saved and compared with a saved baseline,
+a slower phase or a bigger memory peak fails the run.
+
+Run from the repository root:
+    python -m benchmarks.bench_e2e --rows 10 1000 100000 --engines script paged --latency 0.02
+    python -m benchmarks.bench_e2e --browserless --rows 10 1000 100000 \
+        --json results.json --baseline baseline.json
+"""
+# pylint: disable=line-too-long
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks import fake_max
+
+
+# a phase, or the memory peak, may be this much worse than the baseline before it counts as a regression
+THRESHOLD: float = 0.2
+# phases shorter than this are noise, they are never reported as regressions
+MIN_SECONDS: float = 0.05
+# seconds a request to the fake site may take, a big table at a high latency takes a while
+HTTP_TIMEOUT: float = 300
+
+
+class Phases:
+    """Wall time of consecutive phases"""
+
+    def __init__(self):
+        self.seconds: dict = {}
+        self._name: str | None = None
+        self._start: float = 0.0
+
+    def start(self, name: str) -> None:
+        """ends the running phase and starts the next one"""
+        self.stop()
+        self._name, self._start = name, time.perf_counter()
+
+    def stop(self) -> None:
+        """ends the running phase"""
+        if self._name is not None:
+            self.seconds[self._name] = time.perf_counter() - self._start
+            self._name = None
+
+
+def peak_rss_mb(who: int) -> float:
+    """The peak resident memory of this process or of its reaped children, in MB"""
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def tree_rss_mb(pid: int) -> float:
+    """
+    The resident memory summed over every process descending from pid, in MB, read from /proc.
+    Chrome runs its renderers, gpu and network processes below chromedriver, all of them are counted
+    :return: 0 where there is no /proc
+    """
+    children: dict = {}
+    rss_pages: dict = {}
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r', encoding='utf-8') as file:
+                # the fields after the parenthesised command name, the parent is the 2nd and the rss pages the 22nd
+                fields: list = file.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue            # the process exited meanwhile
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss_pages[int(entry)] = int(fields[21])
+
+    total: int = 0
+    pending: list = list(children.get(pid, []))
+    while pending:
+        child: int = pending.pop()
+        total += rss_pages.get(child, 0)
+        pending.extend(children.get(child, []))
+
+    return total * os.sysconf('SC_PAGE_SIZE') / 1048576
+
+
+class TreePeak:
+    """Samples tree_rss_mb of this process in the background while in use and keeps the peak"""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_mb: float = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='tree-rss', daemon=True)
+
+    def _sample(self) -> None:
+        """samples until stopped, once more on the way out"""
+        while True:
+            self.peak_mb = max(self.peak_mb, tree_rss_mb(os.getpid()))
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> 'TreePeak':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def count_round_trips(driver) -> list:
+    """Counts every WebDriver command the driver sends, the count is the single item of the returned list"""
+    count: list = [0]
+    execute = driver.execute
+
+    def counting_execute(*args, **kwargs):
+        count[0] += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counting_execute
+    return count
+
+
+def marked_sink(sink, marks: dict):
+    """Wraps a sink to note the moment the first row reached it and how many rows did"""
+    marks['rows'] = 0
+
+    def timed(rows):
+        def rows_with_mark():
+            for row in rows:
+                marks.setdefault('first_row', time.perf_counter())
+                marks['rows'] += 1
+                yield row
+        return sink(rows_with_mark())
+
+    return timed
+
+
+def browser_case(engine: str, email: str, password: str, days: int, lean_mode: bool) -> dict:  # pylint: disable=too-many-locals
+    """One run of the real flow in a headless browser, MAX_SITE_URL points at the fake site"""
+    import datetime                 # pylint: disable=import-outside-toplevel
+    import func                     # pylint: disable=import-outside-toplevel
+    import pipeline                 # pylint: disable=import-outside-toplevel
+    import waits                    # pylint: disable=import-outside-toplevel
+
+    phases, marks = Phases(), {}
+    today: datetime.date = datetime.date.today()
+    credx: dict = {'email': email, 'password': password, 'engine': engine, 'cache': False, 'concurrency': 1,
+                   'start_date': str(today - datetime.timedelta(days=days)), 'end_date': str(today)}
+
+    with tempfile.TemporaryDirectory() as directory:
+        start: float = time.perf_counter()
+        phases.start('browser start')
+        driver = func.driver(headless=True, engine=engine, lean_mode=lean_mode)
+        round_trips: list = count_round_trips(driver)
+
+        phases.start('login')
+        waits.page_ready(driver)
+        func.login(driver, email, password, use_session=False)
+        login_trips: int = round_trips[0]
+
+        phases.start('fetch and write')
+        sink = marked_sink(pipeline.csv_sink(os.path.join(directory, 'transactions.csv')), marks)
+        pipeline.run(func.fetch_pages(driver, 'range', credx), func.format_row, sink)
+
+        phases.start('quit')
+        driver.quit()
+        phases.stop()
+
+    return {'phases': phases.seconds, 'first_row': marks.get('first_row', time.perf_counter()) - start,
+            'round_trips': {'login': login_trips, 'total': round_trips[0]}, 'rows_written': marks['rows']}
+
+
+def browserless_case(site_url: str, email: str, password: str, days: int) -> dict:  # pylint: disable=too-many-locals
+    """One run over plain http, the transactions page parsed by the html engine"""
+    import datetime                 # pylint: disable=import-outside-toplevel
+    import requests                 # pylint: disable=import-outside-toplevel
+    import extract                  # pylint: disable=import-outside-toplevel
+    import func                     # pylint: disable=import-outside-toplevel
+    import pipeline                 # pylint: disable=import-outside-toplevel
+
+    phases, marks = Phases(), {}
+    today: datetime.date = datetime.date.today()
+    url: str = func.transactions_url('range', {'start_date': str(today - datetime.timedelta(days=days)),
+                                               'end_date': str(today)})
+    http = requests.Session()
+    round_trips: list = [0]
+    http.hooks['response'].append(lambda *_, **__: round_trips.__setitem__(0, round_trips[0] + 1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        start: float = time.perf_counter()
+        phases.start('login')
+        http.post(f'{site_url}/login', json={'username': email, 'password': password}, timeout=HTTP_TIMEOUT).raise_for_status()
+
+        phases.start('fetch')
+        source: str = http.get(url, timeout=HTTP_TIMEOUT).text
+
+        phases.start('parse and write')
+        sink = marked_sink(pipeline.csv_sink(os.path.join(directory, 'transactions.csv')), marks)
+        pipeline.run([extract.html_rows(source)], func.format_row, sink)
+        phases.stop()
+
+    return {'phases': phases.seconds, 'first_row': marks.get('first_row', time.perf_counter()) - start,
+            'round_trips': {'login': 1, 'total': round_trips[0]}, 'rows_written': marks['rows']}
+
+
+def run_case(args: argparse.Namespace, site: fake_max.Site, engine: str, rows: int) -> dict:
+    """Runs one case in a fresh process against the running site"""
+    env: dict = {**os.environ, 'MAX_SITE_URL': site.url, 'MAX_API_URL': site.url, 'LOGURU_LEVEL': 'WARNING'}
+    command: list = [sys.executable, '-m', 'benchmarks.bench_e2e', '--case', engine, '--days', str(args.days),
+                     '--email', site.email, '--password', site.password]
+    if not args.lean:
+        command.append('--no-lean')
+
+    completed = subprocess.run(command, env=env, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{engine} with {rows} rows failed:\n{completed.stderr[-2000:]}')
+
+    result: dict = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {'engine': engine, 'rows': rows, 'latency': args.latency, **result}
+
+
+def regressions(results: list, baseline: list, threshold: float = THRESHOLD) -> list[str]:
+    """
+    Compares results with a baseline of the same cases
+    :return: one line per phase, or memory peak, that got worse by more than the threshold
+    """
+    previous: dict = {(case['engine'], case['rows']): case for case in baseline}
+    found: list = []
+
+    for case in results:
+        old: dict | None = previous.get((case['engine'], case['rows']))
+        if old is None:
+            continue
+
+        checks: list = [(f'phase {name}', seconds, old['phases'].get(name)) for name, seconds in case['phases'].items()]
+        checks += [('python peak RSS', case['python_rss_mb'], old.get('python_rss_mb')),
+                   ('browser peak RSS', case['browser_rss_mb'], old.get('browser_rss_mb')),
+                   ('round trips', case['round_trips']['total'], old.get('round_trips', {}).get('total'))]
+
+        for name, new_value, old_value in checks:
+            if not old_value or (name.startswith('phase') and new_value < MIN_SECONDS):
+                continue
+            if new_value > old_value * (1 + threshold):
+                found.append(f"{case['engine']} {case['rows']} rows: {name} {old_value:.3f} -> {new_value:.3f}")
+
+    return found
+
+
+def print_results(results: list) -> None:
+    """A table of every case and its phases"""
+    for case in results:
+        phases: str = '  '.join(f'{name} {seconds:.3f}s' for name, seconds in case['phases'].items())
+        print(f"{case['engine']:>11} {case['rows']:>7} rows | total {sum(case['phases'].values()):7.3f}s "
+              f"first row {case['first_row']:6.3f}s | {case['round_trips']['total']:>6} round trips "
+              f"({case['round_trips']['login']} login) | RSS python {case['python_rss_mb']:6.1f} MB "
+              f"browser {case['browser_rss_mb']:6.1f} MB | {phases}")
+
+
+def main() -> None:
+    """Starts the fake site, runs every case and reports them"""
+    parser = argparse.ArgumentParser(description='end-to-end benchmark against the local fake site')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--engines', nargs='+', default=['script'])
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every response of the site is delayed by')
+    parser.add_argument('--page_size', type=int, default=0, help='rows the site shows before load more, 0 for all')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--browserless', action='store_true', help='fetch over plain http, no browser needed')
+    parser.add_argument('--lean', action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument('--json', help='save the results here')
+    parser.add_argument('--baseline', help='compare with results saved by an earlier run')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    # a single case, run in its own process by the parent run
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--email', help=argparse.SUPPRESS)
+    parser.add_argument('--password', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        # the browser processes are not children of this one, chrome is started by chromedriver
+        with TreePeak() as browser:
+            if args.case == 'browserless':
+                result: dict = browserless_case(os.environ['MAX_SITE_URL'], args.email, args.password, args.days)
+            else:
+                result = browser_case(args.case, args.email, args.password, args.days, args.lean)
+        result.update(python_rss_mb=peak_rss_mb(resource.RUSAGE_SELF), browser_rss_mb=browser.peak_mb)
+        print(json.dumps(result))
+        return
+
+    engines: list = ['browserless'] if args.browserless else args.engines
+    site = fake_max.Site(days=args.days, latency=args.latency, page_size=args.page_size).start()
+    results: list = []
+    try:
+        for rows in args.rows:
+            site.rows = rows
+            site.transactions = fake_max.generate(rows, args.days, site.seed)
+            for engine in engines:
+                results.append(run_case(args, site, engine, rows))
+    finally:
+        site.stop()
+
+    print_results(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            found: list = regressions(results, json.load(file), args.threshold)
+        for line in found:
+            print(f'REGRESSION {line}')
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Benchmark of parsing a large transactions page snapshot,
+the row by row extraction within the table against the former four global column scans.
+Run from the repository root: python -m benchmarks.bench_extract [rows] [other nodes]
+"""
+import sys
+import timeit
+
+from lxml import etree
+from lxml import html as lxml_html
+
+import extract
+import locators as loc
+
+
+def page(rows: int, other_nodes: int) -> str:
+    """A transactions page of rows rows, after other_nodes elements of the rest of the site"""
+    chrome = ''.join(f'<div class="card"><span>item {i}</span><div><div>{i}</div></div></div>' for i in range(other_nodes))
+    body = ''.join(f'<div class="row body"><div>{1 + i % 28:02d}.02.24</div><div><div>merchant {i % 300}</div></div>'
+                   f'<div>category</div><div>{1000 + i % 4}</div><div>type</div><div><span>₪{i}.50</span></div></div>'
+                   for i in range(rows))
+    return f'<html><head><meta charset="utf-8"></head><body>{chrome}<div class="table">{body}</div></body></html>'
+
+
+def legacy_rows(source: str) -> list:
+    """The former extraction, four independent scans of the whole document zipped together"""
+    tree = lxml_html.document_fromstring(source)
+    columns: list = [[cell.text_content().strip() for cell in etree.XPath(loc.max_loc[column][1])(tree)]
+                     for column in extract.COLUMNS]
+    return list(zip(*columns))
+
+
+def main(rows: int = 5000, other_nodes: int = 20000) -> None:
+    """Times both extractions on the same snapshot and prints rows per second"""
+    source: str = page(rows, other_nodes)
+    assert legacy_rows(source) == extract.html_rows(source)
+
+    for name, extraction in (('four column scans', legacy_rows), ('row by row', extract.html_rows)):
+        seconds: float = min(timeit.repeat(lambda: extraction(source), number=1, repeat=5))
+        print(f"{name:>20}: {seconds * 1000:8.1f} ms  {rows / seconds:10,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,61 @@
+"""
+Benchmark of the memory a multi-year, multi-account history takes,
+the data dictionary of parallel lists against the columnar transaction batch.
+Run from the repository root: python -m benchmarks.bench_memory [accounts] [years]
+"""
+import datetime
+import random
+import sys
+import tracemalloc
+
+import func
+from transactions import TransactionBatch
+
+
+ROWS_PER_MONTH: int = 120
+
+
+def history(accounts: int, years: int, seed: int = 7) -> list[list]:
+    """Scraped rows of every account, shaped like the site's, merchants and cards repeat as they do for real"""
+    rng = random.Random(seed)
+    merchants: list = [f'merchant {i}' for i in range(400)] + ['שופרסל', 'ארומה', 'AMAZON']
+    today: datetime.date = datetime.date.today()
+    account_rows: list = []
+
+    for _ in range(accounts):
+        cards: list = [str(rng.randint(1000, 9999)) for _ in range(3)]
+        rows: list = []
+        for _ in range(years * 12 * ROWS_PER_MONTH):
+            day: datetime.date = today - datetime.timedelta(days=rng.randint(0, years * 365))
+            rows.append((f'{day:%d.%m.%y}', rng.choice(merchants), rng.choice(cards),
+                         f"{rng.choice('₪₪₪₪$')}{rng.randint(5, 2000):,}.{rng.randint(0, 99):02d}"))
+        account_rows.append(rows)
+
+    return account_rows
+
+
+def measure(build, account_rows: list) -> int:
+    """The bytes the built representations of every account hold"""
+    tracemalloc.start()
+    built: list = [build(rows) for rows in account_rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def main(accounts: int = 10, years: int = 4) -> None:
+    """Measures both representations on the same history and prints their sizes"""
+    account_rows: list = history(accounts, years)
+    total: int = sum(len(rows) for rows in account_rows)
+
+    data_bytes: int = measure(func.rows_to_data, account_rows)
+    batch_bytes: int = measure(TransactionBatch.from_rows, account_rows)
+
+    print(f"{accounts} accounts, {years} years, {total:,} transactions")
+    print(f"{'data dictionary':>20}: {data_bytes / 1048576:8.1f} MB  {data_bytes / total:6.0f} bytes/row")
+    print(f"{'transaction batch':>20}: {batch_bytes / 1048576:8.1f} MB  {batch_bytes / total:6.0f} bytes/row")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:3]))
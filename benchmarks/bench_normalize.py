@@ -0,0 +1,66 @@
+"""
+Benchmark of the amount normalization, the one pass column normalizer against the former per-element map path.
+Run from the repository root: python -m benchmarks.bench_normalize [rows]
+"""
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+import normalize
+
+
+def legacy_format_amounts(data: str) -> Decimal:
+    """The former per-element amount formatting, rebuilding its translation table on every call"""
+    map_chars = str.maketrans({'₪': '', '$': '', '€': '', '£': '', ',': ''})
+    amount = Decimal(data.translate(map_chars))
+    amount *= -1
+    return amount
+
+
+def legacy_format_currency(data: str) -> str:
+    """The former currency formatting, which only ever looked at the first character"""
+    for rec in data:
+        if '₪' in rec:
+            return 'ILS'
+        if '$' in rec:
+            return 'USD'
+        if '€' in rec:
+            return 'EUR'
+        if '£' in rec:
+            return 'GBP'
+        return "-"
+    return "No Currency Specified"
+
+
+def raw_column(rows: int, seed: int = 7) -> list[str]:
+    """A column of raw amounts shaped like the site's, most of them repeat as real spending does"""
+    rng = random.Random(seed)
+    symbols: list = ['₪'] * 8 + ['$', '€']
+    return [f"{rng.choice(symbols)}{rng.choice((rng.randint(5, 400), rng.randint(1000, 20000))):,}.{rng.randint(0, 99):02d}"
+            for _ in range(rows)]
+
+
+def main(rows: int = 100_000) -> None:
+    """Times both paths on the same column and prints rows per second"""
+    column: list = raw_column(rows)
+
+    def legacy() -> None:
+        list(map(legacy_format_amounts, column))
+        list(map(legacy_format_currency, column))
+
+    def column_pass() -> None:
+        normalize.parse_amount.cache_clear()
+        minor_units, _ = normalize.normalize_amounts(column)
+        list(map(normalize.to_decimal, minor_units))
+
+    results: dict = {'legacy map': min(timeit.repeat(legacy, number=1, repeat=5)),
+                     'normalize_amounts': min(timeit.repeat(lambda: normalize.normalize_amounts(column), number=1, repeat=5)),
+                     'normalize_amounts + Decimal': min(timeit.repeat(column_pass, number=1, repeat=5))}
+
+    for name, seconds in results.items():
+        print(f"{name:>30}: {seconds * 1000:8.1f} ms  {rows / seconds:12,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,331 @@
+"""
+A local stand-in of the Max site, for end-to-end runs and benchmarks without credentials or network.
+It serves the homepage with the login form and its error box, the transactions page
+for every filter the scraper builds, lazily loaded rows and the transactions api,
+all with the markup locators.max_loc targets.
+The transactions are synthetic, spread over the days before today, and every response
+can be delayed. Only the standard library is imported here, so the site can be started
+before MAX_SITE_URL is read.
+
+Run it on its own: python -m benchmarks.fake_max --rows 5000 --latency 0.05
+"""
+# pylint: disable=line-too-long
+import argparse
+import datetime
+import html
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+API_PATH: str = '/api/registered/transactionDetails/getTransactionsAndGraphs'
+CURRENCIES: dict = {'ILS': ('₪', 376), 'USD': ('$', 840), 'EUR': ('€', 978)}
+MERCHANTS: tuple = ('שופרסל', 'ארומה', 'רמי לוי', 'פז', 'סופר-פארם', 'AMAZON', 'ALIEXPRESS', 'NETFLIX.COM',
+                    'WOLT', 'חברת החשמל', 'בזק', 'מקדונלדס', 'IKEA', 'רב קו', 'SPOTIFY')
+
+
+@dataclass
+class Transaction:
+    """One synthetic transaction"""
+    date: datetime.date
+    place: str
+    card: str
+    amount: float           # positive for purchases, negative for refunds
+    currency: str
+
+    @property
+    def raw_amount(self) -> str:
+        """the amount as the site shows it"""
+        sign: str = '-' if self.amount < 0 else ''
+        return f'{sign}{CURRENCIES[self.currency][0]}{abs(self.amount):,.2f}'
+
+
+def generate(rows: int, days: int = 365, seed: int = 7, today: datetime.date | None = None) -> list[Transaction]:
+    """
+    Synthetic transactions spread over the days before today, newest first
+    :param rows: how many transactions
+    :param days: how many days back they go
+    :param seed: the same seed always gives the same transactions
+    :param today: the last day, today by default
+    :return:
+    """
+    rng = random.Random(seed)
+    today = today or datetime.date.today()
+    cards: list = [str(rng.randint(1000, 9999)) for _ in range(3)]
+    transactions: list = []
+
+    for _ in range(rows):
+        currency: str = rng.choices(('ILS', 'USD', 'EUR'), weights=(90, 7, 3))[0]
+        amount: float = round(rng.choice((rng.uniform(5, 400), rng.uniform(400, 12000))), 2)
+        transactions.append(Transaction(today - datetime.timedelta(days=rng.randrange(days)), rng.choice(MERCHANTS),
+                                        rng.choice(cards), -amount if rng.random() < 0.03 else amount, currency))
+
+    transactions.sort(key=lambda transaction: transaction.date, reverse=True)
+    return transactions
+
+
+def window_of(filter_value: str) -> tuple:
+    """
+    The purchase window of a transactions page filter, as func.transactions_url builds them
+    :param filter_value: e.g. '-1_-1_0_2024-01-01_2024-03-01_2024-03-31_-1' or, for a billing month, '-1_-1_0_2024-03-01_-1'
+    :return: (first day, last day) of the purchases shown
+    """
+    parts: list = filter_value.split('_')
+    if len(parts) >= 7:
+        return parse_day(parts[4]), parse_day(parts[5])
+
+    return billing_window(parse_day(parts[3]))
+
+
+def parse_day(day: str) -> datetime.date:
+    """A 'yyyy-m-d' day, the urls do not always pad the month"""
+    return datetime.date(*map(int, day.split('-')))
+
+
+def billing_window(billing_month: datetime.date) -> tuple:
+    """The purchases charged in a billing month are the ones made the month before"""
+    end: datetime.date = billing_month.replace(day=1) - datetime.timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def row_html(transaction: Transaction) -> str:
+    """One table row, in the markup the row locators target"""
+    return (f'<div class="row body"><div>{transaction.date:%d.%m.%y}</div>'
+            f'<div><div>{html.escape(transaction.place)}</div></div><div>קניות</div>'
+            f'<div>{transaction.card}</div><div>רגילה</div><div><span>{transaction.raw_amount}</span></div></div>')
+
+
+HOME_PAGE: str = """<!DOCTYPE html>
+<html lang="he" dir="rtl"><head><meta charset="utf-8"><title>max</title></head><body>
+<header><a href="#" class="go-to-personal-area log-in-status"
+           onclick="document.getElementById('login').style.display = 'block'; return false;">כניסה לאזור האישי</a></header>
+<main><h1>max</h1><p>כרטיסי אשראי, הלוואות והטבות</p></main>
+<div id="login" style="display: none">
+  <a href="#" id="login-id-link">כניסה עם קוד חד פעמי</a>
+  <span onclick="document.getElementById('password-form').style.display = 'block'">כניסה עם סיסמה</span>
+  <form id="password-form" style="display: none" onsubmit="return false;">
+    <input id="user-name" type="text"><input id="password" type="password">
+    <button type="button" onclick="login()"><span>לכניסה לאזור האישי</span></button>
+    <div class="error-msg bio-error" style="display: none">אחד או יותר מהפרטים שהזנת שגויים</div>
+  </form>
+</div>
+<script>
+async function login() {
+    const response = await fetch('/login', {method: 'POST', headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({username: document.getElementById('user-name').value,
+                              password: document.getElementById('password').value})});
+    if (response.ok) { window.location.href = '/transaction-details/personal'; }
+    else { document.querySelector('.error-msg').style.display = 'block'; }
+}
+</script></body></html>"""
+
+TRANSACTIONS_PAGE: str = """<!DOCTYPE html>
+<html lang="he" dir="rtl"><head><meta charset="utf-8"><title>פירוט עסקאות</title></head><body>
+<h1>פירוט עסקאות</h1>
+<div class="table">{rows}</div>
+{load_more}
+<script>
+fetch('{api}?from={start}&to={end}', {{credentials: 'include'}});
+let offset = {shown};
+async function more() {{
+    const response = await fetch('/rows?filter={filter}&offset=' + offset);
+    const batch = await response.json();
+    document.querySelector('.table').insertAdjacentHTML('beforeend', batch.html);
+    offset += batch.count;
+    if (!batch.more) {{ document.querySelector('.load-more').remove(); }}
+}}
+</script></body></html>"""
+
+
+class FakeMaxHandler(BaseHTTPRequestHandler):
+    """Answers the pages and the api of the fake site"""
+    server: 'FakeMax'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """pages, lazily loaded rows and the api"""
+        url = urlparse(self.path)
+        query: dict = {key: values[0] for key, values in parse_qs(url.query).items()}
+        time.sleep(self.server.site.latency)
+
+        if url.path == '/':
+            self._send(200, HOME_PAGE)
+
+        elif url.path == '/robots.txt':
+            self._send(200, 'User-agent: *\nDisallow: /transaction-details/\n', 'text/plain')
+
+        elif not self._logged_in():
+            self._redirect('/')
+
+        elif url.path == '/transaction-details/personal':
+            self._transactions_page(query.get('filter'))
+
+        elif url.path == '/rows':
+            self._rows(query['filter'], int(query['offset']))
+
+        elif url.path == API_PATH:
+            self._api(query)
+
+        else:
+            self._send(404, 'not found', 'text/plain')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """the login form"""
+        time.sleep(self.server.site.latency)
+        body: dict = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+
+        if (urlparse(self.path).path != '/login' or body.get('username') != self.server.site.email
+                or body.get('password') != self.server.site.password):
+            self._send(401, '{"error": "wrong credentials"}', 'application/json')
+            return
+
+        token: str = secrets.token_hex(16)
+        self.server.site.tokens.add(token)
+        self._send(200, '{"ok": true}', 'application/json', cookie=f'auth={token}; Path=/; HttpOnly')
+
+    def _logged_in(self) -> bool:
+        """whether the request carries a session cookie the site handed out"""
+        cookies: dict = dict(part.strip().split('=', 1) for part in self.headers.get('Cookie', '').split(';') if '=' in part)
+        return cookies.get('auth') in self.server.site.tokens
+
+    def _transactions_page(self, filter_value: str | None) -> None:
+        """the transactions table, all of it or its first page when rows load lazily"""
+        today: datetime.date = datetime.date.today()
+        filter_value = filter_value or f'-1_-1_0_{today.year}-01-01_{today.replace(day=1)}_{today}_-1'
+        start, end = window_of(filter_value)
+        transactions: list = self.server.site.between(start, end)
+
+        page_size: int = self.server.site.page_size or len(transactions)
+        shown: list = transactions[:page_size]
+        load_more: str = ('<button class="load-more" onclick="more()">הצג עוד</button>'
+                          if len(transactions) > page_size else '')
+
+        self._send(200, TRANSACTIONS_PAGE.format(rows=''.join(map(row_html, shown)), load_more=load_more,
+                                                 api=API_PATH, start=start, end=end, shown=len(shown),
+                                                 filter=filter_value))
+
+    def _rows(self, filter_value: str, offset: int) -> None:
+        """the next page of a lazily loaded table"""
+        transactions: list = self.server.site.between(*window_of(filter_value))
+        batch: list = transactions[offset:offset + self.server.site.page_size]
+        self._send(200, json.dumps({'html': ''.join(map(row_html, batch)), 'count': len(batch),
+                                    'more': offset + len(batch) < len(transactions)}, ensure_ascii=False),
+                   'application/json')
+
+    def _api(self, query: dict) -> None:
+        """the transactions of a billing month, or of a purchase window as the transactions page asks for"""
+        if 'filterData' in query:
+            start, end = billing_window(datetime.date.fromisoformat(json.loads(query['filterData'])['date']))
+        else:
+            start, end = datetime.date.fromisoformat(query['from']), datetime.date.fromisoformat(query['to'])
+
+        payload: dict = {'result': {'transactions': [
+            {'purchaseDate': f'{transaction.date}T00:00:00', 'merchantName': transaction.place,
+             'shortCardNumber': transaction.card, 'actualPaymentAmount': transaction.amount,
+             'paymentCurrency': CURRENCIES[transaction.currency][1]}
+            for transaction in self.server.site.between(start, end)]}}
+        self._send(200, json.dumps(payload, ensure_ascii=False), 'application/json')
+
+    def _send(self, status: int, body: str, content_type: str = 'text/html', cookie: str | None = None) -> None:
+        """writes a whole response"""
+        encoded: bytes = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(encoded)))
+        if cookie:
+            self.send_header('Set-Cookie', cookie)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _redirect(self, location: str) -> None:
+        """sends a visitor without a session back to the homepage"""
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *_):
+        """keeps the output clean"""
+
+
+class FakeMax(ThreadingHTTPServer):
+    """The http server of the fake site"""
+    daemon_threads = True
+
+    def __init__(self, site: 'Site', port: int = 0):
+        self.site = site
+        super().__init__(('127.0.0.1', port), FakeMaxHandler)
+
+
+@dataclass
+class Site:                  # pylint: disable=too-many-instance-attributes
+    """
+    The fake site and its settings
+    rows: how many transactions the account has, spread over the last days days
+    latency: seconds every response is delayed by
+    page_size: rows shown before load more is clicked, 0 shows the whole table at once
+    """
+    rows: int = 100
+    days: int = 365
+    latency: float = 0.0
+    page_size: int = 0
+    email: str = 'user@example.com'
+    password: str = 'password'
+    seed: int = 7
+    tokens: set = field(default_factory=set)
+    transactions: list = field(default_factory=list)
+    server: FakeMax | None = None
+
+    def between(self, start: datetime.date, end: datetime.date) -> list[Transaction]:
+        """the transactions purchased within the window, newest first"""
+        return [transaction for transaction in self.transactions if start <= transaction.date <= end]
+
+    @property
+    def url(self) -> str:
+        """the base url of the running site"""
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def start(self, port: int = 0) -> 'Site':
+        """generates the transactions and serves the site in the background"""
+        self.transactions = generate(self.rows, self.days, self.seed)
+        self.server = FakeMax(self, port)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        """stops serving"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'Site':
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Serves the fake site until interrupted"""
+    parser = argparse.ArgumentParser(description='a local stand-in of the Max site')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--page_size', type=int, default=0)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    site = Site(rows=args.rows, days=args.days, latency=args.latency, page_size=args.page_size).start(args.port)
+    print(f'fake max on {site.url}, log in as {site.email} / {site.password}\n'
+          f'point the scraper at it with MAX_SITE_URL={site.url} MAX_API_URL={site.url}')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
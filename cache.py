@@ -0,0 +1,105 @@
+"""
+Module responsible for caching scraped month results on disk.
+Months that closed a couple of billing cycles ago never change so they never expire,
+the current and previous months are kept for a short while only.
+The least recently used months are evicted once the cache grows past its size cap.
+"""
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dateutil.relativedelta import relativedelta
+from loguru import logger
+
+
+CACHE_DIR: str = os.environ.get('MAX_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.max_cache'))
+MAX_BYTES: int = 64 * 1024 * 1024
+LIVE_TTL: int = 60 * 60         # seconds the current and previous months are trusted for
+
+
+def _path(account: str, kind: str, month: datetime.date) -> str:
+    """The cache file of an account month, named by a hash so the email is not written to disk"""
+    account_key: str = hashlib.sha256(account.lower().encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f'{account_key}_{kind}_{month:%Y-%m}.json')
+
+
+def is_live(month: datetime.date, today: datetime.date | None = None) -> bool:
+    """Whether the month may still change, the current and previous months do"""
+    today = today or datetime.date.today()
+    return month.replace(day=1) >= today.replace(day=1) - relativedelta(months=1)
+
+
+def get(account: str, kind: str, month: datetime.date) -> list | None:
+    """
+    Reads the cached rows of a month
+    :param account: the account email
+    :param kind: 'purchase' for months of purchases, 'billing' for billing month views
+    :param month: any day of the month
+    :return: list of (date, place, card, amount) rows, None when not cached or expired
+    """
+    path: str = _path(account, kind, month)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            entry: dict = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if is_live(month) and time.time() - entry['cached_at'] > LIVE_TTL:
+        return None
+
+    try:
+        os.utime(path)      # marks the month as recently used
+    except FileNotFoundError:
+        pass                # evicted meanwhile by another writer, the rows read are still good
+    return [tuple(row) for row in entry['rows']]
+
+
+def put(account: str, kind: str, month: datetime.date, rows: list) -> None:
+    """
+    Caches the rows of a month and evicts the least recently used months over the size cap
+    :param account: the account email
+    :param kind: 'purchase' for months of purchases, 'billing' for billing month views
+    :param month: any day of the month
+    :param rows: list of (date, place, card, amount) rows
+    :return:
+    """
+    os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    path: str = _path(account, kind, month)
+    # every writer has its own temporary file, two threads caching the same month never share one
+    temp_path: str = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump({'cached_at': time.time(), 'rows': rows}, file, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+    evict()
+
+
+def evict(max_bytes: int | None = None) -> None:
+    """
+    Removes the least recently used months until the cache fits max_bytes.
+    Other threads and processes write and evict meanwhile, a month gone since the listing is skipped
+    """
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    entries: list = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith('.json'):
+            try:
+                stat = os.stat(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+    total: int = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        total -= size
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            continue
+        logger.debug(f"evicted {name} from the month cache")
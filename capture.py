@@ -0,0 +1,89 @@
+"""
+Module responsible for capturing the transactions JSON the site fetches in the background.
+The responses are read through Chrome's DevTools performance log and decoded straight into rows,
+without waiting for the table to render.
+"""
+import datetime
+import json
+from decimal import Decimal
+
+from loguru import logger
+
+import utils as u
+import waits
+
+
+# the endpoint the transaction-details page loads its transactions from
+TRANSACTIONS_API: str = '/api/registered/transactionDetails/getTransactionsAndGraphs'
+
+# ISO 4217 numeric codes the api uses for the charged currency
+CURRENCY_CODES: dict = {376: 'ILS', 840: 'USD', 978: 'EUR', 826: 'GBP'}
+CURRENCY_SYMBOLS: dict = {'ILS': '₪', 'USD': '$', 'EUR': '€', 'GBP': '£'}
+
+
+def enable(chrome_options) -> None:
+    """Turns on the performance log the capture engine reads the network traffic from"""
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def drain(driver) -> None:
+    """Drops the logged traffic so far, call it before navigating to the page to capture"""
+    driver.get_log('performance')
+
+
+def capture_rows(driver, timeout: float = 30) -> list[tuple]:
+    """
+    Waits for the transactions responses of the current page and decodes them into rows
+    :param driver: a driver created with enable, navigated after drain
+    :param timeout: seconds to wait for the responses
+    :return: list of (date, place, card, amount) rows
+    """
+    responses: set = set()
+    finished: set = set()
+
+    def _captured(drv) -> bool:
+        for entry in drv.get_log('performance'):
+            message: dict = json.loads(entry['message'])['message']
+            params: dict = message.get('params', {})
+
+            if message['method'] == 'Network.responseReceived' and TRANSACTIONS_API in params['response']['url']:
+                responses.add(params['requestId'])
+            elif message['method'] == 'Network.loadingFinished' and params['requestId'] in responses:
+                finished.add(params['requestId'])
+
+        return bool(finished) and finished == responses and waits.network_idle()(drv)
+
+    u.WDW(driver, timeout, poll_frequency=waits.POLL_FREQUENCY).until(_captured)
+    logger.info(f"captured {len(finished)} transactions responses")
+
+    rows: list = []
+    for request_id in sorted(finished):
+        body: dict = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        rows.extend(payload_rows(json.loads(body['body'], parse_float=Decimal)))
+
+    return rows
+
+
+def payload_rows(payload: dict) -> list[tuple]:
+    """
+    Decodes a transactions response into rows shaped as the rendered table
+    :param payload: the response json, floats parsed as Decimal so amounts stay exact
+    :return: list of (date, place, card, amount) rows
+    """
+    transactions: list = (payload.get('result') or {}).get('transactions') or []
+    rows: list = []
+
+    for transaction in transactions:
+        amount = transaction.get('actualPaymentAmount')
+        if amount is None:
+            continue
+
+        currency: str = CURRENCY_CODES.get(transaction.get('paymentCurrency'), '')
+        purchase_date = datetime.datetime.fromisoformat(transaction['purchaseDate']).date()
+
+        rows.append((purchase_date.strftime('%d.%m.%y'),
+                     transaction.get('merchantName') or '',
+                     str(transaction.get('shortCardNumber') or ''),
+                     f"{CURRENCY_SYMBOLS.get(currency, '')}{Decimal(amount)}"))
+
+    return rows
@@ -0,0 +1,315 @@
+"""
+Module responsible for the long-lived scraper daemon.
+It keeps a pool of warm, logged in browsers and answers fetch requests over a local Unix socket,
+streaming the rows back as JSON lines, so a request only costs rendering the transactions page.
+"""
+import hmac
+import json
+import os
+import socket
+import socketserver
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+from loguru import logger
+
+import argum
+import locators as loc
+import session
+from transactions import TransactionBatch
+
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+
+SOCKET_PATH: str = os.environ.get('MAX_DAEMON_SOCKET', '/tmp/max-get-transactions.sock')
+
+
+@dataclass
+class PooledDriver:
+    """A warm browser logged in to one account"""
+    driver: 'webdriver.Chrome'
+    email: str
+    key: str = ''           # the credentials it logged in with, see session.credentials_key
+    uses: int = 0
+
+
+@dataclass
+class BrowserPool:  # pylint: disable=too-many-instance-attributes
+    """
+    Pool of warm, logged in browsers keyed by account and the password they logged in with.
+    Drivers are recycled after max_uses fetches or when their page heap grows past max_heap_mb.
+    """
+    driver_factory: Callable[[], 'webdriver.Chrome']           # a new driver on a max.co.il page
+    login: Callable[['webdriver.Chrome', str, str], None]       # (driver, email, password)
+    # (driver, email, password), logs a warm driver in again once the site expired its session
+    ensure_login: Callable[['webdriver.Chrome', str, str], None] | None = None
+    max_size: int = 2
+    max_uses: int = 50
+    max_heap_mb: float = 512
+    _idle: list = field(default_factory=list)
+    _size: int = 0
+    _lock: threading.Condition = field(default_factory=threading.Condition)
+
+    def acquire(self, email: str, password: str) -> PooledDriver:
+        """
+        Hands out a warm driver of the account, starting and logging in a new one when needed.
+        A warm driver is only handed out for the password it logged in with,
+        and its session is checked first
+        :param email: the account email
+        :param password: the account password
+        :return:
+        """
+        key: str = session.credentials_key(email, password)
+        dropped: PooledDriver | None = None
+        with self._lock:
+            while True:
+                warm: PooledDriver | None = next((pooled for pooled in self._idle
+                                                  if pooled.email == email
+                                                  and hmac.compare_digest(pooled.key, key)), None)
+                if warm is not None:
+                    self._idle.remove(warm)
+                    break
+
+                # make room by dropping a warm driver of another account,
+                # it is quit once the lock is released
+                if self._size >= self.max_size and self._idle:
+                    dropped = self._idle.pop(0)
+                    self._size -= 1
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                self._lock.wait()
+
+        if dropped is not None:
+            self._quit(dropped)
+
+        driver: 'webdriver.Chrome | None' = None if warm is None else warm.driver
+        try:
+            if warm is not None:
+                if self.ensure_login is not None:
+                    self.ensure_login(driver, email, password)
+                return warm
+
+            logger.info(f"warming a new browser, pool holds {self._size} of {self.max_size}")
+            driver = self.driver_factory()
+            self.login(driver, email, password)
+            return PooledDriver(driver, email, key)
+
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            if driver is not None:
+                self._quit(PooledDriver(driver, email))
+            raise
+
+    def release(self, pooled: PooledDriver, healthy: bool = True) -> None:
+        """
+        Returns a driver to the pool, recycling it when it is worn out
+        :param pooled: the driver handed out by acquire
+        :param healthy: False when the fetch failed and the browser state cannot be trusted
+        :return:
+        """
+        pooled.uses += 1
+        # asks the browser, so outside the lock
+        keep: bool = healthy and not self._worn_out(pooled)
+        with self._lock:
+            if keep:
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+            self._lock.notify()
+
+        if not keep:
+            self._quit(pooled)
+
+    def close(self) -> None:
+        """Quits every idle driver"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+
+        for pooled in idle:
+            self._quit(pooled)
+
+    def _worn_out(self, pooled: PooledDriver) -> bool:
+        """Checks whether the driver should be recycled"""
+        if pooled.uses >= self.max_uses:
+            logger.info(f"recycling a browser after {pooled.uses} uses")
+            return True
+
+        try:
+            heap_mb: float = pooled.driver.execute_script(loc.max_js['js_heap_mb'])
+        except Exception:       # pylint: disable=broad-exception-caught
+            return True
+
+        if heap_mb > self.max_heap_mb:
+            logger.info(f"recycling a browser holding {heap_mb:.0f}MB of page heap")
+            return True
+
+        return False
+
+    @staticmethod
+    def _quit(pooled: PooledDriver) -> None:
+        """
+        Quits a driver whose place in the pool was already freed.
+        Never called with the lock held, a browser takes a while to shut down
+        and every other handler would wait
+        """
+        try:
+            pooled.driver.quit()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.debug(f"browser did not quit cleanly: {e}")
+
+
+class _FetchHandler(socketserver.StreamRequestHandler):
+    """Answers one JSON fetch request with one JSON line per row and a closing summary line"""
+
+    def handle(self) -> None:
+        try:
+            request: dict = json.loads(self.rfile.readline())
+        except ValueError:
+            self._send({"error": "request must be one line of JSON"})
+            return
+
+        # a bad request is answered before any browser is taken for it,
+        # it says nothing about the browser
+        try:
+            request = validate_request(request)
+        except (ValueError, TypeError, SystemExit) as e:
+            self._send({"error": str(e)})
+            return
+
+        pooled: PooledDriver | None = None
+        healthy: bool = False
+        try:
+            pooled = self.server.pool.acquire(request['email'], request['password'])
+            data: dict | TransactionBatch | None = self.server.fetch(pooled.driver,
+                                                                     request['request'], request)
+            healthy = True
+
+        except (Exception, SystemExit) as e:   # pylint: disable=broad-exception-caught
+            logger.error(f"fetch failed: {e}")
+            self._send({"error": str(e)})
+            return
+
+        finally:
+            # the rows are in hand, the browser is free for the next request before they are sent
+            if pooled is not None:
+                self.server.pool.release(pooled, healthy)
+
+        if data is None:
+            self._send({"error": f"unknown request: {request['request']}"})
+            return
+
+        for row in data_rows(data):
+            self._send(row)
+        count: int = len(data) if isinstance(data, TransactionBatch) else len(data['dates'])
+        self._send({"done": True, "count": count})
+
+    def _send(self, message: dict) -> None:
+        """writes one JSON line to the client"""
+        self.wfile.write(json.dumps(message, ensure_ascii=False).encode() + b'\n')
+        self.wfile.flush()
+
+
+class TransactionsDaemon(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server holding the browser pool"""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, pool: BrowserPool, fetch):
+        """
+        :param socket_path: where to listen, only the current user can connect
+        :param pool: the warm browser pool
+        :param fetch: (driver, request, request_dict) -> transaction batch or data dictionary,
+                      as func.fetch_batch
+        """
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+        self.pool = pool
+        self.fetch = fetch
+        super().__init__(socket_path, _FetchHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def validate_request(request: dict) -> dict:
+    """
+    Checks a request as the command line arguments are checked, see argum.get_cli_arguments
+    :param request: the request as the client sent it
+    :return: the request, a month request with its month converted as the command line does
+    :raises ValueError, TypeError or SystemExit: when the request cannot be fetched
+    """
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+
+    for key in ('request', 'email', 'password'):
+        if not request.get(key):
+            raise ValueError(f"the request has no {key}")
+
+    if request['request'] == 'range':
+        argum.range_date_validation(request.get('start_date'), request.get('end_date'))
+
+    elif request['request'] == 'month':
+        month: str = str(request.get('month', ''))
+        if not month.isdigit() or int(month) > 12:
+            raise ValueError(f"month must be a number from 0 to 12, not {request.get('month')!r}")
+        argum.year_validation(request.get('year'))
+        argum.month_validation(request['year'], month)
+        return {**request, 'month': argum.month_converter(month)}
+
+    return request
+
+
+def data_rows(data: dict | TransactionBatch):
+    """Yields the rows of a transaction batch or a data dictionary as JSON ready dicts"""
+    if isinstance(data, TransactionBatch):
+        rows = ((date, place, card, amount, currency)
+                for date, place, card, _, amount, currency in data.rows())
+    else:
+        rows = zip(data['dates'], data['places'], data['cards'], data['amounts'], data['currency'])
+
+    for date, place, card, amount, currency in rows:
+        yield {"date": date, "place": place, "card": card, "amount": str(amount),
+               "currency": currency}
+
+
+def serve(pool: BrowserPool, fetch, socket_path: str = SOCKET_PATH) -> None:
+    """Runs the daemon until interrupted"""
+    with TransactionsDaemon(socket_path, pool, fetch) as server:
+        logger.success(f"daemon listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("daemon shutting down")
+
+
+def request_rows(request: dict, socket_path: str = SOCKET_PATH):
+    """
+    Client side, sends a fetch request to the daemon and yields the rows as they arrive
+    :param request: request type, dates and account as in the CLI arguments dictionary
+    :param socket_path: where the daemon listens
+    :return:
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode() + b'\n')
+
+        with client.makefile('rb') as lines:
+            for line in lines:
+                message: dict = json.loads(line)
+                if 'error' in message:
+                    raise RuntimeError(message['error'])
+                if message.get('done'):
+                    return
+                yield message
@@ -0,0 +1,72 @@
+"""
+Module responsible for resolving the chromedriver binary.
+The resolved path is kept in a local manifest together with the installed Chrome version,
+so as long as Chrome is not upgraded a run starts the driver without any network I/O.
+"""
+import json
+import os
+import time
+
+from loguru import logger
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+
+
+MANIFEST_PATH: str = os.environ.get('MAX_DRIVER_MANIFEST',
+                                    os.path.join(os.path.expanduser('~'), '.max_cache', 'driver', 'chromedriver.json'))
+
+
+def installed_chrome_version() -> str | None:
+    """The version of the locally installed Chrome, read from the OS without any network I/O"""
+    try:
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception as e:      # pylint: disable=broad-exception-caught
+        logger.debug(f"could not read the installed Chrome version: {e}")
+        return None
+
+
+def load_manifest() -> dict:
+    """The last resolved chromedriver, empty when nothing was resolved yet"""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(chrome_version: str | None, driver_path: str) -> None:
+    """Records the resolved chromedriver for the next runs"""
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as file:
+        json.dump({'chrome_version': chrome_version, 'driver_path': driver_path, 'resolved_at': time.time()}, file)
+
+
+def resolve(install=None) -> str:
+    """
+    Resolves the chromedriver path, reusing the manifest while the installed Chrome version did not change
+    :param install: () -> driver path, the network resolution, ChromeDriverManager().install by default
+    :return: the chromedriver path
+    """
+    start: float = time.perf_counter()
+    chrome_version: str | None = installed_chrome_version()
+    manifest: dict = load_manifest()
+    cached_path: str | None = manifest.get('driver_path')
+    cached_usable: bool = bool(cached_path) and os.path.exists(cached_path)
+
+    if cached_usable and (chrome_version is None or manifest.get('chrome_version') == chrome_version):
+        logger.info(f"chromedriver resolved from the manifest in {time.perf_counter() - start:.3f}s")
+        return cached_path
+
+    try:
+        driver_path: str = (install or ChromeDriverManager().install)()
+
+    except Exception as e:      # pylint: disable=broad-exception-caught
+        # network isolated, an older driver is better than no driver
+        if not cached_usable:
+            raise
+        logger.warning(f"could not resolve a chromedriver for Chrome {chrome_version}, reusing {cached_path}: {e}")
+        return cached_path
+
+    save_manifest(chrome_version, driver_path)
+    logger.info(f"chromedriver resolved for Chrome {chrome_version} in {time.perf_counter() - start:.3f}s")
+    return driver_path
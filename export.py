@@ -0,0 +1,132 @@
+"""
+Module responsible for writing the transactions to files.
+Rows are streamed straight to the file, nothing is copied into an intermediate table.
+Parquet and JSON Lines are written partitioned by year-month, so readers can skip whole months.
+"""
+import csv
+import datetime
+import json
+import os
+from decimal import Decimal
+
+
+CSV_HEADER: tuple = ('', 'dates', 'places', 'cards', 'amounts_raw', 'amounts', 'currency')
+UNKNOWN_PARTITION: str = 'unknown'
+AMOUNT_SCALE: Decimal = Decimal('0.01')         # minor units of every currency the site shows
+
+
+def data_rows(data: dict):
+    """Yields the (date, place, card, raw amount, amount, currency) rows of a data dictionary without copying it"""
+    return zip(data['dates'], data['places'], data['cards'], data['amounts_raw'], data['amounts'], data['currency'])
+
+
+def row_sort_key(row: tuple) -> datetime.date:
+    """The purchase date of a formatted row, rows with no date go last"""
+    try:
+        return datetime.datetime.strptime(row[0], '%d/%m/%y').date()
+    except ValueError:
+        return datetime.date.min
+
+
+def write_csv(path: str, rows, sort: bool = True) -> dict:
+    """
+    Streams the rows into a CSV file with a BOM so Excel reads the Hebrew right,
+    followed by a total row per currency
+    :param path: the file to write
+    :param rows: iterable of (date, place, card, raw amount, amount, currency) rows
+    :param sort: sort the rows by date, newest first, as the site lists them.
+                 sorting has to hold the rows, pass False to keep memory flat
+    :return: the totals per currency
+    """
+    if sort:
+        rows = sorted(rows, key=row_sort_key, reverse=True)
+
+    totals: dict = {}
+    with open(path, 'w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_HEADER)
+
+        for index, row in enumerate(rows):
+            writer.writerow((index, *row))
+            totals[row[5]] = totals.get(row[5], Decimal(0)) + row[4]
+
+        for currency, total in totals.items():
+            writer.writerow(('Total', '', '', '', '', total, currency))
+
+    return totals
+
+
+def partition_of(row: tuple) -> str:
+    """The year-month partition of a formatted row"""
+    date: datetime.date = row_sort_key(row)
+    return UNKNOWN_PARTITION if date == datetime.date.min else f'{date:%Y-%m}'
+
+
+def write_jsonl(directory: str, rows) -> list[str]:
+    """
+    Streams the rows into newline-delimited JSON files, one per year-month partition.
+    Amounts are written as strings so they stay exact.
+    :param directory: the dataset directory, partitions go under year_month=YYYY-MM
+    :param rows: iterable of (date, place, card, raw amount, amount, currency) rows
+    :return: the written files
+    """
+    files: dict = {}
+    try:
+        for row in rows:
+            partition: str = partition_of(row)
+            if partition not in files:
+                partition_dir: str = os.path.join(directory, f'year_month={partition}')
+                os.makedirs(partition_dir, exist_ok=True)
+                files[partition] = open(os.path.join(partition_dir, 'part-0.jsonl'), 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+
+            date: datetime.date = row_sort_key(row)
+            record: dict = {"date": None if date == datetime.date.min else date.isoformat(),
+                            "place": row[1], "card": row[2], "amount_raw": row[3],
+                            "amount": str(row[4]), "currency": row[5]}
+            files[partition].write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    finally:
+        for file in files.values():
+            file.close()
+
+    return sorted(file.name for file in files.values())
+
+
+def write_parquet(directory: str, rows) -> list[str]:
+    """
+    Writes the rows as a Parquet dataset partitioned by year-month, with typed columns:
+    date32 dates, decimal128 amounts and dictionary encoded places, cards and currencies.
+    pyarrow is an optional dependency, needed only for this format.
+    :param directory: the dataset directory, partitions go under year_month=YYYY-MM
+    :param rows: iterable of (date, place, card, raw amount, amount, currency) rows
+    :return: the written files
+    """
+    try:
+        import pyarrow as pa                # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet as pq        # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise SystemExit('the parquet format needs pyarrow, install it with: pip install pyarrow') from e
+
+    columns: dict = {'date': [], 'place': [], 'card': [], 'amount_raw': [], 'amount': [], 'currency': [], 'year_month': []}
+    for row in rows:
+        date: datetime.date = row_sort_key(row)
+        columns['date'].append(None if date == datetime.date.min else date)
+        columns['place'].append(row[1])
+        columns['card'].append(row[2])
+        columns['amount_raw'].append(row[3])
+        columns['amount'].append(row[4].quantize(AMOUNT_SCALE))
+        columns['currency'].append(row[5])
+        columns['year_month'].append(partition_of(row))
+
+    table = pa.table({'date': pa.array(columns['date'], pa.date32()),
+                      'place': pa.array(columns['place'], pa.string()).dictionary_encode(),
+                      'card': pa.array(columns['card'], pa.string()).dictionary_encode(),
+                      'amount_raw': pa.array(columns['amount_raw'], pa.string()),
+                      'amount': pa.array(columns['amount'], pa.decimal128(18, 2)),
+                      'currency': pa.array(columns['currency'], pa.string()).dictionary_encode(),
+                      'year_month': pa.array(columns['year_month'], pa.string())})
+
+    written: list = []
+    pq.write_to_dataset(table, directory, partition_cols=['year_month'],
+                        file_visitor=lambda written_file: written.append(written_file.path))
+    return sorted(written)
@@ -0,0 +1,213 @@
+"""
+Module responsible for extracting the transaction rows out of the transactions page.
+Every engine here returns plain rows of (date, place, card, amount) strings.
+"""
+# pylint: disable=c-extension-no-member
+import threading
+import time
+
+from lxml import etree
+from lxml import html as lxml_html
+from loguru import logger
+
+import utils as u
+import locators as loc
+import waits
+
+
+# the cells of a row, in the order every engine returns them, each read relative to its row
+CELLS: tuple = ('row_date', 'row_place', 'row_card', 'row_amount')
+REQUIRED_CELLS: tuple = (0, 3)          # a row without a date or an amount is not a transaction
+
+# the column locators of the former engines, kept for columns_to_rows callers
+COLUMNS: tuple = ('transactions_date', 'transactions_place', 'transactions_card',
+                  'transactions_amount')
+
+# compiled once, the html engine reuses the same expressions the browser does
+_tables = etree.XPath(loc.max_loc['transactions_tables'][1])
+_row = etree.XPath(loc.max_loc['transactions_row'][1])
+_cells: tuple = tuple(etree.XPath(loc.max_loc[cell][1]) for cell in CELLS)
+
+# the scrape_rows script arguments following the first row to return
+_script_args: tuple = (loc.max_loc['transactions_tables'][1], loc.max_loc['transactions_row'][1],
+                       *(loc.max_loc[cell][1] for cell in CELLS))
+
+# reads of the current thread that skipped rows or stopped short of the table, see incomplete_reads
+_reads = threading.local()
+
+
+def incomplete_reads() -> int:
+    """
+    How many reads of the current thread skipped a row or stopped short of the rendered table
+    so far, callers compare it before and after a fetch to tell whether every row of it was read
+    """
+    return getattr(_reads, 'incomplete', 0)
+
+
+def _incomplete() -> None:
+    """notes a read of the current thread that did not return every row of the table"""
+    _reads.incomplete = incomplete_reads() + 1
+
+
+def script_rows(driver, timeout: int = 30) -> list[tuple]:
+    """
+    Pulls every row of the transactions table with one in-browser script call
+    instead of reading every cell through its own WebDriver command.
+    :param driver: the driver, already on the transactions page
+    :param timeout: seconds to wait for the table to render
+    :return: list of (date, place, card, amount) rows
+    """
+    waits.table_ready(driver, timeout)
+
+    return cells_to_rows(driver.execute_script(loc.max_js['scrape_rows'], 0, *_script_args))
+
+
+def paged_rows(driver, timeout: int = 30) -> list[tuple]:
+    """
+    Pulls every row of a lazily loaded transactions table, see paged_batches
+    :param driver: the driver, already on the transactions page
+    :param timeout: seconds to wait for the table, and for every next batch
+    :return: list of (date, place, card, amount) rows
+    """
+    return [row for batch in paged_batches(driver, timeout) for row in batch]
+
+
+def paged_batches(driver, timeout: int = 30, quiet_ms: int = 1500):
+    """
+    Pages through a lazily loaded transactions table, scrolling down and clicking load more
+    until the row count stops growing, and yields every batch of new rows as soon as it loaded.
+    Only the rows past the ones already read cross the WebDriver wire.
+    :param driver: the driver, already on the transactions page
+    :param timeout: seconds to wait for the table, and for every next batch
+    :param quiet_ms: the table is complete once the page fetched nothing for that long
+                     after a load more
+    :return: generator of batches, each a list of (date, place, card, amount) rows
+    """
+    waits.table_ready(driver, timeout)
+    start: float = time.perf_counter()
+    read: int = 0
+    batches: int = 0
+
+    while True:
+        # every row read moves the offset on,
+        # a row that could not be read does not shift the next ones
+        cells: list = driver.execute_script(loc.max_js['scrape_rows'], read, *_script_args)
+        if cells:
+            read += len(cells)
+            batches += 1
+            yield cells_to_rows(cells, first_index=read - len(cells))
+
+        driver.execute_script(loc.max_js['load_more'], loc.max_loc['transactions_rows'][1],
+                              loc.max_loc['transactions_load_more'][1])
+        if waits.more_rows(driver, read, timeout, quiet_ms) != 'grew':
+            break
+
+    # rows rendered after the last read mean the export is not complete
+    rendered: int = int(driver.execute_script(loc.max_js['count_nodes'],
+                                              loc.max_loc['transactions_rows'][1]))
+    elapsed: float = time.perf_counter() - start
+    logger.info(f"paged {read} of {rendered} rows in {batches} batches, "
+                f"{read / elapsed if elapsed else 0:.0f} rows/s")
+    if read != rendered:
+        logger.warning(f"the table holds {rendered} rows but {read} rows were read")
+        _incomplete()
+
+
+def cells_to_rows(cells: list, first_index: int = 0) -> list[tuple]:
+    """
+    Turns the cells read row by row into rows. A row that could not be read,
+    or lacks its date or amount, is skipped on its own, a missing place or card is left empty,
+    so no row ever takes another row's cells.
+    A blank cell is missing as well, the engines read an empty cell as ''.
+    :param cells: one list of cell texts per row, ordered as CELLS,
+                  None for a cell or a row that could not be read
+    :param first_index: the table index of the first row, for the log
+    :return: list of (date, place, card, amount) rows
+    """
+    rows: list = []
+    for index, row in enumerate(cells, first_index):
+        if row is None or any(not (row[cell] or '').strip() for cell in REQUIRED_CELLS):
+            logger.warning(f"skipped transactions table row {index}, its cells were: {row}")
+            _incomplete()
+            continue
+        rows.append(tuple(cell or '' for cell in row))
+
+    return rows
+
+
+def element_rows(driver, timeout: int = 30) -> list[tuple]:
+    """
+    Reads every row through WebDriver, finding the containers of the rows once
+    and every cell relative to its row
+    :param driver: the driver, already on the transactions page
+    :param timeout: seconds to wait for the table to render
+    :return: list of (date, place, card, amount) rows
+    """
+    waits.table_ready(driver, timeout)
+    cells: list = []
+    for table in driver.find_elements(*loc.max_loc['transactions_tables']):
+        for row in table.find_elements(*loc.max_loc['transactions_row']):
+            try:
+                cells.append([next((str(cell.text).strip()
+                                    for cell in row.find_elements(*loc.max_loc[name])), None)
+                              for name in CELLS])
+            except u.StaleElementReferenceException:
+                cells.append(None)
+
+    return cells_to_rows(cells)
+
+
+def columns_to_rows(columns: list) -> list[tuple]:
+    """
+    Zips the column lists into rows
+    :param columns: four lists of cell texts, ordered as COLUMNS
+    :return: list of (date, place, card, amount) rows
+    """
+    lengths: set = {len(col) for col in columns}
+    if len(lengths) > 1:
+        logger.warning("transactions table columns are not aligned, "
+                       f"lengths are: {[len(c) for c in columns]}")
+
+    return list(zip(*columns))
+
+
+def page_source_rows(driver, timeout: int = 30) -> list[tuple]:
+    """
+    Takes one page source snapshot once the table rendered and parses it outside the browser
+    :param driver: the driver, already on the transactions page
+    :param timeout: seconds to wait for the table to render
+    :return: list of (date, place, card, amount) rows
+    """
+    waits.table_ready(driver, timeout)
+
+    return html_rows(driver.page_source)
+
+
+def html_file_rows(path: str) -> list[tuple]:
+    """
+    Parses a transactions page saved on disk, no login needed
+    :param path: path to the saved html file
+    :return: list of (date, place, card, amount) rows
+    """
+    logger.info(f"parsing transactions page snapshot from {path}")
+    with open(path, 'r', encoding='utf-8') as file:
+        return html_rows(file.read())
+
+
+def html_rows(source: str) -> list[tuple]:
+    """
+    Parses every row of the transactions table out of an html snapshot,
+    row by row within every container of rows
+    :param source: the page html, as given by driver.page_source
+    :return: list of (date, place, card, amount) rows
+    """
+    cells: list = []
+    for table in _tables(lxml_html.document_fromstring(source)):
+        for row in _row(table):
+            try:
+                cells.append([next((cell.text_content().strip() for cell in xpath(row)), None)
+                              for xpath in _cells])
+            except (ValueError, etree.XPathError):
+                cells.append(None)
+
+    return cells_to_rows(cells)
@@ -4,49 +4,111 @@ It is a small project with one specific task.
 """
 # pylint: disable=line-too-long
 # pylint: disable=redefined-outer-name
+# pylint: disable=import-outside-toplevel
 
 import datetime
+from collections import deque
 from os import getcwd
+import sys
 import time
 
 from decimal import Decimal
+from typing import TYPE_CHECKING
+from dateutil.relativedelta import relativedelta
 from loguru import logger
 
-import utils as u
+# selenium, lxml, cryptography, requests and webdriver_manager are imported by the functions driving the browser,
+# so importing this module, as the library and the daemon do, stays cheap
 import locators as loc
-from argum import args
+import store
+import cache
+import export
+import lean
+import normalize
+import pipeline
+import spans
+from transactions import TransactionBatch
+
+if TYPE_CHECKING:
+    from selenium import webdriver
 
 
 # DRIVER
-def driver_init() -> u.webdriver.Chrome:
-    """Webdriver initiation - browser settings"""
+def driver_init(headless: bool = False, engine: str = 'script', lean_mode: bool = True) -> 'webdriver.Chrome':
+    """
+    Webdriver initiation - browser settings
+    :param headless: run the browser without a window
+    :param engine: the extraction engine, the capture engine needs the performance log
+    :param lean_mode: block images, fonts and trackers, hand pages over once parsed and skip the homepage
+    :return:
+    """
+    import capture
+    import driver_resolver
+    import utils as u
     chrome_options = u.webdriver.ChromeOptions()
 
-    if args.nohead:
+    if headless:
         chrome_options.add_argument("--headless=new")
 
     chrome_options.add_argument("--disable-extensions")
-    driver = u.webdriver.Chrome(options=chrome_options, service=u.ChromeService(u.ChromeDriverManager().install()))
-
-    driver.maximize_window()
-    driver.get("https://www.max.co.il/")
+    if engine == 'capture':
+        capture.enable(chrome_options)
+    if lean_mode:
+        lean.configure(chrome_options, headless)
+
+    service = u.ChromeService(driver_resolver.resolve())
+    with spans.span('driver start'):
+        start: float = time.perf_counter()
+        driver = spans.instrument(u.webdriver.Chrome(options=chrome_options, service=service))
+        logger.info(f"browser started in {time.perf_counter() - start:.2f}s")
+
+    with spans.span('navigate start page'):
+        if lean_mode:
+            lean.block(driver)
+            if not headless:
+                driver.maximize_window()
+            driver.get(lean.START_URL)
+
+        else:
+            driver.maximize_window()
+            driver.get(lean.HOME_URL)
 
     return driver
 
 
-def driver() -> u.webdriver.Chrome:
+def driver(headless: bool = False, engine: str = 'script', lean_mode: bool = True) -> 'webdriver.Chrome':
     """Calling webdriver"""
-    u.logger.info("initiating bot....")
-    get_driver = driver_init()
+    logger.info("initiating bot....")
+    get_driver = driver_init(headless, engine, lean_mode)
     return get_driver
 
 
 def close_driver(driver) -> None:
     """Closing webdriver"""
-    driver.close()
+    with spans.span('close driver'):
+        driver.close()
 
 
 # LOGIN
+def login(driver, email: str, password: str, use_session: bool = True) -> None:
+    """
+    Logs the driver in, restoring the saved session when it is still alive
+    :param driver: a driver on a max.co.il page
+    :param email:
+    :param password:
+    :param use_session: restore and save the encrypted login session
+    :return:
+    """
+    import session
+    with spans.span('login'):
+        if use_session and session.restore_session(driver, email, password):
+            return
+
+        max_login(driver, email, password)
+        if use_session:
+            session.save_session(driver, email, password)
+
+
 def max_login(driver, email: str, password: str) -> None:
     """
     Login to your MAX account.
@@ -55,61 +117,443 @@ def max_login(driver, email: str, password: str) -> None:
     :param password:
     :return:
     """
+    import utils as u
+    import waits
+
+    # the cheapest way in: an expired session may have left the login form showing,
+    # otherwise the form opens from the homepage, which a lean run did not load
+    login_form = waits.login_form()
+    personal_zone = u.EC.visibility_of_element_located(loc.max_loc['personal_zone'])
+    if not waits.check(driver, login_form=login_form, personal_zone=personal_zone):
+        driver.get(lean.HOME_URL)
 
     # login
     tries: int = 0
     while tries < 2:
         try:
-            u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['personal_zone'])).click()
-            u.logger.info('clicked on personal zone')
+            if not waits.check(driver, login_form=login_form):
+                u.WDW(driver, 5).until(personal_zone).click()
+                logger.info('clicked on personal zone')
 
-            u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['login_with_password'])).click()
+                u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['login_with_password'])).click()
 
-            u.logger.info("entering your email")
+            logger.info("entering your email")
             email_input = u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['input_username']))
+            email_input.clear()
             email_input.send_keys(email)
 
-            u.logger.info("entering your password")
+            logger.info("entering your password")
             pass_input = u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['input_password']))
+            pass_input.clear()
             pass_input.send_keys(password)
 
-            u.logger.info("clicking on login to the site")
+            logger.info("clicking on login to the site")
             u.WDW(driver, 5).until(u.EC.visibility_of_element_located(loc.max_loc['login_button_login'])).click()
 
-            time.sleep(3)
             validate_max_login(driver)
             break
 
         except u.TimeoutException:
-            u.logger.error("An error related to the website page has occurred, trying one more time...")
+            logger.error("An error related to the website page has occurred, trying one more time...")
             tries += 1
 
+    if tries == 2:
+        raise SystemExit("Could not log in to Max, the login form was still showing. Please try again later")
+
+
+def session_alive(driver) -> bool:
+    """
+    Checks on the transactions page whether the site still knows the session of the driver
+    :param driver: a driver that logged in before
+    :return: False when the session expired and a login is needed
+    """
+    import waits
+    driver.get(loc.TRANSACTIONS_URL)
+    return waits.session_state(driver) in ('alive', 'rows')
+
+
+def ensure_logged_in(driver, email: str, password: str) -> None:
+    """
+    Logs the driver in again when the site expired its session, worth calling before a fetch
+    on a driver that sat idle for a while
+    :param driver: a driver that logged in before
+    :param email:
+    :param password:
+    :return:
+    """
+    if session_alive(driver):
+        return
+
+    logger.info("the session expired, logging in again")
+    max_login(driver, email, password)
+
 
 def validate_max_login(driver) -> None:
-    """Validates login to max"""
+    """
+    Validates login to max, returns as soon as the site answered the login form
+    :raises TimeoutException: when the login form is still showing, the login did not go through
+    """
+    import utils as u
+    import waits
+    outcome: str | None = waits.login_outcome(driver)
 
     # case where login failed
-    try:
-        if u.WDW(driver, 3).until(u.EC.visibility_of_element_located((loc.max_loc['login_error_msg']))):
-            logger.error("Login failed due wrong credentials")
-            raise SystemExit("Error with credentials at Max. Please check your email or password and try again")
+    if outcome == 'login_error':
+        logger.error("Login failed due wrong credentials")
+        raise SystemExit("Error with credentials at Max. Please check your email or password and try again")
 
-    except u.TimeoutException:
-        logger.success("Logged in successfully")            # element of login box not found
+    if outcome == 'logged_in':
+        logger.success("Logged in successfully")
+
+    elif waits.check(driver, login_form=waits.login_form()):
+        raise u.TimeoutException("the login form is still showing, the login did not go through")
+
+    else:
+        logger.warning("Could not confirm the login, no error box was shown so carrying on")
 
 
 # INSIDE
 def get_transactions(driver, max_request: str, credx: dict) -> str:
     """
-    driver process the request and outputs a csv file with the transactions.
+    driver process the request and streams the transactions into a file, printing them on the way.
     :param driver: the driver, who is not drunk I hope
     :param max_request: the request from the arguments
     :param credx: contains the information from the arguments parameters
     :return:
     """
     # redirection to the transactions page
-    driver.get("https://www.max.co.il/transaction-details/personal")
+    with spans.span('navigate transactions'):
+        driver.get(loc.TRANSACTIONS_URL)
+
+    if max_request == 'sync':
+        return sync_transactions(driver, credx)
+
+    if not known_request(max_request):
+        return "didn't get your request hon"
+
+    file_format: str = credx.get('format', 'csv')
+    file_name, sink = file_sink(max_request, file_format)
+
+    print("these are your requested transactions")
+    pipeline.run(fetch_pages(driver, max_request, credx), format_row, sink, stream=sys.stdout)
+    logger.success(f'data converted to {file_format} successfully')
+    logger.info(f'the last transactions page transferred {lean.page_bytes(driver) / 1024:.0f} KB')
+
+    return f"your transactions can be found right here: {getcwd() + '/' + file_name}"
+
+
+def sync_transactions(driver, credx: dict) -> str:
+    """
+    Fetches only the window since the last sync and stores it in the local SQLite store
+    :param driver: a logged in driver
+    :param credx: contains the information from the arguments parameters
+    :return: a summary of the sync
+    """
+    today_date: datetime.date = datetime.date.today()
+    first_sync_start: datetime.date = (datetime.date.fromisoformat(credx['start_date']) if credx.get('start_date')
+                                       else datetime.date(today_date.year, 1, 1))
+
+    conn = store.connect(credx.get('database') or store.DB_PATH)
+    try:
+        start_date, end_date = store.sync_window(conn, credx['email'], first_sync_start, today_date)
+        logger.info(f"syncing transactions from {start_date} until {end_date}")
+
+        pages = fetch_pages(driver, 'range', {**credx, 'start_date': str(start_date), 'end_date': str(end_date)})
+        inserted: int = pipeline.run(pages, format_row, pipeline.sqlite_sink(conn, credx['email'], end_date))
+
+    finally:
+        conn.close()
+
+    return f"synced transactions from {start_date} until {end_date}, {inserted} new transactions stored"
+
+
+def fetch_data(driver, max_request: str, credx: dict) -> dict | None:
+    """
+    Opens the transactions page of the request and scrapes it
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: the data dictionary, None when the request is unknown
+    """
+    rows: list | None = fetch_rows(driver, max_request, credx)
+    return None if rows is None else rows_to_data(rows)
+
+
+def fetch_batch(driver, max_request: str, credx: dict) -> TransactionBatch | None:
+    """
+    Fetches the request into a compact transaction batch, page by page
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: the batch, None when the request is unknown
+    """
+    if not known_request(max_request):
+        return None
+
+    batch = TransactionBatch()
+    for page in fetch_pages(driver, max_request, credx):
+        batch.extend_rows(page)
+    return batch
+
+
+def fetch_rows(driver, max_request: str, credx: dict) -> list | None:
+    """
+    Gets the rows of the request, months found in the month cache are not fetched again
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: list of (date, place, card, amount) rows, None when the request is unknown
+    """
+    if not known_request(max_request):
+        return None
+
+    return [row for page in fetch_pages(driver, max_request, credx) for row in page]
+
+
+def known_request(max_request: str) -> bool:
+    """Whether the request names transactions the site can be asked for"""
+    return max_request in ('ytd', 'this_month', 'range', 'month')
+
+
+def fetch_pages(driver, max_request: str, credx: dict):
+    """
+    Gets the rows of the request page by page, months found in the month cache are not fetched again
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: generator of pages, each a list of (date, place, card, amount) rows
+    """
+    import extract
+    if not credx.get('cache'):
+        yield from fetch_live_pages(driver, max_request, credx)
+        return
+
+    if max_request == 'month':
+        billing_month: datetime.date = datetime.date(int(credx['year']), billing_month_number(credx['month']), 1)
+        rows: list | None = cache.get(credx['email'], 'billing', billing_month)
+        if rows is None:
+            incomplete: int = extract.incomplete_reads()
+            rows = [row for page in fetch_live_pages(driver, max_request, credx) for row in page]
+            cache_complete(credx['email'], 'billing', billing_month, rows, incomplete)
+        yield rows
+        return
+
+    window: tuple | None = request_window(max_request, credx)
+    if window is None:
+        yield from fetch_live_pages(driver, max_request, credx)
+        return
+
+    yield from cached_window_pages(driver, window, credx)
+
+
+def cached_window_pages(driver, window: tuple, credx: dict):
+    """
+    Gets the rows of a purchase window month by month from the cache,
+    the missing months are fetched in runs of consecutive months, every month cached and handed on once complete
+    :param driver: a logged in driver
+    :param window: the (start, end) purchase dates
+    :param credx: contains the information from the arguments parameters
+    :return: generator of the rows of every month within the window, in order
+    """
+    import planner
+    start_date, end_date = window
+    months: deque = deque(chunk_start.replace(day=1) for chunk_start, _ in planner.month_chunks(start_date, end_date))
+
+    while months:
+        month: datetime.date = months.popleft()
+        rows: list | None = cache.get(credx['email'], 'purchase', month)
+        if rows is not None:
+            yield [row for row in rows if start_date <= row_date(row) <= end_date]
+            continue
+
+        run: list = [month]
+        while months and cache.get(credx['email'], 'purchase', months[0]) is None:
+            run.append(months.popleft())
+        logger.info(f"{len(run)} months from {run[0]:%Y-%m} missing from the month cache")
 
+        for rows in fetch_run(driver, run, credx):
+            yield [row for row in rows if start_date <= row_date(row) <= end_date]
+
+
+def fetch_run(driver, run: list, credx: dict):
+    """
+    Fetches a run of consecutive months, every month is cached and handed on as soon as no later page can add to it:
+    month chunks hold their month only, a purchase shows up in the billing month after it at the latest
+    :param driver: a logged in driver
+    :param run: the first days of the consecutive months
+    :param credx: contains the information from the arguments parameters
+    :return: generator of the rows of every month of the run, in order
+    """
+    import extract
+    engine: str = credx.get('engine', 'script')
+    concurrency: int = int(credx.get('concurrency') or 1)
+    run_window: tuple = (run[0], min(run[-1] + relativedelta(months=1, days=-1), datetime.date.today()))
+    run_credx: dict = {**credx, 'start_date': str(run_window[0]), 'end_date': str(run_window[1])}
+    incomplete: int = extract.incomplete_reads()
+
+    # pages read before a month is complete, captured responses come in one piece
+    if engine == 'http':
+        pages, lag = http_pages(driver, 'range', run_credx, run_window, concurrency), 1
+    elif engine == 'capture':
+        pages, lag = fetch_live_pages(driver, 'range', run_credx), len(run)
+    else:
+        pages, lag = chunk_pages(driver, run_window, engine, concurrency), 0
+
+    month_rows: dict = {month: [] for month in run}
+    done: int = 0
+    for index, page in enumerate(pages):
+        for row in page:
+            row_month: datetime.date = row_date(row).replace(day=1)
+            if row_month in month_rows:
+                month_rows[row_month].append(row)
+
+        while done < len(run) and done <= index - lag:
+            cache_complete(credx['email'], 'purchase', run[done], month_rows[run[done]], incomplete)
+            yield month_rows.pop(run[done])
+            done += 1
+
+    for month in run[done:]:
+        cache_complete(credx['email'], 'purchase', month, month_rows[month], incomplete)
+        yield month_rows.pop(month)
+
+
+def cache_complete(email: str, kind: str, month: datetime.date, rows: list, incomplete: int) -> None:
+    """
+    Caches the rows of a month only when the fetch read every row of the table, a failed wait raises before
+    getting here, a skipped row or a table read short would otherwise be served from the cache for good
+    :param incomplete: extract.incomplete_reads() before the fetch started
+    """
+    import extract
+    if extract.incomplete_reads() != incomplete:
+        logger.warning(f"not caching {month:%Y-%m}, the transactions table was not read completely")
+        return
+
+    cache.put(email, kind, month, rows)
+
+
+def row_date(row: tuple) -> datetime.date:
+    """The purchase date of a scraped row"""
+    return datetime.datetime.strptime(row[0], '%d.%m.%y').date()
+
+
+def billing_month_number(month: str) -> int:
+    """The month number of the month argument, which may be 'this_month'"""
+    return datetime.date.today().month if month == 'this_month' else int(month)
+
+
+def fetch_live_pages(driver, max_request: str, credx: dict):
+    """
+    Fetches the rows of the request from the site, page by page
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: generator of pages, each a list of (date, place, card, amount) rows, nothing when the request is unknown
+    """
+    import capture
+    import extract
+    engine: str = credx.get('engine', 'script')
+    concurrency: int = int(credx.get('concurrency') or 1)
+
+    # long windows are fetched as month chunks in parallel tabs,
+    # captured responses come in one piece and the tabs would share one performance log
+    window: tuple | None = request_window(max_request, credx)
+    if engine == 'http' and (window is not None or max_request == 'month'):
+        yield from http_pages(driver, max_request, credx, window, concurrency)
+        return
+
+    if concurrency > 1 and max_request in ('ytd', 'range') and engine != 'capture':
+        yield from chunk_pages(driver, window, engine, concurrency)
+        return
+
+    url: str | None = transactions_url(max_request, credx)
+    if url is None:
+        return
+
+    if engine == 'capture':
+        capture.drain(driver)
+
+    with spans.span('navigate transactions'):
+        driver.get(url)
+    if engine == 'paged':
+        yield from extract.paged_batches(driver)
+    else:
+        yield scrape_rows(driver, engine)
+
+
+def chunk_pages(driver, window: tuple, engine: str, concurrency: int):
+    """
+    Fetches a purchase window as calendar month chunks in up to concurrency tabs
+    :param driver: a logged in driver
+    :param window: the (start, end) purchase dates
+    :param engine: the extraction engine, any but capture
+    :param concurrency: how many tabs load at the same time
+    :return: generator of pages, one per month chunk, in month order
+    """
+    import planner
+    chunks: list = planner.month_chunks(*window)
+    urls: list = [transactions_url('range', {'start_date': str(start), 'end_date': str(end)}) for start, end in chunks]
+    logger.info(f"fetching {len(chunks)} month chunks, {concurrency} at a time")
+
+    # chunks finish in any order, they are handed on in month order
+    ready: dict = {}
+    next_index: int = 0
+    for index, rows in planner.iter_tabs(driver, urls, lambda drv: scrape_rows(drv, engine), concurrency):
+        ready[index] = rows
+        while next_index in ready:
+            yield ready.pop(next_index)
+            next_index += 1
+
+
+def http_pages(driver, max_request: str, credx: dict, window: tuple | None, concurrency: int):
+    """
+    Fetches the rows of the request over http with the cookies of the logged in driver
+    :param driver: a logged in driver
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :param window: the purchase dates window of the request
+    :param concurrency: how many months are fetched at the same time
+    :return: generator of pages, one per billing month
+    """
+    import http_fetch
+    http = http_fetch.session_from_driver(driver, concurrency)
+
+    # month view lists the transactions charged in the billing month, not purchased in it
+    if max_request == 'month':
+        yield http_fetch.fetch_month(http, datetime.date(int(credx['year']), billing_month_number(credx['month']), 1))
+        return
+
+    yield from http_fetch.iter_window(http, *window, concurrency=concurrency)
+
+
+def request_window(max_request: str, credx: dict) -> tuple | None:
+    """
+    The (start, end) purchase dates of the request
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: the window, None for the month view request
+    """
+    today_date: datetime.date = datetime.date.today()
+
+    if max_request == 'ytd':
+        return datetime.date(today_date.year, 1, 1), today_date
+
+    if max_request == 'this_month':
+        return today_date.replace(day=1), today_date
+
+    if max_request == 'range':
+        return (datetime.date.fromisoformat(credx['start_date']),
+                datetime.date.fromisoformat(credx['end_date']))
+
+    return None
+
+
+def transactions_url(max_request: str, credx: dict) -> str | None:
+    """
+    Builds the filtered transactions page url of the request
+    :param max_request: the request from the arguments
+    :param credx: contains the information from the arguments parameters
+    :return: the url, None when the request is unknown
+    """
     today_date: datetime.date = datetime.date.today()
     this_year: int = today_date.year
     today: str = str(today_date)          # string year-month-day
@@ -117,106 +561,149 @@ def get_transactions(driver, max_request: str, credx: dict) -> str:
     if max_request == 'ytd':
         start_date = f'{this_year}-01-01'
         logger.info(f"getting transaction from start of this year to {today}")
-        driver.get(f"https://www.max.co.il/transaction-details/personal?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{start_date}_{today}_-1&sort=1a_1a_1a_1a_1a_1a")
+        return f"{loc.TRANSACTIONS_URL}?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{start_date}_{today}_-1&sort=1a_1a_1a_1a_1a_1a"
 
-    elif max_request == 'this_month':
+    if max_request == 'this_month':
         start_date = f'{this_year}-{today_date.month}-01'
         logger.info("getting transactions from this month")
-        driver.get(f"https://www.max.co.il/transaction-details/personal?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{start_date}_{today}_-1&sort=1a_1a_1a_1a_1a_1a")
+        return f"{loc.TRANSACTIONS_URL}?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{start_date}_{today}_-1&sort=1a_1a_1a_1a_1a_1a"
 
-    elif max_request == 'range':
+    if max_request == 'range':
         logger.info(f"getting transactions from {credx['start_date']} until {credx['end_date']}")
-        driver.get(f"https://www.max.co.il/transaction-details/personal?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{credx['start_date']}_{credx['end_date']}_-1&sort=1a_1a_1a_1a_1a_1a")
+        return f"{loc.TRANSACTIONS_URL}?sourceGA=CommonActions&filter=-1_-1_0_{this_year}-01-01_{credx['start_date']}_{credx['end_date']}_-1&sort=1a_1a_1a_1a_1a_1a"
 
-    elif max_request == 'month':
+    if max_request == 'month':
         year_month = credx['year'] + "-" + credx['month']
         logger.info(f"getting transactions from month {credx['month']} and year {credx['year']}")
-        driver.get(f"https://www.max.co.il/transaction-details/personal?sourceGA=CommonActions&filter=-1_-1_0_{year_month}-01_-1&sort=1a_1a_1a_1a_1a_1a")
+        return f"{loc.TRANSACTIONS_URL}?sourceGA=CommonActions&filter=-1_-1_0_{year_month}-01_-1&sort=1a_1a_1a_1a_1a_1a"
 
-    else:
-        return "didn't get your request hon"
+    return None
+
+
+def file_sink(max_request: str, file_format: str = 'csv', sort: bool = False) -> tuple:
+    """
+    The output file of the request and the pipeline sink writing it
+    :param max_request: the request itself
+    :param file_format: 'csv' file, or 'parquet' / 'jsonl' dataset directory partitioned by year-month
+    :param sort: sort csv rows newest first, which holds them all until the last one arrived.
+                 the pipeline already sorts every page, which is all a single page request needs
+    :return: (file name, sink)
+    """
+    logger.info(f'writing the transactions as {file_format}')
+    file_name = f'{max_request}_transactions_{round(time.time())}'
 
-    data: dict = data_scrape_from_table(driver)
-    convert_to_table(data, max_request)
+    if file_format == 'parquet':
+        return file_name, pipeline.parquet_sink(file_name)
 
-    message: str = "these are your requested transactions \n"
-    for i in range(len(data['amounts'])):
-        message += f"transaction {i}: {data['amounts'][i]} at {data['places'][i]} on {data['dates'][i]} with card {data['cards'][i]} \n"
+    if file_format == 'jsonl':
+        return file_name, pipeline.jsonl_sink(file_name)
 
-    return message
+    file_name += '.csv'
+    return file_name, pipeline.csv_sink(file_name, sort=sort)
 
 
-def convert_to_table(data: dict, max_request: str) -> None:
+def convert_to_table(data: dict, max_request: str, file_format: str = 'csv') -> None:
     """
-    converts the data dictionary into table
+    converts the data dictionary into a file
     :param data: the dictionary containing the transaction data
     :param max_request: the request itself
+    :param file_format: 'csv' file, or 'parquet' / 'jsonl' dataset directory partitioned by year-month
     :return:
     """
-    u.logger.info('converts data into dataframe table')
-    df = u.pd.DataFrame(data)
-    df.sort_values(by=['dates'])
-    df.loc['Total'] = df.sum(numeric_only=True)
+    file_name, sink = file_sink(max_request, file_format, sort=True)
+    with spans.span(f'write {file_format}') as span:
+        written = sink(span.count(export.data_rows(data)))
+    if file_format == 'csv':
+        logger.info(f'totals: {written}')
 
-    u.logger.info('converting dataframe into csv file')
-    file_name = f'{max_request}_transactions_{round(time.time())}.csv'
-    df.to_csv(file_name, encoding='utf-8-sig')
-    u.logger.success('data converted to CSV file successfully')
-    u.logger.success(f'file can be found right here: {getcwd() + "/" +file_name}')
+    logger.success(f'data converted to {file_format} successfully')
+    logger.success(f'file can be found right here: {getcwd() + "/" +file_name}')
 
 
-def data_scrape_from_table(driver) -> dict:
-    """Scraping data from transaction table in Max"""
-    logger.info("Starting scraping data from transactions table")
+def data_scrape_from_table(driver, engine: str = 'script') -> dict:
+    """
+    Scraping data from transaction table in Max
+    :param driver: the driver, already on the transactions page
+    :param engine: the extraction engine, see scrape_rows
+    :return:
+    """
+    return rows_to_data(scrape_rows(driver, engine))
+
+
+def scrape_rows(driver, engine: str = 'script') -> list:
+    """
+    Scraping the rows of the transaction table in Max
+    :param driver: the driver, already on the transactions page
+    :param engine: 'script' pulls the whole table with one in-browser call,
+                   'html' parses one page source snapshot outside the browser,
+                   'capture' decodes the transactions JSON the page fetched,
+                   'paged' scrolls a lazily loaded table until no new rows appear,
+                   'elements' reads every cell through WebDriver
+    :return: list of (date, place, card, amount) rows
+    """
+    import capture
+    import extract
+    logger.info(f"Starting scraping data from transactions table using the {engine} engine")
     # DATA SCRAPE
-    list_date = u.WDW(driver, 30).until(u.EC.visibility_of_all_elements_located(loc.max_loc['transactions_date']))
-    list_place = u.WDW(driver, 30).until(u.EC.visibility_of_all_elements_located(loc.max_loc['transactions_place']))
-    list_card = u.WDW(driver, 30).until(u.EC.visibility_of_all_elements_located(loc.max_loc['transactions_card']))
-    list_amount = u.WDW(driver, 30).until(u.EC.visibility_of_all_elements_located(loc.max_loc['transactions_amount']))
-
-    # filtering text from selenium elements
-    data = {"dates": [x.text.replace('.', '/') for x in list_date],
-            "places": [str(x.text) for x in list_place],
-            "cards_raw": [str(x.text) for x in list_card if x.text.isdigit()],
-            "amounts_raw": [x.text for x in list_amount]
-            }
+    with spans.span(f'scrape {engine}') as span:
+        if engine == 'script':
+            rows: list = extract.script_rows(driver)
+
+        elif engine == 'html':
+            rows = extract.page_source_rows(driver)
+
+        elif engine == 'capture':
+            rows = capture.capture_rows(driver)
+
+        elif engine == 'paged':
+            rows = extract.paged_rows(driver)
+
+        else:
+            rows = extract.element_rows(driver)
+        span.rows = len(rows)
+
+    logger.success("CONVERTED ALL")
 
-    u.logger.success("CONVERTED ALL")
+    return rows
 
-    # formatting the dictionaries:
-    # amounts:
-    u.logger.info("formatting amounts...")
-    data["amounts"] = list(map(format_amounts, data["amounts_raw"]))
 
-    # currency
-    u.logger.info("formatting currency...")
-    data["currency"] = list(map(format_currency, data["amounts_raw"]))
+def format_row(row: tuple) -> tuple:
+    """
+    Formats one scraped row, as rows_to_data formats whole columns
+    :param row: a (date, place, card, amount) row as returned from the extract module
+    :return: (date, place, card, raw amount, amount, currency) row
+    """
+    date, place, card, amount_raw = row
+    minor, currency = normalize.parse_amount(amount_raw)
+    return date.replace('.', '/'), place, card if card.isdigit() else '', amount_raw, normalize.to_decimal(minor), currency
+
+
+def rows_to_data(rows: list) -> dict:
+    """
+    Formats scraped (date, place, card, amount) rows into the data dictionary
+    :param rows: rows as returned from the extract module
+    :return:
+    """
+    data = {"dates": [row[0].replace('.', '/') for row in rows],
+            "places": [row[1] for row in rows],
+            "cards": [row[2] if row[2].isdigit() else '' for row in rows],
+            "amounts_raw": [row[3] for row in rows]
+            }
+
+    # formatting the amounts and currencies in one pass over the column
+    logger.info("formatting amounts and currency...")
+    with spans.span('format amounts', rows=len(rows)):
+        minor_units, data["currency"] = normalize.normalize_amounts(data["amounts_raw"])
+        data["amounts"] = list(map(normalize.to_decimal, minor_units))
 
     return data
 
 
 def format_amounts(data: str) -> Decimal:
-    """Cleaning the data from the shekel sign and then reformatting it to be a decimal"""
-    map_chars = str.maketrans({'₪': '', '$': '', '€': '', '£': '', ',': ''})
-    amount_stripped = data.translate(map_chars)
-    amount = Decimal(amount_stripped)
-    amount *= -1
-
-    return amount
+    """Parses a raw amount into a decimal, purchases negative and refunds positive"""
+    return normalize.to_decimal(normalize.parse_amount(data)[0])
 
 
 def format_currency(data: str) -> str:
-    """Takes common currency symbol and translate it to currency code"""
-    for rec in data:
-        if '₪' in rec:
-            return 'ILS'
-        if '$' in rec:
-            return 'USD'
-        if '€' in rec:
-            return 'EUR'
-        if '£' in rec:
-            return 'GBP'
-
-        return "-"
-
-    return "No Currency Specified"
+    """Translates the currency mark of a raw amount to its currency code"""
+    return normalize.currency_of(data)
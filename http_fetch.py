@@ -0,0 +1,102 @@
+"""
+Module responsible for fetching transactions without rendering pages.
+Once the browser logged in, its cookies are handed to a pooled keep-alive HTTP client
+that calls the same endpoint the transactions page uses, many months at a time.
+"""
+import datetime
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import requests
+from dateutil.relativedelta import relativedelta
+from loguru import logger
+
+import capture
+import locators as loc
+import planner
+import spans
+
+
+API_URL: str = os.environ.get('MAX_API_URL', 'https://onlinelcapi.max.co.il').rstrip('/')
+TIMEOUT: float = 30
+
+
+def session_from_driver(driver, pool_size: int = 4) -> requests.Session:
+    """
+    Builds a keep-alive HTTP session carrying the logged in cookies of the driver
+    :param driver: a logged in driver
+    :param pool_size: how many connections are kept open, match it to the fetch concurrency
+    :return:
+    """
+    http = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    http.mount('https://', adapter)
+    http.mount('http://', adapter)
+
+    for cookie in driver.get_cookies():
+        http.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+    http.headers.update({'User-Agent': driver.execute_script('return navigator.userAgent;'),
+                         'Referer': loc.SITE_URL + '/',
+                         'Accept': 'application/json'})
+    return http
+
+
+def month_params(billing_month: datetime.date) -> dict:
+    """The query of one billing month, as the transactions page sends it"""
+    filter_data: dict = {"userIndex": -1, "cardIndex": -1, "monthView": True,
+                         "date": billing_month.replace(day=1).isoformat(),
+                         "dates": {"startDate": "0", "endDate": "0"},
+                         "bankAccount": {"bankAccountIndex": -1, "cards": None}}
+    return {'filterData': json.dumps(filter_data, separators=(',', ':')), 'firstCallCardIndex': -1}
+
+
+def fetch_month(http: requests.Session, billing_month: datetime.date, base_url: str = API_URL) -> list[tuple]:
+    """
+    Fetches the transactions charged in one billing month
+    :return: list of (date, place, card, amount) rows
+    """
+    with spans.span('http month') as span:
+        response = http.get(base_url + capture.TRANSACTIONS_API, params=month_params(billing_month), timeout=TIMEOUT)
+        response.raise_for_status()
+
+        rows: list = capture.payload_rows(json.loads(response.text, parse_float=Decimal))
+        span.rows = len(rows)
+    return rows
+
+
+def fetch_window(http: requests.Session, start_date: datetime.date, end_date: datetime.date,
+                 concurrency: int = 4, base_url: str = API_URL) -> list[tuple]:
+    """
+    Fetches the transactions purchased within a window, all billing months at once.
+    :param http: session from session_from_driver
+    :param start_date: first purchase date of the window
+    :param end_date: last purchase date of the window
+    :param concurrency: how many months are fetched at the same time
+    :param base_url: the api host
+    :return: list of (date, place, card, amount) rows, in billing month order
+    """
+    return [row for rows in iter_window(http, start_date, end_date, concurrency, base_url) for row in rows]
+
+
+def iter_window(http: requests.Session, start_date: datetime.date, end_date: datetime.date,
+                concurrency: int = 4, base_url: str = API_URL):
+    """
+    Fetches the billing months of a window concurrently and yields every month, in order, as soon as it arrived.
+    A purchase is billed up to a month later, so the month after the window is fetched as well.
+    :param http: session from session_from_driver
+    :param start_date: first purchase date of the window
+    :param end_date: last purchase date of the window
+    :param concurrency: how many months are fetched at the same time
+    :param base_url: the api host
+    :return: generator of the (date, place, card, amount) rows of every billing month within the window
+    """
+    months: list = [start for start, _ in planner.month_chunks(start_date, end_date + relativedelta(months=1))]
+    logger.info(f"fetching {len(months)} billing months over http, {concurrency} at a time")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for rows in executor.map(lambda month: fetch_month(http, month, base_url), months):
+            yield [row for row in rows
+                   if start_date <= datetime.datetime.strptime(row[0], '%d.%m.%y').date() <= end_date]
@@ -0,0 +1,54 @@
+"""
+Module responsible for the lean browsing profile.
+Images, media, fonts and third party analytics and ads are never requested, pages are handed over
+as soon as their DOM is parsed, and a run starts on a tiny page of the site instead of the marketing homepage.
+"""
+from loguru import logger
+
+import locators as loc
+
+
+HOME_URL: str = loc.SITE_URL + '/'
+# same origin as the site so a saved session can be restored on it, a few hundred bytes instead of the homepage
+START_URL: str = loc.SITE_URL + '/robots.txt'
+WINDOW_SIZE: tuple = (1280, 900)        # wide enough for the desktop layout the locators target
+
+# Network.setBlockedURLs patterns, * matches any run of characters
+BLOCKED_URLS: tuple = (
+    # images and media
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.mp4', '*.webm', '*.mp3',
+    # fonts
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # analytics, tag managers and ads
+    '*googletagmanager.com*', '*google-analytics.com*', '*analytics.google.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*googleadservices.com*', '*facebook.net*', '*facebook.com/tr*',
+    '*hotjar.com*', '*clarity.ms*', '*taboola.com*', '*outbrain.com*', '*tiktok.com*', '*snap.licdn.com*',
+    '*bat.bing.com*', '*glassboxdigital.io*', '*adnxs.com*', '*criteo.com*',
+)
+
+
+def configure(chrome_options, headless: bool = False) -> None:
+    """
+    Sets up the lean profile on the options, before the browser starts
+    :param chrome_options: the options the browser is started with
+    :param headless: a headless browser gets a small fixed window instead of being maximized
+    :return:
+    """
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+    chrome_options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+
+    if headless:
+        chrome_options.add_argument(f'--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}')
+
+
+def block(driver) -> None:
+    """Blocks the heavy and third party requests for the whole browser session, once it started"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(BLOCKED_URLS)})
+    logger.info(f"lean browsing, blocking {len(BLOCKED_URLS)} url patterns")
+
+
+def page_bytes(driver) -> int:
+    """The bytes the current page transferred over the network, itself and all its resources"""
+    return int(driver.execute_script(loc.max_js['page_bytes']) or 0)
@@ -1,4 +1,10 @@
 """Module responsible for storing locators within Max.co.il"""
+import os
+
+
+# the site every url is built on, pointed elsewhere to run against a local stand-in of the site
+SITE_URL: str = os.environ.get('MAX_SITE_URL', 'https://www.max.co.il').rstrip('/')
+TRANSACTIONS_URL: str = f'{SITE_URL}/transaction-details/personal'
 
 max_loc: dict = {
     'personal_zone': ('xpath', '//*[contains(@class, "go-to-personal-area log-in-status")]'),
@@ -15,6 +21,18 @@ max_loc: dict = {
     'input_confirm_term': ('xpath', '//label[@for="confirmTerms"]'),
     'button_enter_personal_zone': ('xpath', '//button[@id="sen-me-code"]'),
     'transactions_list': ('xpath', '//*[@class="row body"]'),
+    # every element holding rows, found once, every row and cell is then read relative to it.
+    # no element around the rows has an id, or a class the site keeps, to anchor on, the
+    # "row body" class of the rows is the one stable hook, so the wrappers are found as the
+    # parents of the rows, one document scan per read rather than one per row and cell
+    'transactions_tables': ('xpath', '//div[@class="row body"]/..'),
+    'transactions_row': ('xpath', './*[@class="row body"]'),
+    'transactions_rows': ('xpath', '//div[@class="row body"]/../*[@class="row body"]'),
+    'row_date': ('xpath', './div[1]'),
+    'row_place': ('xpath', './div[2]/div'),
+    'row_card': ('xpath', './div[4]'),
+    'row_amount': ('xpath', './div[6]/span'),
+    'transactions_load_more': ('xpath', '//button[contains(text(), "הצג עוד") or contains(text(), "טען עוד")]'),
     'transactions_date': ('xpath', '//*[@class="row body"]/div[1]'),
     'transactions_place': ('xpath', '//*[@class="row body"]/div[2]/div'),
     'transactions_card': ('xpath', '//*[@class="row body"]/div[4]'),
@@ -23,3 +41,74 @@ max_loc: dict = {
     'combo_dates_start': ('xpath', '//span[@class="date-title" and text()="תאריך התחלה"]'),
     'combo_dates_end': ('xpath', '//span[@class="date-title" and text()="תאריך סיום"]')
 }
+
+# in-browser scripts, every one of them answers in a single WebDriver round trip
+max_js: dict = {
+    # arguments are the first row to return, the containers, row and cell xpath expressions, the rows relative to
+    # their container and the cells relative to their row. returns the cell texts of every row from there on,
+    # the rows of every container in document order, null for a cell the row does not have
+    # and null for a row that could not be read
+    'scrape_rows': """
+        const [offset, tablesXPath, rowXPath, ...cellXPaths] = arguments;
+        const first = (xpath, context) => document.evaluate(xpath, context, null,
+                                                            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const all = (xpath, context) => document.evaluate(xpath, context, null,
+                                                          XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const tables = all(tablesXPath, document);
+        const rows = [];
+        for (let t = 0; t < tables.snapshotLength; t++) {
+            const tableRows = all(rowXPath, tables.snapshotItem(t));
+            for (let i = 0; i < tableRows.snapshotLength; i++) { rows.push(tableRows.snapshotItem(i)); }
+        }
+
+        const cells = [];
+        for (let i = offset; i < rows.length; i++) {
+            try {
+                cells.push(cellXPaths.map((xpath) => {
+                    const cell = first(xpath, rows[i]);
+                    return cell ? (cell.innerText || '').trim() : null;
+                }));
+            } catch (e) {
+                cells.push(null);
+            }
+        }
+        return cells;
+    """,
+    # argument is an xpath expression, returns how many nodes match it
+    'count_nodes': 'return document.evaluate(`count(${arguments[0]})`, document, null, XPathResult.NUMBER_TYPE, null).numberValue;',
+    # arguments are the rows and the load more button xpath expressions,
+    # brings the last row into view and clicks load more when it is there, so the next batch starts loading
+    'load_more': """
+        const first = (xpath) => document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        const rows = document.evaluate(arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        if (rows.snapshotLength) { rows.snapshotItem(rows.snapshotLength - 1).scrollIntoView({block: 'end'}); }
+        window.scrollTo(0, document.body.scrollHeight);
+        const button = first(arguments[1]);
+        if (button) { button.click(); }
+        window.__maxLoadMoreAt = performance.now();
+    """,
+    # milliseconds since the later of the last load more and the last network resource of the page
+    'paging_quiet_ms': """
+        const entries = performance.getEntriesByType('resource');
+        const last = entries.reduce((latest, entry) => Math.max(latest, entry.responseEnd), 0);
+        return performance.now() - Math.max(last, window.__maxLoadMoreAt || 0);
+    """,
+    'ready_state': 'return document.readyState;',
+    # milliseconds since the last network resource of the page finished loading
+    'network_quiet_ms': """
+        const entries = performance.getEntriesByType('resource');
+        const last = entries.reduce((latest, entry) => Math.max(latest, entry.responseEnd), 0);
+        return performance.now() - last;
+    """,
+    'dump_local_storage': 'return Object.assign({}, window.localStorage);',
+    # marks the old document so the next one can be told apart, then navigates without blocking
+    'navigate_fresh': 'window.__maxStale = true; window.location.href = arguments[0];',
+    'is_fresh': 'return window.__maxStale === undefined;',
+    # bytes the current document and every resource it loaded transferred over the network
+    'page_bytes': """
+        const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+        return entries.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+    """,
+    'js_heap_mb': 'return performance.memory ? performance.memory.usedJSHeapSize / 1048576 : 0;',
+    'load_local_storage': 'Object.entries(arguments[0]).forEach(([key, value]) => window.localStorage.setItem(key, value));'
+}
@@ -1,19 +1,67 @@
 """Module responsible for running the program"""
-import time
-import func
+# pylint: disable=import-outside-toplevel
 import argum
 
 
 def main() -> None:
     """
-    The main function of the repository, showcase a high level view on the flow
+    The main function of the repository, runs the request and writes the timed phases when asked to.
+    Only the arguments module is loaded up front, so --help and invalid arguments
+    return before selenium, lxml and the rest are imported.
     :return:
     """
     creds: dict = argum.get_cli_arguments()
 
-    driver = func.driver()
-    time.sleep(2)
-    func.max_login(driver, creds['email'], creds['password'])
+    import spans
+    if creds['trace'] or creds['metrics']:
+        spans.enable()
+
+    try:
+        if creds['profile']:
+            import profiler
+            with profiler.profile(creds['profile']):
+                run(creds)
+        else:
+            run(creds)
+
+    finally:
+        if creds['trace']:
+            spans.write_trace(creds['trace'])
+        if creds['metrics']:
+            spans.write_prometheus(creds['metrics'])
+
+
+def run(creds: dict) -> None:
+    """
+    Runs the request of the arguments, showcase a high level view on the flow.
+    :param creds: the arguments as dictionary
+    :return:
+    """
+    import func
+
+    # archived snapshot, no browser and no login needed
+    if creds['html_file']:
+        import extract
+        import spans
+        with spans.span('parse html file') as span:
+            rows: list = extract.html_file_rows(creds['html_file'])
+            span.rows = len(rows)
+        data: dict = func.rows_to_data(rows)
+        func.convert_to_table(data, creds['request'], creds['format'])
+        return
+
+    # resident mode, browsers stay warm and logged in between requests
+    if creds['request'] == 'daemon':
+        import daemon
+        pool = daemon.BrowserPool(driver_factory=lambda: func.driver(creds['headless_mode'], creds['engine'], creds['lean']),
+                                  login=func.login, ensure_login=func.ensure_logged_in)
+        daemon.serve(pool, func.fetch_batch, creds['socket'] or daemon.SOCKET_PATH)
+        return
+
+    import waits
+    driver = func.driver(creds['headless_mode'], creds['engine'], creds['lean'])
+    waits.page_ready(driver)
+    func.login(driver, creds['email'], creds['password'], creds['session'])
 
     print(func.get_transactions(driver, creds['request'], creds))
 
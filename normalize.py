@@ -0,0 +1,119 @@
+"""
+Module responsible for normalizing the raw amounts of the transactions table.
+A raw amount is parsed once into integer minor units (agorot, cents) and an ISO currency code,
+a whole column is normalized in one pass and every distinct string is parsed only once.
+Purchases come out negative and refunds or credits positive, as the amounts have always been reported.
+"""
+import re
+from array import array
+from decimal import Decimal
+from functools import lru_cache
+from loguru import logger
+
+
+UNKNOWN_CURRENCY: str = '-'
+MINOR_DIGITS: int = 2           # every currency the site charges in has two decimal places
+
+CURRENCY_MARKS: dict = {'₪': 'ILS', 'ש"ח': 'ILS', 'ש״ח': 'ILS', 'ILS': 'ILS', 'NIS': 'ILS',
+                        '$': 'USD', 'USD': 'USD',
+                        '€': 'EUR', 'EUR': 'EUR',
+                        '£': 'GBP', 'GBP': 'GBP'}
+
+# words the site puts next to an amount that was paid back to the card
+CREDIT_MARKS: tuple = ('זיכוי', 'החזר')
+
+_currency = re.compile('|'.join(re.escape(mark) for mark in sorted(CURRENCY_MARKS, key=len, reverse=True)))
+
+# installment notations ("תשלום 3 מתוך 12") hold numbers as well, they are blanked out before the amount is looked for
+_installment = re.compile(r'\d+\s*מתוך\s*\d+')
+
+# a number with optional thousands separators, the sign may come before or after it and a currency mark in between.
+# "3/12" installments are not numbers here, and of the numbers left an amount after a currency mark wins,
+# then one before a mark
+_amount = re.compile(r'(?P<lead>[-−(])?\s*(?P<mark>' + _currency.pattern + r')?\s*(?P<sign>[-−])?\s*'
+                     r'(?<![/\d.,])(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+                     r'(?![/\d]|,\d)(?:\s*(?P<after>' + _currency.pattern + r')(?!\s*[-−]?\s*\d))?'
+                     r'(?P<trail>\s*-(?!\s*\d)|\))?')
+
+
+# the symbols nearly every row starts with, those rows skip the regular expressions
+_SYMBOLS: dict = {'₪': 'ILS', '$': 'USD', '€': 'EUR', '£': 'GBP'}
+
+
+@lru_cache(maxsize=4096)
+def parse_amount(raw: str) -> tuple:
+    """
+    Parses one raw amount
+    :param raw: the amount as shown on the site, e.g. '₪1,234.50', '-$12.00', '14.00- זיכוי', '₪300.00 תשלום 2 מתוך 6'
+    :return: (minor units, ISO currency code), purchases negative
+    :raises ValueError: when the raw amount holds no amount, a zero would distort the totals
+    """
+    return _parse(raw)
+
+
+def _parse(raw: str) -> tuple:
+    """parse_amount without the cache"""
+    # the shape nearly every row has: a leading symbol, digits with thousands separators and up to two decimals
+    currency: str | None = _SYMBOLS.get(raw[:1])
+    if currency:
+        whole, _, fraction = raw[1:].partition('.')
+        whole = _ungrouped(whole)
+        if whole.isdecimal() and len(fraction) <= MINOR_DIGITS and (not fraction or fraction.isdecimal()):
+            return -(int(whole) * 10 ** MINOR_DIGITS + int(fraction.ljust(MINOR_DIGITS, '0'))), currency
+
+    matches: list = list(_amount.finditer(_installment.sub(' ', raw)))
+    if not matches:
+        logger.error(f"no amount found in {raw!r}")
+        raise ValueError(f"no amount found in {raw!r}")
+
+    match = next((m for m in matches if m['mark']), None) or next((m for m in matches if m['after']), matches[0])
+    mark: str | None = match['mark'] or match['after']
+    whole, _, fraction = match['number'].replace(',', '').partition('.')
+
+    if len(fraction) > MINOR_DIGITS:
+        minor = int(Decimal(f'{whole}.{fraction}').scaleb(MINOR_DIGITS).to_integral_value())
+    else:
+        minor = int(whole) * 10 ** MINOR_DIGITS + int(fraction.ljust(MINOR_DIGITS, '0'))
+
+    credit: bool = (bool(match['lead'] or match['sign'] or match['trail'])
+                    or any(word in raw for word in CREDIT_MARKS))
+    return (minor if credit else -minor), (CURRENCY_MARKS[mark] if mark else currency_of(raw))
+
+
+def _ungrouped(whole: str) -> str:
+    """The whole part without its thousands separators, as is when they do not group it in threes"""
+    head, *groups = whole.split(',')
+    if groups and not (1 <= len(head) <= 3 and all(len(group) == 3 for group in groups)):
+        return whole
+    return ''.join((head, *groups))
+
+
+def currency_of(raw: str) -> str:
+    """The ISO code of the first currency mark anywhere in the raw amount"""
+    mark = _currency.search(raw)
+    return CURRENCY_MARKS[mark.group()] if mark else UNKNOWN_CURRENCY
+
+
+def normalize_amounts(column) -> tuple:
+    """
+    Normalizes a whole column of raw amounts in one pass
+    :param column: iterable of raw amount strings
+    :return: (array of minor units, list of ISO currency codes), in the order of the column
+    """
+    minor_units: array = array('q')
+    currencies: list = []
+    parsed: dict = {}
+
+    for raw in column:
+        result = parsed.get(raw)
+        if result is None:
+            result = parsed[raw] = _parse(raw)
+        minor_units.append(result[0])
+        currencies.append(result[1])
+
+    return minor_units, currencies
+
+
+def to_decimal(minor: int) -> Decimal:
+    """The amount of minor units, as a Decimal with two decimal places"""
+    return Decimal(minor).scaleb(-MINOR_DIGITS)
@@ -0,0 +1,258 @@
+"""
+Module responsible for fetching many accounts and windows concurrently from one asyncio event loop.
+Selenium blocks, so every login, fetch and export runs in a bounded thread pool
+and is awaited as a coroutine. Every account gets its own browser, the windows of one account
+take turns on it while other accounts run alongside. A fetch that is cancelled, or runs out
+of time, stops before its next page instead of running on in its thread.
+
+    async with orchestrator.Orchestrator(max_workers=8, engine='http') as orchestra:
+        async for result in orchestra.fetch_many(requests, timeout=300):
+            ...
+"""
+import asyncio
+import datetime
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from loguru import logger
+
+import api
+import pipeline
+from transactions import TransactionBatch
+
+
+# blocking calls running at the same time, every one of them drives a browser
+MAX_WORKERS: int = 4
+
+
+@dataclass(frozen=True)
+class FetchRequest:
+    """The transactions of one account purchased within one window"""
+    email: str
+    password: str
+    start: datetime.date
+    end: datetime.date
+
+
+@dataclass
+class Budget:
+    """Seconds of blocking work a request may still run, None for no limit"""
+    seconds: float | None = None
+
+
+@dataclass
+class FetchResult:
+    """
+    The outcome of a request, the transactions when it succeeded and the error otherwise
+    a wrong password, a timeout or any failure of one request never stops the others
+    """
+    request: FetchRequest
+    batch: TransactionBatch | None = None
+    error: BaseException | None = None
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """whether the transactions were fetched"""
+        return self.error is None
+
+
+def unless_cancelled(rows, cancelled: threading.Event):
+    """
+    Passes the rows on until the event is set, the fetch stops right there
+    and is closed on the spot, its tabs are not left to be closed whenever it is collected
+    """
+    rows = iter(rows)
+    try:
+        for row in rows:
+            if cancelled.is_set():
+                raise CancelledError()
+            yield row
+
+    finally:
+        if hasattr(rows, 'close'):
+            rows.close()
+
+
+class Orchestrator:
+    """Logs in, fetches and exports as coroutines, the blocking work runs in a thread pool"""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, **session_options):
+        """
+        :param max_workers: blocking calls running at the same time
+        :param session_options: how the browsers are started and fetch, see api.MaxSession.login
+        """
+        self.session_options: dict = session_options
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='max-worker')
+        self._sessions: dict = {}       # (email, credentials key) -> logged in api.MaxSession
+        self._accounts: dict = {}       # email -> asyncio.Lock, a browser does one thing at a time
+
+    async def _run(self, blocking, *args, budget: Budget | None = None, abandoned=None):
+        """
+        Runs a blocking call in the pool, the call gets a threading.Event as its last argument
+        which is set once the awaiting coroutine is cancelled or ran out of its budget.
+        The call is waited for even then, so the browser it drives is free again
+        before its account lock is released.
+        :param budget: seconds the call may run, spent as it runs,
+                       waiting for a free thread is not counted
+        :param abandoned: called with what the call returned after the awaiting coroutine
+                          gave up on it
+        """
+        if budget is not None and budget.seconds is not None and budget.seconds <= 0:
+            raise asyncio.TimeoutError("the request spent its time budget")
+
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        started: asyncio.Future = loop.create_future()
+
+        def _started(*call_args):
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+            return blocking(*call_args)
+
+        future = self._executor.submit(_started, *args, cancelled)
+        work: asyncio.Future = asyncio.wrap_future(future)
+        try:
+            await started
+            began: float = loop.time()
+            try:
+                return await asyncio.wait_for(asyncio.shield(work), budget and budget.seconds)
+            finally:
+                if budget is not None and budget.seconds is not None:
+                    budget.seconds -= loop.time() - began
+
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            cancelled.set()
+            future.cancel()         # still queued, it never starts
+            await asyncio.wait([work])
+            if not work.cancelled() and work.exception() is None and abandoned is not None:
+                self._executor.submit(abandoned, work.result())
+            raise
+
+    def _account(self, email: str) -> asyncio.Lock:
+        """the lock of the account's browser"""
+        return self._accounts.setdefault(email, asyncio.Lock())
+
+    async def login(self, email: str, password: str,
+                    budget: Budget | None = None) -> api.MaxSession:
+        """
+        The logged in session of the account, a browser is started and logged in the first time.
+        A session is only handed out for the password it logged in with,
+        another password logs in on its own
+        :param budget: seconds the login may run
+        :return:
+        """
+        import session          # pylint: disable=import-outside-toplevel
+        key: tuple = (email, session.credentials_key(email, password))
+        async with self._account(email):
+            if key not in self._sessions:
+                # a browser that logged in after nobody waited for it anymore is quit
+                self._sessions[key] = await self._run(self._login, email, password, budget=budget,
+                                                      abandoned=api.MaxSession.close)
+            return self._sessions[key]
+
+    def _login(self, email: str, password: str, _cancelled: threading.Event) -> api.MaxSession:
+        """logs a new browser in"""
+        return api.MaxSession.login(email, password, **self.session_options)
+
+    async def fetch(self, email: str, password: str, start: datetime.date, end: datetime.date,
+                    timeout: float | None = None) -> TransactionBatch:
+        """
+        Fetches the transactions of an account purchased within a window,
+        logging in first when needed
+        :param timeout: seconds the login and the fetch may run, waiting for the account's browser
+                        or a free thread is not counted
+        :return: the transactions
+        """
+        budget = Budget(timeout)
+        max_session: api.MaxSession = await self.login(email, password, budget)
+        async with self._account(email):
+            return await self._run(self._fetch, max_session, start, end, budget=budget)
+
+    @staticmethod
+    def _fetch(max_session: api.MaxSession, start: datetime.date, end: datetime.date,
+               cancelled: threading.Event) -> TransactionBatch:
+        """
+        fetches page by page, checking between rows whether the fetch is still awaited,
+        a session the site expired meanwhile logs in again first
+        """
+        max_session.ensure_logged_in()
+        rows = api.fetch_rows(max_session, start, end)
+        return TransactionBatch.from_rows(unless_cancelled(rows, cancelled))
+
+    async def export(self, batch: TransactionBatch, path: str, file_format: str = 'csv'):
+        """
+        Writes the transactions
+        :param batch: the transactions
+        :param path: the csv file, or the parquet / jsonl dataset directory
+        :param file_format: 'csv', 'parquet' or 'jsonl'
+        :return: what the sink returned, see the pipeline sinks
+        """
+        sinks: dict = {'csv': pipeline.csv_sink, 'parquet': pipeline.parquet_sink,
+                       'jsonl': pipeline.jsonl_sink}
+        if file_format not in sinks:
+            raise ValueError(f"unknown format {file_format!r}, expected one of {', '.join(sinks)}")
+
+        def _export(cancelled: threading.Event):
+            return sinks[file_format](path)(unless_cancelled(batch.rows(), cancelled))
+
+        return await self._run(_export)
+
+    async def fetch_result(self, request: FetchRequest,
+                           timeout: float | None = None) -> FetchResult:
+        """
+        Runs one request, its login included, within the timeout, see fetch
+        :return: the result, holding the error when it failed
+        """
+        start: float = asyncio.get_running_loop().time()
+        try:
+            batch: TransactionBatch = await self.fetch(request.email, request.password,
+                                                       request.start, request.end, timeout)
+            result = FetchResult(request, batch)
+
+        # a wrong password exits the login, here it only fails the request
+        except (Exception, SystemExit) as error:        # pylint: disable=broad-exception-caught
+            logger.warning(f"fetching {request.start} - {request.end} failed: {error!r}")
+            result = FetchResult(request, error=error)
+
+        result.seconds = asyncio.get_running_loop().time() - start
+        return result
+
+    async def fetch_many(self, requests, timeout: float | None = None):
+        """
+        Runs all the requests at once and hands every result over as soon as it completed
+        :param requests: iterable of FetchRequest
+        :param timeout: seconds every request may run, its login included,
+                        waiting for its turn is not counted
+        :return: async generator of FetchResult, in the order they completed
+        """
+        tasks: list = [asyncio.create_task(self.fetch_result(request, timeout))
+                       for request in requests]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+
+        finally:
+            # the consumer stopped early or was cancelled, the requests still running are cancelled
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self) -> None:
+        """quits every browser and the thread pool"""
+        sessions: list = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(self._run(self._close, max_session) for max_session in sessions),
+                             return_exceptions=True)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _close(max_session: api.MaxSession, _cancelled: threading.Event) -> None:
+        """quits one browser"""
+        max_session.close()
+
+    async def __aenter__(self) -> 'Orchestrator':
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
@@ -0,0 +1,116 @@
+"""
+Module responsible for streaming the transactions from the scrape to the output.
+The stages are generators chained extract -> normalize -> sink, rows flow through them one at a time,
+so memory stays flat however long the range is and the first rows are written while later pages still load.
+A page is the unit the site hands over, a month chunk, a billing month or a whole table.
+"""
+import sys
+import time
+from loguru import logger
+
+import export
+import spans
+import store
+
+
+# STAGES
+def normalize(pages, format_row):
+    """
+    Formats every scraped row, page by page, a page is formatted whole within its own span
+    so the formatting is timed and profiled apart from the scrape and the write around it.
+    Every page is sorted newest first, as a whole table is written, a page is one month at most
+    so only one page is held at a time.
+    :param pages: iterable of pages, each a list of (date, place, card, amount) rows
+    :param format_row: (scraped row) -> (date, place, card, raw amount, amount, currency) row
+    :return: generator of pages, each a list of formatted rows, newest first
+    """
+    for page in pages:
+        with spans.span('format page') as span:
+            formatted: list = [format_row(row) for row in page]
+            formatted.sort(key=export.row_sort_key, reverse=True)
+            span.rows = len(formatted)
+        yield formatted
+
+
+def flatten(pages):
+    """
+    Flattens the pages into rows. Every row is kept, the pages of one fetch never overlap,
+    so identical transactions on both sides of a page boundary are separate transactions.
+    :param pages: iterable of pages of rows
+    :return: generator of rows
+    """
+    for page in pages:
+        yield from page
+
+
+def echo(rows, stream=None):
+    """
+    Prints every row as it passes through, then hands it on to the sink
+    :param rows: iterable of formatted rows
+    :param stream: where to print, stdout by default
+    :return: generator of the same rows
+    """
+    stream = stream or sys.stdout
+    for index, row in enumerate(rows):
+        stream.write(f"transaction {index}: {row[4]} at {row[1]} on {row[0]} with card {row[2]} \n")
+        yield row
+
+
+def first_row_timer(rows):
+    """Logs how long the first row took to come through, from the moment the rows were first asked for"""
+    start: float = time.perf_counter()
+    for index, row in enumerate(rows):
+        if index == 0:
+            logger.info(f"first row came through after {time.perf_counter() - start:.2f}s")
+        yield row
+
+
+# SINKS
+# a sink is a callable consuming an iterable of formatted rows, it returns a summary of what it wrote
+def csv_sink(path: str, sort: bool = False):
+    """Streams the rows into a CSV file, the totals per currency are returned"""
+    return lambda rows: export.write_csv(path, rows, sort=sort)
+
+
+def jsonl_sink(directory: str):
+    """Streams the rows into JSON Lines files partitioned by year-month, the written files are returned"""
+    return lambda rows: export.write_jsonl(directory, rows)
+
+
+def parquet_sink(directory: str):
+    """Writes the rows as a Parquet dataset partitioned by year-month, the written files are returned"""
+    return lambda rows: export.write_parquet(directory, rows)
+
+
+def sqlite_sink(conn, account: str, synced_up_to):
+    """Streams the rows into the local store, how many rows were new is returned"""
+    return lambda rows: store.upsert_rows(conn, account, rows, synced_up_to)
+
+
+def stdout_sink(stream=None):
+    """Prints the rows, how many were printed is returned"""
+    def sink(rows) -> int:
+        count: int = 0
+        for _ in echo(rows, stream):
+            count += 1
+        return count
+
+    return sink
+
+
+def run(pages, format_row, sink, stream=None):
+    """
+    Runs the pages through the pipeline into the sink
+    :param pages: iterable of pages, each a list of (date, place, card, amount) rows
+    :param format_row: (scraped row) -> formatted row
+    :param sink: consumes the formatted rows
+    :param stream: also print every row here on its way to the sink
+    :return: what the sink returned
+    """
+    # the pages are fetched while the sink writes, so the span holds the scrape, normalize and write phases within it
+    with spans.span('pipeline') as span:
+        rows = span.count(first_row_timer(flatten(normalize(pages, format_row))))
+        if stream is not None:
+            rows = echo(rows, stream)
+
+        return sink(rows)
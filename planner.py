@@ -0,0 +1,100 @@
+"""
+Module responsible for planning long requests as calendar month chunks
+and fetching the chunks concurrently in browser tabs of one logged in session.
+"""
+import datetime
+import time
+from collections import deque
+
+from dateutil.relativedelta import relativedelta
+from loguru import logger
+
+import utils as u
+import locators as loc
+import waits
+
+
+def month_chunks(start_date: datetime.date, end_date: datetime.date) -> list[tuple]:
+    """
+    Splits a date window into calendar month chunks, the first and last may be partial
+    :param start_date: first day of the window
+    :param end_date: last day of the window
+    :return: list of (chunk start, chunk end) dates, in order
+    """
+    chunks: list = []
+    chunk_start: datetime.date = start_date
+
+    while chunk_start <= end_date:
+        month_end: datetime.date = chunk_start.replace(day=1) + relativedelta(months=1, days=-1)
+        chunks.append((chunk_start, min(month_end, end_date)))
+        chunk_start = month_end + datetime.timedelta(days=1)
+
+    return chunks
+
+
+def fetch_in_tabs(driver, urls: list, scrape, concurrency: int = 3, timeout: float = 60) -> list:
+    """
+    Loads the pages in up to concurrency tabs at once and scrapes every page once it is ready.
+    :param driver: a logged in driver
+    :param urls: the pages to fetch
+    :param scrape: (driver) -> rows, scrapes the current tab
+    :param concurrency: how many tabs load at the same time
+    :param timeout: seconds a single page may take to get ready
+    :return: the scraped rows of every url, in the order of urls
+    """
+    results: list = [None] * len(urls)
+    for index, rows in iter_tabs(driver, urls, scrape, concurrency, timeout):
+        results[index] = rows
+
+    return results
+
+
+def iter_tabs(driver, urls: list, scrape, concurrency: int = 3, timeout: float = 60):
+    """
+    Loads the pages in up to concurrency tabs at once and yields every page as soon as it is scraped.
+    WebDriver drives one tab at a time, but the browser renders all the loading tabs in parallel.
+    The extra tabs are closed when the generator is exhausted or closed.
+    :param driver: a logged in driver
+    :param urls: the pages to fetch
+    :param scrape: (driver) -> rows, scrapes the current tab
+    :param concurrency: how many tabs load at the same time
+    :param timeout: seconds a single page may take to get ready
+    :return: generator of (url index, scraped rows), in the order the pages got ready
+    """
+    queue: deque = deque(enumerate(urls))
+    origin: str = driver.current_window_handle
+
+    tabs: list = [origin]
+    for _ in range(min(concurrency, len(urls)) - 1):
+        driver.switch_to.new_window('tab')
+        tabs.append(driver.current_window_handle)
+
+    loading: dict = {}      # tab handle -> (url index, deadline)
+    try:
+        while queue or loading:
+            for tab in tabs:
+                if tab not in loading and queue:
+                    index, url = queue.popleft()
+                    driver.switch_to.window(tab)
+                    driver.execute_script(loc.max_js['navigate_fresh'], url)
+                    loading[tab] = (index, time.monotonic() + timeout)
+
+            for tab, (index, deadline) in list(loading.items()):
+                driver.switch_to.window(tab)
+                if waits.tab_state(driver):
+                    rows: list = scrape(driver)
+                    del loading[tab]
+                    logger.info(f"chunk {index + 1} of {len(urls)} scraped, {len(rows)} rows")
+                    yield index, rows
+
+                elif time.monotonic() > deadline:
+                    raise u.TimeoutException(f"page did not get ready within {timeout} seconds: {urls[index]}")
+
+            if loading:
+                time.sleep(waits.POLL_FREQUENCY)
+
+    finally:
+        for tab in tabs[1:]:
+            driver.switch_to.window(tab)
+            driver.close()
+        driver.switch_to.window(origin)
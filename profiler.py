@@ -0,0 +1,227 @@
+"""
+Module responsible for profiling a run phase by phase.
+A background thread samples the stack of every thread at a fixed interval, the samples are
+written as collapsed stacks, rooted at the phase they were taken in, which flamegraph.pl and
+speedscope read.
+tracemalloc follows the allocations, every phase of the main thread gets the memory peak it reached
+while it was the innermost open phase and the source lines that grew the most up to that peak,
+so a spike freed before the phase ended is still attributed, and to the phase it happened in.
+The phases are the spans of the spans module, so recording spans is turned on along with the
+profiler.
+"""
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from loguru import logger
+
+import spans
+
+
+INTERVAL: float = 0.005         # seconds between samples
+TOP: int = 20                   # allocating lines listed per phase
+IDLE: str = 'no phase'          # the phase of samples taken outside of any span
+PEAK_GROWTH: float = 1.1        # growth past the last peak snapshot before another one is taken
+
+# the profiler's own allocations and the import machinery are left out of the allocation reports
+_IGNORED: tuple = (tracemalloc.__file__, __file__, '<frozen importlib')
+
+
+@dataclass
+class _Traced:
+    """The memory of an open phase of the main thread, measured while it is the innermost one"""
+    phase: str                          # the open phases, outermost first, joined by ';'
+    baseline: int                       # traced bytes when it opened
+    lines_before: Counter               # traced bytes per line when it opened
+    peak: int = 0                       # the most traced bytes while it was the innermost phase
+    taken: int = 0                      # bytes above the baseline at the last peak snapshot
+    at_peak: Counter | None = field(default=None)     # traced bytes per line at that snapshot
+
+
+class Profiler:     # pylint: disable=too-many-instance-attributes
+    """Samples the stacks and traces the allocations of a run, phase by phase"""
+
+    def __init__(self, interval: float = INTERVAL, top: int = TOP):
+        self.interval: float = interval
+        self.top: int = top
+        self.samples: Counter = Counter()       # collapsed stack -> samples
+        self.allocations: dict = {}             # phase -> {'peak', 'kept', 'lines': bytes per line}
+        self._phases: dict = {}                 # thread id -> its open span names, outermost first
+        self._main: int = threading.main_thread().ident
+        self._traced: list = []                 # _Traced of every phase open on the main thread
+        self._lock = threading.Lock()           # boundaries and peak snapshots never interleave
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._was_recording: bool = False
+
+    def start(self) -> 'Profiler':
+        """starts sampling and tracing, and recording the spans the phases come from"""
+        self._was_recording = spans.enabled()
+        if not self._was_recording:
+            spans.enable()
+        spans.listen(self._on_span)
+        tracemalloc.start()
+        self._thread = threading.Thread(target=self._sample, name='profiler', daemon=True)
+        self._thread.start()
+        logger.info(f"profiling, a sample every {self.interval * 1000:g}ms")
+        return self
+
+    def stop(self) -> None:
+        """stops sampling and tracing"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        spans.unlisten(self._on_span)
+        if not self._was_recording:
+            spans.disable()
+        tracemalloc.stop()
+
+    def _on_span(self, span, entering: bool) -> None:
+        """follows the open phases of every thread, the main thread's get their allocations"""
+        opened: list = self._phases.setdefault(span.thread, [])
+        if entering:
+            opened.append(span.name)
+        traced: bool = span.thread == self._main and (entering or bool(self._traced))
+
+        if traced:
+            with self._lock:
+                # the peak so far belongs to the phase that was innermost until now
+                self._fold_peak()
+                current: int = tracemalloc.get_traced_memory()[0]
+                if entering:
+                    phase: str = ';'.join(opened)
+                    self.allocations.setdefault(phase, {'peak': 0, 'kept': 0, 'lines': Counter()})
+                    self._traced.append(_Traced(phase, current, sizes_by_line(), peak=current))
+                else:
+                    self._allocated(self._traced.pop(), current)
+
+        if not entering and opened:
+            opened.pop()
+
+    def _fold_peak(self) -> None:
+        """adds the traced peak since the last fold to the innermost phase and starts a new one"""
+        if self._traced:
+            innermost: _Traced = self._traced[-1]
+            innermost.peak = max(innermost.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    def _allocated(self, traced: _Traced, current: int) -> None:
+        """adds a run of the phase to its report, with the lines of its highest peak run"""
+        report: dict = self.allocations[traced.phase]
+        peak: int = traced.peak - traced.baseline
+        report['kept'] += current - traced.baseline
+        if peak < report['peak'] and report['lines']:
+            return
+
+        # the peak is missed when memory peaked between two samples,
+        # what the phase kept is listed then
+        at_peak: Counter = traced.at_peak if traced.at_peak is not None else sizes_by_line()
+        report['peak'] = peak
+        grown: Counter = at_peak - traced.lines_before
+        report['lines'] = Counter({f'{filename}:{lineno}': size
+                                   for (filename, lineno), size in grown.items()
+                                   if not filename.startswith(_IGNORED)})
+
+    def _sample(self) -> None:
+        """takes a sample of every thread's stack until stopped"""
+        own: int = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names: dict = {thread.ident: thread.name for thread in threading.enumerate()}
+            phase: str = ';'.join(self._phases.get(self._main) or [IDLE])
+
+            for thread_id, frame in sys._current_frames().items():     # pylint: disable=protected-access
+                if thread_id == own:
+                    continue
+
+                stack: list = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+
+                thread: list = ([] if thread_id == self._main
+                                else [f'thread {names.get(thread_id, thread_id)}'])
+                self.samples[';'.join([phase, *thread, *reversed(stack)])] += 1
+
+            self._snapshot_peak()
+
+    def _snapshot_peak(self) -> None:
+        """takes a snapshot while the innermost phase holds more memory than ever within it"""
+        with self._lock:
+            if not self._traced:
+                return
+
+            innermost: _Traced = self._traced[-1]
+            grown: int = tracemalloc.get_traced_memory()[0] - innermost.baseline
+            if grown <= 0 or grown <= innermost.taken * PEAK_GROWTH:
+                return
+
+            innermost.taken = grown
+            innermost.at_peak = sizes_by_line()
+
+    def write(self, directory: str) -> list[str]:
+        """
+        Writes the profile of the run
+        :param directory: cpu.collapsed and allocations.txt are written here
+        :return: the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        collapsed: str = os.path.join(directory, 'cpu.collapsed')
+        report: str = os.path.join(directory, 'allocations.txt')
+
+        with open(collapsed, 'w', encoding='utf-8') as file:
+            file.writelines(f'{stack} {count}\n' for stack, count in self.samples.items())
+
+        with open(report, 'w', encoding='utf-8') as file:
+            file.write(self.allocation_report())
+
+        logger.info(f"wrote {sum(self.samples.values())} samples "
+                    f"and {len(self.allocations)} phases to {directory}")
+        return [collapsed, report]
+
+    def allocation_report(self) -> str:
+        """The memory peak of every phase and the lines that allocated the most within it"""
+        lines: list = []
+        for phase, report in self.allocations.items():
+            lines.append(f"{phase}: peak {_size(report['peak'])}, kept {_size(report['kept'])}")
+            lines += [f'    {_size(size):>10}  {where}'
+                      for where, size in report['lines'].most_common(self.top)]
+            lines.append('')
+        return '\n'.join(lines)
+
+
+def sizes_by_line() -> Counter:
+    """The traced memory every (file name, line number) holds right now"""
+    return Counter({(stat.traceback[0].filename, stat.traceback[0].lineno): stat.size
+                    for stat in tracemalloc.take_snapshot().statistics('lineno')})
+
+
+def _size(size: int) -> str:
+    """a byte count for people"""
+    for unit in ('B', 'KiB', 'MiB'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{size} B'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+
+@contextmanager
+def profile(directory: str, interval: float = INTERVAL, top: int = TOP):
+    """
+    Profiles the run within it, then writes the profile, also when the run failed
+    :param directory: where the profile is written, see Profiler.write
+    :param interval: seconds between stack samples
+    :param top: allocating lines listed per phase
+    :return: the running profiler
+    """
+    profiler = Profiler(interval, top).start()
+    try:
+        yield profiler
+
+    finally:
+        profiler.stop()
+        profiler.write(directory)
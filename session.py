@@ -0,0 +1,142 @@
+"""
+Module responsible for persisting the authenticated session between runs.
+Cookies and local storage are kept encrypted on disk with a key derived from the user password,
+so a repeat run can restore them instead of going through the whole login flow.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from loguru import logger
+
+import locators as loc
+import waits
+
+
+SESSION_DIR: str = os.environ.get('MAX_SESSION_DIR', os.path.join(os.path.expanduser('~'), '.max_sessions'))
+TRANSACTIONS_URL: str = loc.TRANSACTIONS_URL
+
+SALT_SIZE: int = 16
+KDF_ITERATIONS: int = 390_000
+MAX_AGE: int = 12 * 60 * 60         # seconds, older sessions are not even tried
+
+# keys the credentials hashes, they mean nothing outside this process
+_PROCESS_KEY: bytes = os.urandom(32)
+
+
+def session_path(email: str) -> str:
+    """The session file of an account, named by a hash so the email is not written to disk"""
+    return os.path.join(SESSION_DIR, hashlib.sha256(email.lower().encode()).hexdigest()[:32] + '.session')
+
+
+def credentials_key(email: str, password: str) -> str:
+    """
+    Tells the credentials a browser logged in with apart from other ones,
+    without keeping the password around
+    :return: a keyed hash of the email and the password, only comparable within this process
+    """
+    credentials: bytes = f'{email.lower()}\n{password}'.encode()
+    return hmac.new(_PROCESS_KEY, credentials, hashlib.sha256).hexdigest()
+
+
+def _fernet(password: str, salt: bytes) -> Fernet:
+    """Derives the session encryption key from the user password"""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(password.encode())))
+
+
+def save_session(driver, email: str, password: str) -> None:
+    """
+    Saves the logged in session of the driver encrypted on disk
+    :param driver: a logged in driver, on a max.co.il page
+    :param email: the account email, names the session file
+    :param password: the account password, derives the encryption key
+    :return:
+    """
+    payload: dict = {"saved_at": time.time(),
+                     "cookies": driver.get_cookies(),
+                     "local_storage": driver.execute_script(loc.max_js['dump_local_storage'])}
+
+    salt: bytes = os.urandom(SALT_SIZE)
+    token: bytes = _fernet(password, salt).encrypt(json.dumps(payload).encode())
+
+    os.makedirs(SESSION_DIR, mode=0o700, exist_ok=True)
+    path: str = session_path(email)
+    temp_path: str = path + '.tmp'
+    with open(os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as file:
+        file.write(salt + token)
+    os.replace(temp_path, path)
+
+    logger.info("login session saved for the next run")
+
+
+def load_session(email: str, password: str) -> dict | None:
+    """
+    Reads and decrypts the saved session of an account
+    :return: the session payload, None when there is no usable session
+    """
+    path: str = session_path(email)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as file:
+        blob: bytes = file.read()
+
+    try:
+        payload: dict = json.loads(_fernet(password, blob[:SALT_SIZE]).decrypt(blob[SALT_SIZE:]))
+
+    except (InvalidToken, ValueError):
+        logger.warning("saved session could not be decrypted, discarding it")
+        clear_session(email)
+        return None
+
+    if time.time() - payload['saved_at'] > MAX_AGE:
+        logger.info("saved session is too old, discarding it")
+        clear_session(email)
+        return None
+
+    return payload
+
+
+def clear_session(email: str) -> None:
+    """Removes the saved session of an account"""
+    path: str = session_path(email)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def restore_session(driver, email: str, password: str) -> bool:
+    """
+    Restores a saved session into the driver and checks it on the transactions page
+    :param driver: a driver on a max.co.il page, cookies can only be set for the current domain
+    :param email: the account email
+    :param password: the account password
+    :return: True when the driver is logged in, False when a full login is needed
+    """
+    payload: dict | None = load_session(email, password)
+    if payload is None:
+        return False
+
+    for cookie in payload['cookies']:
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:      # pylint: disable=broad-exception-caught
+            logger.debug(f"skipping cookie {cookie.get('name')}: {e}")
+
+    driver.execute_script(loc.max_js['load_local_storage'], payload['local_storage'])
+    driver.get(TRANSACTIONS_URL)
+
+    state: str | None = waits.session_state(driver)
+    if state in ('alive', 'rows'):
+        logger.success("Logged in with the saved session")
+        return True
+
+    logger.info("saved session has expired, logging in again")
+    clear_session(email)
+    return False
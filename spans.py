@@ -0,0 +1,227 @@
+"""
+Module responsible for timing the phases of a run.
+A span records how long a phase took, how many rows it handled and how many WebDriver commands
+were sent meanwhile. Nothing is recorded until enable is called, until then span hands back
+one shared span that does nothing.
+The recorded spans are written as a JSON trace, in the trace event format chrome://tracing
+and Perfetto open, and as a Prometheus text file for the node exporter textfile collector.
+"""
+import json
+import os
+import threading
+import time
+
+from loguru import logger
+
+
+METRIC_PREFIX: str = 'max_transactions'
+
+_recording = threading.Event()  # set while spans are recorded
+_spans: list = []
+_commands: list = [0]           # WebDriver commands sent by the instrumented drivers so far
+_listeners: list = []           # called with (span, entering) as every span starts and ends
+
+
+class Span:                     # pylint: disable=too-many-instance-attributes
+    """One timed phase, use it as a context manager"""
+    __slots__ = ('name', 'start', 'duration', 'rows', 'commands', 'thread',
+                 '_begin', '_commands_before')
+
+    def __init__(self, name: str, rows: int | None = None):
+        self.name: str = name
+        self.rows: int | None = rows
+        self.start: float = 0.0             # epoch seconds
+        self.duration: float = 0.0
+        self.commands: int = 0
+        self.thread: int = 0
+        self._begin: float = 0.0            # perf_counter seconds
+        self._commands_before: int = 0
+
+    def __enter__(self) -> 'Span':
+        self.start, self._begin = time.time(), time.perf_counter()
+        self._commands_before = _commands[0]
+        self.thread = threading.get_ident()
+        for listener in _listeners:
+            listener(self, True)
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.duration = time.perf_counter() - self._begin
+        # commands sent by other threads meanwhile count as well, tabs share the one driver anyway
+        self.commands = _commands[0] - self._commands_before
+        _spans.append(self)
+        for listener in _listeners:
+            listener(self, False)
+
+    def count(self, rows):
+        """Passes the rows on, counting them into the span"""
+        self.rows = self.rows or 0
+        for row in rows:
+            self.rows += 1
+            yield row
+
+
+class _NoSpan:
+    """The span handed out while nothing is recorded"""
+    __slots__ = ('rows',)
+
+    def __enter__(self) -> '_NoSpan':
+        return self
+
+    def __exit__(self, *_) -> None:
+        return None
+
+    @staticmethod
+    def count(rows):
+        """the rows themselves, untouched"""
+        return rows
+
+
+_NO_SPAN = _NoSpan()
+
+
+def enable() -> None:
+    """Starts recording spans, the ones recorded so far are dropped"""
+    _recording.set()
+    _spans.clear()
+    _commands[0] = 0
+
+
+def disable() -> None:
+    """Stops recording spans, the recorded ones are kept"""
+    _recording.clear()
+
+
+def enabled() -> bool:
+    """Whether spans are being recorded"""
+    return _recording.is_set()
+
+
+def span(name: str, rows: int | None = None):
+    """
+    A span timing the phase run within it
+    :param name: the phase
+    :param rows: the rows it handled, when known up front, set span.rows or use span.count otherwise
+    :return: the span to enter, a shared one doing nothing while not recording
+    """
+    return Span(name, rows) if _recording.is_set() else _NO_SPAN
+
+
+def listen(listener) -> None:
+    """
+    Calls the listener as every recorded span starts and ends,
+    the profiler follows the phases this way
+    :param listener: (span, entering) -> None, called on the thread running the span
+    :return:
+    """
+    _listeners.append(listener)
+
+
+def unlisten(listener) -> None:
+    """Stops calling the listener"""
+    _listeners.remove(listener)
+
+
+def recorded() -> list[Span]:
+    """The spans recorded so far, in the order they ended"""
+    return list(_spans)
+
+
+def instrument(driver):
+    """
+    Counts every WebDriver command the driver sends, while recording
+    :param driver: a webdriver, its execute is wrapped on the instance
+    :return: the driver
+    """
+    if not _recording.is_set():
+        return driver
+
+    execute = driver.execute
+
+    def counted_execute(*args, **kwargs):
+        _commands[0] += 1
+        return execute(*args, **kwargs)
+
+    driver.execute = counted_execute
+    return driver
+
+
+def phase_totals(spans: list) -> dict:
+    """
+    The spans summed up by phase
+    :return: {phase: {'seconds', 'rows', 'commands', 'calls'}} in the order the phases first ended
+    """
+    totals: dict = {}
+    for one in spans:
+        total: dict = totals.setdefault(one.name,
+                                        {'seconds': 0.0, 'rows': 0, 'commands': 0, 'calls': 0})
+        total['seconds'] += one.duration
+        total['rows'] += one.rows or 0
+        total['commands'] += one.commands
+        total['calls'] += 1
+    return totals
+
+
+def write_trace(path: str, spans: list | None = None) -> None:
+    """
+    Writes the spans as a JSON trace in the trace event format
+    :param path: the file to write
+    :param spans: the recorded spans by default
+    :return:
+    """
+    spans = recorded() if spans is None else spans
+    pid: int = os.getpid()
+    events: list = [{'name': one.name, 'cat': 'phase', 'ph': 'X', 'pid': pid, 'tid': one.thread,
+                     'ts': round(one.start * 1e6), 'dur': round(one.duration * 1e6),
+                     'args': {'rows': one.rows, 'webdriver_commands': one.commands}}
+                    for one in sorted(spans, key=lambda one: one.start)]
+
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False)
+    logger.info(f"wrote {len(events)} spans to {path}")
+
+
+def prometheus_text(spans: list, now: float | None = None) -> str:
+    """The spans summed up by phase, in the Prometheus text exposition format"""
+    totals: dict = phase_totals(spans)
+    metrics: tuple = (
+        ('phase_duration_seconds', 'seconds', 'Wall time spent in the phase during the last run'),
+        ('phase_rows', 'rows', 'Rows the phase handled during the last run'),
+        ('phase_webdriver_commands', 'commands',
+         'WebDriver commands sent during the phase in the last run'),
+        ('phase_calls', 'calls', 'Times the phase ran during the last run'))
+
+    lines: list = []
+    for metric, key, description in metrics:
+        lines += [f'# HELP {METRIC_PREFIX}_{metric} {description}',
+                  f'# TYPE {METRIC_PREFIX}_{metric} gauge']
+        lines += [f'{METRIC_PREFIX}_{metric}{{phase="{_label(phase)}"}} {total[key]:g}'
+                  for phase, total in totals.items()]
+
+    finished: float = time.time() if now is None else now
+    lines += [f'# HELP {METRIC_PREFIX}_last_run_timestamp_seconds When the last run finished',
+              f'# TYPE {METRIC_PREFIX}_last_run_timestamp_seconds gauge',
+              f'{METRIC_PREFIX}_last_run_timestamp_seconds {finished:.3f}']
+    return '\n'.join(lines) + '\n'
+
+
+def _label(value: str) -> str:
+    """escapes a label value"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_prometheus(path: str, spans: list | None = None) -> None:
+    """
+    Writes the spans summed up by phase as a Prometheus text file.
+    The file is written next to its place and renamed into it,
+    so the collector never reads half of it.
+    :param path: the .prom file, within the directory the textfile collector reads
+    :param spans: the recorded spans by default
+    :return:
+    """
+    spans = recorded() if spans is None else spans
+    partial: str = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'w', encoding='utf-8') as file:
+        file.write(prometheus_text(spans))
+    os.replace(partial, path)
+    logger.info(f"wrote the metrics of {len(phase_totals(spans))} phases to {path}")
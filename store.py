@@ -0,0 +1,149 @@
+"""
+Module responsible for the local SQLite transaction store.
+Transactions are keyed on a stable fingerprint, so syncing overlapping windows never duplicates rows,
+and every account keeps a watermark of the last day it was synced up to.
+"""
+import datetime
+import hashlib
+import sqlite3
+from collections import Counter
+from itertools import repeat
+
+from loguru import logger
+
+
+DB_PATH: str = 'transactions.db'
+OVERLAP_DAYS: int = 7           # late posted transactions show up a few days back
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS transactions (
+    account     TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    place       TEXT NOT NULL,
+    card        TEXT NOT NULL,
+    amount      TEXT NOT NULL,
+    currency    TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    synced_at   TEXT NOT NULL,
+    PRIMARY KEY (account, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (account, date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account     TEXT PRIMARY KEY,
+    watermark   TEXT NOT NULL,
+    synced_at   TEXT NOT NULL
+);
+"""
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """Opens the store, creating its tables on first use"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def watermark(conn: sqlite3.Connection, account: str) -> datetime.date | None:
+    """The last day the account was synced up to, None before the first sync"""
+    row = conn.execute('SELECT watermark FROM sync_state WHERE account = ?', (account,)).fetchone()
+    return datetime.date.fromisoformat(row[0]) if row else None
+
+
+def sync_window(conn: sqlite3.Connection, account: str, first_sync_start: datetime.date,
+                today: datetime.date | None = None) -> tuple:
+    """
+    The window the next sync has to fetch: from the watermark, minus a small overlap, until today
+    :param conn: the store
+    :param account: the account email
+    :param first_sync_start: where the first sync of an account starts
+    :param today: the end of the window, today by default
+    :return: (start date, end date)
+    """
+    today = today or datetime.date.today()
+    last: datetime.date | None = watermark(conn, account)
+    if last is None:
+        return first_sync_start, today
+
+    return max(first_sync_start, last - datetime.timedelta(days=OVERLAP_DAYS)), today
+
+
+def fingerprints(data: dict) -> list[tuple]:
+    """
+    Fingerprints every row of the data dictionary
+    :param data: the data dictionary of rows_to_data
+    :return: list of (fingerprint, iso date, place, card, amount, currency, seq) rows
+    """
+    return list(row_fingerprints(data_rows(data)))
+
+
+def data_rows(data: dict):
+    """The formatted rows of a data dictionary, the raw amounts are not stored so they may be missing"""
+    return zip(data['dates'], data['places'], data['cards'], repeat(None),
+               data['amounts'], data['currency'])
+
+
+def row_fingerprints(rows):
+    """
+    Fingerprints a stream of formatted rows.
+    Identical transactions on the same day are told apart by their sequence number,
+    which is stable as long as windows always cover whole days.
+    :param rows: iterable of (date, place, card, raw amount, amount, currency) rows
+    :return: generator of (fingerprint, iso date, place, card, amount, currency, seq) rows
+    """
+    seen: Counter = Counter()
+
+    for date, place, card, _, amount, currency in rows:
+        iso_date: str = datetime.datetime.strptime(date, '%d/%m/%y').date().isoformat()
+        key: tuple = (iso_date, place, card, str(amount))
+        seq: int = seen[key]
+        seen[key] += 1
+
+        fingerprint: str = hashlib.sha1('|'.join((*key, str(seq))).encode()).hexdigest()
+        yield fingerprint, iso_date, place, card, str(amount), currency, seq
+
+
+def upsert(conn: sqlite3.Connection, account: str, data: dict, synced_up_to: datetime.date) -> int:
+    """
+    Stores the fetched rows in one transaction and moves the account watermark
+    :param conn: the store
+    :param account: the account email
+    :param data: the data dictionary of rows_to_data
+    :param synced_up_to: the end of the fetched window, the new watermark
+    :return: how many rows were new
+    """
+    return upsert_rows(conn, account, data_rows(data), synced_up_to)
+
+
+def upsert_rows(conn: sqlite3.Connection, account: str, rows, synced_up_to: datetime.date) -> int:
+    """
+    Streams formatted rows into the store in one transaction and moves the account watermark
+    :param conn: the store
+    :param account: the account email
+    :param rows: iterable of (date, place, card, raw amount, amount, currency) rows
+    :param synced_up_to: the end of the fetched window, the new watermark
+    :return: how many rows were new
+    """
+    now: str = datetime.datetime.now().isoformat(timespec='seconds')
+    total: int = 0
+
+    def records():
+        nonlocal total
+        for row in row_fingerprints(rows):
+            total += 1
+            yield account, *row, now
+
+    with conn:
+        before: int = conn.total_changes
+        conn.executemany('INSERT INTO transactions '
+                         '(account, fingerprint, date, place, card, amount, currency, seq, synced_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                         'ON CONFLICT (account, fingerprint) DO NOTHING', records())
+        inserted: int = conn.total_changes - before
+        conn.execute('INSERT INTO sync_state (account, watermark, synced_at) VALUES (?, ?, ?) '
+                     'ON CONFLICT (account) DO UPDATE SET watermark = excluded.watermark, synced_at = excluded.synced_at',
+                     (account, synced_up_to.isoformat(), now))
+
+    logger.success(f"synced {total} rows, {inserted} of them new")
+    return inserted
@@ -0,0 +1,139 @@
+"""
+Module providing tests for the in-process library API.
+The fetches run against stubbed pages, these tests do not require actual login
+"""
+import datetime
+import sys
+
+import pytest
+
+import api
+import func
+import waits
+from transactions import Transaction, TransactionBatch
+
+
+class FakeDriver:
+    """A logged in browser that can only be quit"""
+
+    def __init__(self):
+        self.quit_calls = 0
+
+    def quit(self) -> None:
+        """closes the browser"""
+        self.quit_calls += 1
+
+
+class TestApi:
+    """
+    Unittest class to test the library API streams typed transactions without touching argv, stdout or files
+    """
+
+    # two identical purchases of one day, split between two pages, are both transactions
+    pages = [[('28.02.24', 'ארומה', '1234', '₪14.00'), ('29.02.24', 'AMAZON', '1234', '$12.00')],
+             [('29.02.24', 'AMAZON', '1234', '$12.00'), ('01.03.24', 'פז', 'כרטיס', '-₪1,250.50')]]
+
+    @pytest.fixture()
+    def fetched(self, monkeypatch):
+        """
+        a fixture stubbing the fetch, it records the options every fetch ran with
+        :return:
+        """
+        calls: list = []
+
+        def fake_fetch_pages(driver, max_request, credx):
+            calls.append((driver, max_request, credx))
+            yield from self.pages
+
+        monkeypatch.setattr(func, 'fetch_pages', fake_fetch_pages)
+        monkeypatch.setattr(sys, 'argv', ['worker.py', '--not-our-flag'])
+        return calls
+
+    @pytest.mark.api
+    def test_fetch_transactions(self, fetched, capsys):
+        """
+        case where a window is streamed as typed transactions, identical rows on both sides of a page boundary kept
+        :return:
+        """
+        max_session = api.MaxSession(FakeDriver(), 'user@example.com', engine='http', concurrency=4)
+
+        transactions = list(api.fetch_transactions(max_session, datetime.date(2024, 2, 1), datetime.date(2024, 3, 31)))
+
+        assert all(isinstance(transaction, Transaction) for transaction in transactions)
+        assert [(t.day, t.place, t.amount, t.currency) for t in transactions] == [
+            (datetime.date(2024, 2, 28), 'ארומה', -1400, 'ILS'), (datetime.date(2024, 2, 29), 'AMAZON', -1200, 'USD'),
+            (datetime.date(2024, 2, 29), 'AMAZON', -1200, 'USD'), (datetime.date(2024, 3, 1), 'פז', 125050, 'ILS')]
+        assert transactions[3].card == ''
+        assert fetched == [(max_session.driver, 'range', {
+            'email': 'user@example.com', 'engine': 'http', 'concurrency': 4, 'cache': False,
+            'start_date': '2024-02-01', 'end_date': '2024-03-31'})]
+        assert capsys.readouterr().out == ''
+
+    @pytest.mark.api
+    def test_fetch_batch_reuses_the_driver(self, fetched):
+        """
+        case where one session serves several fetches with the same driver
+        :return:
+        """
+        max_session = api.MaxSession(FakeDriver(), 'user@example.com')
+
+        first = api.fetch_batch(max_session, datetime.date(2024, 2, 1), datetime.date(2024, 3, 31))
+        second = api.fetch_batch(max_session, datetime.date(2024, 2, 1), datetime.date(2024, 3, 31))
+
+        assert isinstance(first, TransactionBatch) and len(first) == len(second) == 4
+        assert first.totals() == {'ILS': 123650, 'USD': -2400}
+        assert [call[0] for call in fetched] == [max_session.driver, max_session.driver]
+        assert max_session.driver.quit_calls == 0
+
+    @pytest.mark.api
+    def test_invalid_requests(self, fetched):
+        """
+        case where a backwards window or an unknown engine is refused before anything is fetched
+        :return:
+        """
+        max_session = api.MaxSession(FakeDriver(), 'user@example.com')
+
+        with pytest.raises(ValueError):
+            api.fetch_transactions(max_session, datetime.date(2024, 3, 1), datetime.date(2024, 2, 1))
+        with pytest.raises(ValueError):
+            api.MaxSession(FakeDriver(), 'user@example.com', engine='pandas')
+        assert not fetched
+
+    @pytest.mark.api
+    def test_failed_login_quits_the_browser(self, monkeypatch):
+        """
+        case where the login fails, the browser started for it does not outlive it
+        :return:
+        """
+        driver = FakeDriver()
+        logins: list = []
+
+        def failing_login(drv, email, password, use_session):
+            logins.append(use_session)
+            raise SystemExit('Error with credentials at Max')
+
+        monkeypatch.setattr(func, 'driver', lambda *_: driver)
+        monkeypatch.setattr(waits, 'page_ready', lambda drv: True)
+        monkeypatch.setattr(func, 'login', failing_login)
+
+        with pytest.raises(SystemExit):
+            api.MaxSession.login('user@example.com', 'wrong')
+
+        assert driver.quit_calls == 1
+        assert logins == [False]
+
+    @pytest.mark.api
+    def test_wrong_options_start_no_browser(self, monkeypatch):
+        """
+        case where the engine or an option is wrong, it is refused before a browser is started
+        :return:
+        """
+        started: list = []
+        monkeypatch.setattr(func, 'driver', lambda *args: started.append(args) or FakeDriver())
+
+        with pytest.raises(ValueError):
+            api.MaxSession.login('user@example.com', 'password', engine='bogus')
+        with pytest.raises(TypeError):
+            api.MaxSession.login('user@example.com', 'password', concurency=4)
+
+        assert not started
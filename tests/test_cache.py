@@ -0,0 +1,178 @@
+"""
+Module providing tests for the month result cache.
+These tests do not require actual login
+"""
+import datetime
+import os
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+import cache
+import extract
+import func
+
+
+class TestCache:
+    """
+    Unittest class to test closed months stay cached, live months expire and the cache stays bounded
+    """
+
+    account = 'user@example.com'
+    rows = [('01.02.24', 'שופרסל', '1234', '₪100.50')]
+    closed_month = datetime.date(2020, 2, 1)
+
+    @pytest.fixture(autouse=True)
+    def cache_dir(self, tmp_path, monkeypatch):
+        """
+        a fixture keeping the cache of the tests in a temporary directory
+        :return:
+        """
+        monkeypatch.setattr(cache, 'CACHE_DIR', str(tmp_path))
+        yield tmp_path
+
+    @pytest.mark.cache
+    def test_put_get(self):
+        """
+        case where a month is cached and read back
+        :return:
+        """
+        cache.put(self.account, 'purchase', self.closed_month, self.rows)
+
+        assert cache.get(self.account, 'purchase', self.closed_month) == self.rows
+        assert cache.get(self.account, 'billing', self.closed_month) is None
+        assert cache.get('other@example.com', 'purchase', self.closed_month) is None
+
+    @pytest.mark.cache
+    def test_is_live(self):
+        """
+        case where only the current and previous months may still change
+        :return:
+        """
+        today = datetime.date(2024, 3, 20)
+
+        assert cache.is_live(datetime.date(2024, 3, 1), today)
+        assert cache.is_live(datetime.date(2024, 2, 1), today)
+        assert not cache.is_live(datetime.date(2024, 1, 1), today)
+
+    @pytest.mark.cache
+    def test_live_month_expires(self, monkeypatch):
+        """
+        case where the current month outlived its ttl and the closed month did not expire
+        :return:
+        """
+        this_month = datetime.date.today().replace(day=1)
+        cache.put(self.account, 'purchase', this_month, self.rows)
+        cache.put(self.account, 'purchase', self.closed_month, self.rows)
+        monkeypatch.setattr(cache, 'LIVE_TTL', -1)
+
+        assert cache.get(self.account, 'purchase', this_month) is None
+        assert cache.get(self.account, 'purchase', self.closed_month) == self.rows
+
+    @pytest.mark.cache
+    def test_evicts_least_recently_used(self, cache_dir):
+        """
+        case where the cache grew past its cap, the month read last survives
+        :return:
+        """
+        months = [datetime.date(2020, month, 1) for month in (1, 2, 3)]
+        for age, month in enumerate(months):
+            cache.put(self.account, 'purchase', month, self.rows)
+            past = time.time() - 100 + age
+            os.utime(cache._path(self.account, 'purchase', month), (past, past))  # pylint: disable=protected-access
+
+        cache.get(self.account, 'purchase', months[0])
+        # entries differ by a byte or two with the length of their timestamp
+        kept_size = sum(os.path.getsize(cache._path(self.account, 'purchase', m)) for m in (months[0], months[2]))  # pylint: disable=protected-access
+        cache.evict(max_bytes=kept_size)
+
+        assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(cache._path(self.account, 'purchase', m))  # pylint: disable=protected-access
+                                                     for m in (months[0], months[2]))
+
+    @pytest.mark.cache
+    def test_concurrent_writers_evict_safely(self, monkeypatch):
+        """
+        case where threads cache months at once past a tiny cap, every one of them evicts
+        the months the others list, write and remove meanwhile
+        :return:
+        """
+        monkeypatch.setattr(cache, 'MAX_BYTES', 1)
+        errors = []
+
+        def write(worker: int) -> None:
+            try:
+                for month in range(1, 13):
+                    written = datetime.date(2020 + worker % 2, month, 1)
+                    cache.put(self.account, 'purchase', written, self.rows)
+                    cache.get(self.account, 'purchase', datetime.date(2020, month, 1))
+            except OSError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+
+    @pytest.mark.cache
+    def test_only_complete_fetches_are_cached(self, monkeypatch):
+        """
+        case where a closed month is fetched three times, a timed out and a short read are not cached, a full one is
+        :return:
+        """
+        credx = {'email': self.account, 'cache': True, 'start_date': '2020-02-01', 'end_date': '2020-02-29'}
+        cells = [['01.02.20', 'שופרסל', '1234', '₪100.50'], None]
+
+        def timed_out(*_):
+            raise TimeoutException('the transactions table did not render')
+            yield []                # pylint: disable=unreachable
+
+        def short_read(*_):
+            yield extract.cells_to_rows(cells)
+
+        def full_read(*_):
+            yield extract.cells_to_rows(cells[:1])
+
+        monkeypatch.setattr(func, 'chunk_pages', timed_out)
+        with pytest.raises(TimeoutException):
+            list(func.fetch_pages(None, 'range', credx))
+        assert cache.get(self.account, 'purchase', self.closed_month) is None
+
+        monkeypatch.setattr(func, 'chunk_pages', short_read)
+        assert list(func.fetch_pages(None, 'range', credx)) == [[tuple(cells[0])]]
+        assert cache.get(self.account, 'purchase', self.closed_month) is None
+
+        monkeypatch.setattr(func, 'chunk_pages', full_read)
+        list(func.fetch_pages(None, 'range', credx))
+        assert cache.get(self.account, 'purchase', self.closed_month) == [tuple(cells[0])]
+
+    @pytest.mark.cache
+    @pytest.mark.parametrize('engine, pages_before_first_month', [('script', 1), ('http', 2)])
+    def test_missing_months_stream(self, monkeypatch, engine, pages_before_first_month):
+        """
+        case where three closed months are missing, each is cached and handed on before the later ones are fetched
+        month chunks hold their month only, a billing month may still add purchases of the month before it
+        :return:
+        """
+        credx = {'email': self.account, 'cache': True, 'engine': engine,
+                 'start_date': '2020-01-01', 'end_date': '2020-03-31'}
+        fetched: list = []
+
+        def pages(*_):
+            for month in (1, 2, 3, 4):
+                fetched.append(month)
+                yield [(f'15.{month:02}.20', 'שופרסל', '1234', '₪100.50')]
+
+        monkeypatch.setattr(func, 'chunk_pages', pages)
+        monkeypatch.setattr(func, 'http_pages', pages)
+        months = func.fetch_pages(None, 'range', credx)
+
+        assert next(months) == [('15.01.20', 'שופרסל', '1234', '₪100.50')]
+        assert len(fetched) == pages_before_first_month
+        assert cache.get(self.account, 'purchase', datetime.date(2020, 1, 1)) is not None
+        assert cache.get(self.account, 'purchase', datetime.date(2020, 2, 1)) is None
+        assert [page[0][0] for page in months] == ['15.02.20', '15.03.20']
@@ -0,0 +1,95 @@
+"""
+Module providing tests for capturing the transactions JSON responses.
+These tests do not require actual login
+"""
+import json
+from decimal import Decimal
+
+import pytest
+
+import capture
+
+
+class FakeDriver:
+    """
+    A driver whose performance log holds the traffic of a transactions page load.
+    Every get_log call hands out the next batch of entries, as the browser logs them.
+    """
+
+    def __init__(self, batches: list, bodies: dict):
+        self.batches = batches
+        self.bodies = bodies
+
+    def get_log(self, _kind: str) -> list:
+        """the entries logged since the last call"""
+        return self.batches.pop(0) if self.batches else []
+
+    def execute_cdp_cmd(self, _command: str, params: dict) -> dict:
+        """the body of a logged response"""
+        return {'body': self.bodies[params['requestId']], 'base64Encoded': False}
+
+    @staticmethod
+    def execute_script(_script: str) -> int:
+        """the network has been quiet for a while"""
+        return 5000
+
+
+def log_entry(method: str, request_id: str, url: str = '') -> dict:
+    """
+    a performance log entry as chrome writes it
+    :return:
+    """
+    params = {'requestId': request_id}
+    if url:
+        params['response'] = {'url': url}
+    return {'message': json.dumps({'message': {'method': method, 'params': params}})}
+
+
+class TestCapture:
+    """
+    Unittest class to test transactions responses are decoded into rows
+    """
+
+    payload = {'result': {'transactions': [
+        {'purchaseDate': '2024-02-01T00:00:00', 'merchantName': 'שופרסל', 'shortCardNumber': '1234',
+         'actualPaymentAmount': 100.1, 'paymentCurrency': 376},
+        {'purchaseDate': '2024-02-03T00:00:00', 'merchantName': 'AMAZON', 'shortCardNumber': '5678',
+         'actualPaymentAmount': 12.35, 'paymentCurrency': 840},
+        {'purchaseDate': None, 'merchantName': 'summary', 'actualPaymentAmount': None}
+    ]}}
+
+    @pytest.mark.capture
+    def test_payload_rows(self):
+        """
+        case where a response is decoded, amounts stay exact and summary entries are skipped
+        :return:
+        """
+        rows = capture.payload_rows(json.loads(json.dumps(self.payload), parse_float=Decimal))
+
+        assert rows == [('01.02.24', 'שופרסל', '1234', '₪100.1'),
+                        ('03.02.24', 'AMAZON', '5678', '$12.35')]
+
+    @pytest.mark.capture
+    def test_payload_rows_empty_result(self):
+        """
+        case where the window has no transactions
+        :return:
+        """
+        assert not capture.payload_rows({'result': None})
+
+    @pytest.mark.capture
+    def test_capture_rows_waits_for_loading_finished(self):
+        """
+        case where the response arrives in one batch and finishes loading in the next
+        unrelated traffic is ignored
+        :return:
+        """
+        batches = [[log_entry('Network.responseReceived', 'other', 'https://www.max.co.il/api/user'),
+                    log_entry('Network.responseReceived', 'tx', 'https://www.max.co.il' + capture.TRANSACTIONS_API)],
+                   [log_entry('Network.loadingFinished', 'other'),
+                    log_entry('Network.loadingFinished', 'tx')]]
+        driver = FakeDriver(batches, {'tx': json.dumps(self.payload)})
+
+        rows = capture.capture_rows(driver, timeout=2)
+
+        assert [row[1] for row in rows] == ['שופרסל', 'AMAZON']
@@ -0,0 +1,225 @@
+"""
+Module providing tests for the scraper daemon and its warm browser pool.
+These tests do not require actual login
+"""
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+import daemon
+
+
+class FakeDriver:
+    """A browser whose page heap is set by the test"""
+
+    def __init__(self, heap_mb: float = 10, quit_seconds: float = 0):
+        self.heap_mb = heap_mb
+        self.quit_seconds = quit_seconds
+        self.quit_called = False
+
+    def execute_script(self, _script: str) -> float:
+        """answers the page heap script"""
+        return self.heap_mb
+
+    def quit(self) -> None:
+        """closes the browser"""
+        time.sleep(self.quit_seconds)
+        self.quit_called = True
+
+
+class TestDaemon:
+    """
+    Unittest class to test the daemon reuses warm browsers and streams rows back
+    """
+
+    data = {'dates': ['01/02/24', '02/02/24'], 'places': ['שופרסל', 'ארומה'],
+            'cards': ['1234', '5678'], 'amounts': [-100, -12], 'currency': ['ILS', 'USD']}
+
+    @pytest.fixture()
+    def pool(self):
+        """
+        a fixture of a pool counting the browsers started and the logins made
+        :return:
+        """
+        started = []
+
+        def start() -> FakeDriver:
+            started.append(FakeDriver())
+            return started[-1]
+
+        def login(_driver, _email: str, password: str) -> None:
+            if password != 'pass':
+                raise SystemExit("Error with credentials at Max")
+
+        pool = daemon.BrowserPool(driver_factory=start, login=login, max_size=2, max_uses=3)
+        pool.started = started
+        yield pool
+        pool.close()
+
+    @pytest.mark.daemon
+    def test_pool_reuses_warm_driver(self, pool):
+        """
+        case where the same account asks twice, one browser serves both
+        :return:
+        """
+        first = pool.acquire('a@example.com', 'pass')
+        pool.release(first)
+        second = pool.acquire('a@example.com', 'pass')
+
+        assert first is second
+        assert len(pool.started) == 1
+
+    @pytest.mark.daemon
+    def test_wrong_password_gets_no_warm_browser(self, pool):
+        """
+        case where the account has a warm browser and a request comes with another password,
+        it has to log in on its own browser, which fails and is quit
+        :return:
+        """
+        warm = pool.acquire('a@example.com', 'pass')
+        pool.release(warm)
+
+        with pytest.raises(SystemExit):
+            pool.acquire('a@example.com', 'wrong')
+
+        assert len(pool.started) == 2 and pool.started[1].quit_called
+        assert pool.acquire('a@example.com', 'pass') is warm
+
+    @pytest.mark.daemon
+    def test_warm_browser_session_is_checked(self, pool):
+        """
+        case where a warm browser is handed out again, its session is checked first,
+        a browser whose session cannot be restored is quit and its place freed
+        :return:
+        """
+        checked = []
+
+        def check(driver, _email: str, _password: str) -> None:
+            checked.append(driver)
+
+        pool.ensure_login = check
+        first = pool.acquire('a@example.com', 'pass')
+        pool.release(first)
+        pool.release(pool.acquire('a@example.com', 'pass'))
+
+        def expired(*_) -> None:
+            raise TimeoutException("the session expired")
+
+        pool.ensure_login = expired
+        with pytest.raises(TimeoutException):
+            pool.acquire('a@example.com', 'pass')
+
+        assert checked == [first.driver]
+        assert first.driver.quit_called
+        pool.acquire('b@example.com', 'pass')
+        pool.acquire('c@example.com', 'pass')
+
+    @pytest.mark.daemon
+    def test_pool_recycles_after_max_uses(self, pool):
+        """
+        case where a browser served max_uses fetches, it is quit and replaced
+        :return:
+        """
+        for _ in range(3):
+            pool.release(pool.acquire('a@example.com', 'pass'))
+
+        assert pool.started[0].quit_called
+        pool.acquire('a@example.com', 'pass')
+        assert len(pool.started) == 2
+
+    @pytest.mark.daemon
+    def test_quitting_browser_does_not_block_the_pool(self, pool):
+        """
+        case where a browser is recycled and takes long to quit,
+        another account gets its warm browser meanwhile
+        :return:
+        """
+        slow = pool.acquire('a@example.com', 'pass')
+        slow.driver.quit_seconds = 1
+        pool.release(pool.acquire('b@example.com', 'pass'))
+
+        recycling = threading.Thread(target=pool.release, args=(slow, False))
+        recycling.start()
+        time.sleep(0.1)
+        start = time.perf_counter()
+        pool.release(pool.acquire('b@example.com', 'pass'))
+        waited = time.perf_counter() - start
+        recycling.join()
+
+        assert waited < 0.5
+        assert slow.driver.quit_called
+
+    @pytest.mark.daemon
+    def test_pool_recycles_heavy_driver(self, pool):
+        """
+        case where the page heap grew too large
+        :return:
+        """
+        pooled = pool.acquire('a@example.com', 'pass')
+        pooled.driver.heap_mb = pool.max_heap_mb + 1
+        pool.release(pooled)
+
+        assert pooled.driver.quit_called
+
+    @pytest.mark.daemon
+    def test_pool_makes_room_for_another_account(self, pool):
+        """
+        case where the pool is full of idle browsers of other accounts
+        :return:
+        """
+        pool.release(pool.acquire('a@example.com', 'pass'))
+        pool.release(pool.acquire('b@example.com', 'pass'))
+        pool.acquire('c@example.com', 'pass')
+
+        assert pool.started[0].quit_called
+        assert len(pool.started) == 3
+
+    @pytest.mark.daemon
+    def test_daemon_streams_rows(self, pool, tmp_path):
+        """
+        case where a client sends a fetch request over the socket
+        :return:
+        """
+        socket_path = str(tmp_path / 'daemon.sock')
+        request = {'request': 'ytd', 'email': 'a@example.com', 'password': 'pass'}
+
+        def fetch(_driver, max_request: str, _creds: dict) -> dict | None:
+            return self.data if max_request == 'ytd' else None
+
+        with daemon.TransactionsDaemon(socket_path, pool, fetch) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            rows = list(daemon.request_rows(request, socket_path))
+            rows_again = list(daemon.request_rows(request, socket_path))
+
+            with pytest.raises(RuntimeError, match='unknown request'):
+                list(daemon.request_rows({**request, 'request': 'stub'}, socket_path))
+            server.shutdown()
+
+        assert rows == rows_again
+        assert rows[0] == {'date': '01/02/24', 'place': 'שופרסל', 'card': '1234', 'amount': '-100',
+                           'currency': 'ILS'}
+        assert len(pool.started) == 1
+
+    @pytest.mark.daemon
+    @pytest.mark.parametrize('request_args, error', [
+        ({'request': 'range', 'start_date': '2024-13-01', 'end_date': '2024-12-31'}, 'date format'),
+        ({'request': 'range'}, 'were not entered'),
+        ({'request': 'month', 'year': '2024'}, 'month must be a number'),
+        ({'request': 'ytd', 'password': ''}, 'no password')])
+    def test_bad_request_takes_no_browser(self, pool, tmp_path, request_args, error):
+        """
+        case where the request itself is wrong, it is answered before any browser is taken for it
+        :return:
+        """
+        socket_path = str(tmp_path / 'daemon.sock')
+        request = {'email': 'a@example.com', 'password': 'pass', **request_args}
+
+        with daemon.TransactionsDaemon(socket_path, pool, lambda *_: self.data) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            with pytest.raises(RuntimeError, match=error):
+                list(daemon.request_rows(request, socket_path))
+            server.shutdown()
+
+        assert not pool.started
@@ -0,0 +1,92 @@
+"""
+Module providing tests for the cached chromedriver resolution.
+These tests do not require a browser or network access
+"""
+import pytest
+
+import driver_resolver
+
+
+class TestDriverResolver:
+    """
+    Unittest class to test the chromedriver is resolved over the network only when Chrome changed
+    """
+
+    @pytest.fixture()
+    def chromedriver(self, tmp_path, monkeypatch):
+        """
+        a fixture of an installed chromedriver binary and an empty manifest
+        :return:
+        """
+        monkeypatch.setattr(driver_resolver, 'MANIFEST_PATH', str(tmp_path / 'manifest' / 'chromedriver.json'))
+        monkeypatch.setattr(driver_resolver, 'installed_chrome_version', lambda: '120.0.6099.109')
+        binary = tmp_path / 'chromedriver'
+        binary.write_text('')
+        yield str(binary)
+
+    @staticmethod
+    def counting_install(path: str) -> tuple:
+        """
+        an install function counting its network resolutions
+        :return:
+        """
+        calls = []
+
+        def _install() -> str:
+            calls.append(path)
+            return path
+
+        return _install, calls
+
+    @pytest.mark.driver
+    def test_second_resolution_skips_network(self, chromedriver):
+        """
+        case where Chrome did not change between runs
+        :return:
+        """
+        install, calls = self.counting_install(chromedriver)
+
+        assert driver_resolver.resolve(install) == chromedriver
+        assert driver_resolver.resolve(install) == chromedriver
+        assert len(calls) == 1
+
+    @pytest.mark.driver
+    def test_chrome_upgrade_resolves_again(self, chromedriver, monkeypatch):
+        """
+        case where Chrome was upgraded since the manifest was written
+        :return:
+        """
+        install, calls = self.counting_install(chromedriver)
+        driver_resolver.resolve(install)
+        monkeypatch.setattr(driver_resolver, 'installed_chrome_version', lambda: '121.0.6167.85')
+        driver_resolver.resolve(install)
+
+        assert len(calls) == 2
+        assert driver_resolver.load_manifest()['chrome_version'] == '121.0.6167.85'
+
+    @pytest.mark.driver
+    def test_offline_upgrade_reuses_manifest(self, chromedriver, monkeypatch):
+        """
+        case where Chrome was upgraded on a network isolated worker
+        :return:
+        """
+        install, _ = self.counting_install(chromedriver)
+        driver_resolver.resolve(install)
+        monkeypatch.setattr(driver_resolver, 'installed_chrome_version', lambda: '121.0.6167.85')
+
+        def offline_install() -> str:
+            raise ConnectionError('no network')
+
+        assert driver_resolver.resolve(offline_install) == chromedriver
+
+    @pytest.mark.driver
+    def test_offline_without_manifest(self, chromedriver):  # pylint: disable=unused-argument
+        """
+        case where nothing was ever resolved and there is no network
+        :return:
+        """
+        def offline_install() -> str:
+            raise ConnectionError('no network')
+
+        with pytest.raises(ConnectionError):
+            driver_resolver.resolve(offline_install)
@@ -0,0 +1,107 @@
+"""
+Module providing tests for writing the transactions to files.
+These tests do not require actual login
+"""
+import csv
+import json
+from decimal import Decimal
+
+import pytest
+
+import export
+
+
+class TestExport:
+    """
+    Unittest class to test the transactions are written sorted, with totals per currency
+    """
+
+    data = {'dates': ['01/02/24', '15/03/24', '02/02/24'],
+            'places': ['שופרסל', 'AMAZON', 'ארומה'],
+            'cards': ['1234', '5678', '1234'],
+            'amounts_raw': ['₪100.50', '$12.00', '₪14.00'],
+            'amounts': [Decimal('-100.50'), Decimal('-12.00'), Decimal('-14.00')],
+            'currency': ['ILS', 'USD', 'ILS']}
+
+    @staticmethod
+    def read_csv(path) -> list:
+        """
+        reads the written csv back
+        :return:
+        """
+        with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+            return list(csv.reader(file))
+
+    @pytest.mark.export
+    def test_write_csv(self, tmp_path):
+        """
+        case where the rows are written newest first with a total row per currency
+        :return:
+        """
+        path = tmp_path / 'transactions.csv'
+        totals = export.write_csv(path, export.data_rows(self.data))
+        lines = self.read_csv(path)
+
+        assert lines[0] == list(export.CSV_HEADER)
+        assert [line[1] for line in lines[1:4]] == ['15/03/24', '02/02/24', '01/02/24']
+        assert lines[4:] == [['Total', '', '', '', '', '-12.00', 'USD'],
+                             ['Total', '', '', '', '', '-114.50', 'ILS']]
+        assert totals == {'USD': Decimal('-12.00'), 'ILS': Decimal('-114.50')}
+
+    @pytest.mark.export
+    def test_write_csv_has_bom(self, tmp_path):
+        """
+        case where the file starts with the utf-8 BOM so spreadsheets read the Hebrew right
+        :return:
+        """
+        path = tmp_path / 'transactions.csv'
+        export.write_csv(path, export.data_rows(self.data))
+
+        assert path.read_bytes().startswith(b'\xef\xbb\xbf')
+
+    @pytest.mark.export
+    def test_write_csv_unsorted_keeps_order(self, tmp_path):
+        """
+        case where sorting is turned off, rows are written as they come
+        :return:
+        """
+        path = tmp_path / 'transactions.csv'
+        export.write_csv(path, export.data_rows(self.data), sort=False)
+
+        assert [line[1] for line in self.read_csv(path)[1:4]] == self.data['dates']
+
+    @pytest.mark.export
+    def test_write_jsonl_partitions(self, tmp_path):
+        """
+        case where json lines are written one file per year-month with exact amounts
+        :return:
+        """
+        files = export.write_jsonl(str(tmp_path), export.data_rows(self.data))
+
+        assert [f.split(str(tmp_path))[1] for f in files] == ['/year_month=2024-02/part-0.jsonl',
+                                                              '/year_month=2024-03/part-0.jsonl']
+        with open(files[0], 'r', encoding='utf-8') as file:
+            first = json.loads(file.readline())
+
+        assert first == {'date': '2024-02-01', 'place': 'שופרסל', 'card': '1234',
+                         'amount_raw': '₪100.50', 'amount': '-100.50', 'currency': 'ILS'}
+
+    @pytest.mark.export
+    def test_write_parquet_typed_partitions(self, tmp_path):
+        """
+        case where parquet is written partitioned by year-month with typed columns
+        :return:
+        """
+        pa = pytest.importorskip('pyarrow')
+        import pyarrow.parquet as pq    # pylint: disable=import-outside-toplevel
+
+        files = export.write_parquet(str(tmp_path), export.data_rows(self.data))
+        march = pq.read_table(tmp_path, filters=[('year_month', '=', '2024-03')])
+        table = pq.read_table(tmp_path)
+
+        assert len(files) == 2
+        assert march.column('place').to_pylist() == ['AMAZON']
+        assert table.schema.field('date').type == pa.date32()
+        assert table.schema.field('amount').type == pa.decimal128(18, 2)
+        assert pa.types.is_dictionary(table.schema.field('place').type)
+        assert sorted(table.column('amount').to_pylist()) == sorted(self.data['amounts'])
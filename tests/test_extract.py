@@ -0,0 +1,225 @@
+"""
+Module providing tests for the transaction rows extraction engines.
+These tests do not require actual login
+"""
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+import extract
+import locators as loc
+
+
+class FakeElement:
+    """A rendered element that is always displayed"""
+
+    @staticmethod
+    def is_displayed() -> bool:
+        """the element is always visible"""
+        return True
+
+
+class FakeDriver:
+    """
+    A driver standing on a rendered transactions page.
+    Counts the scripts it runs so round trips can be asserted.
+    """
+
+    def __init__(self, columns: list):
+        self.columns = columns
+        self.scripts_ran = 0
+
+    @staticmethod
+    def find_element(*_) -> FakeElement:
+        """every locator is found"""
+        return FakeElement()
+
+    def execute_script(self, _script: str, offset: int, *xpaths) -> list:
+        """returns the cells of every row as the in-browser script would"""
+        self.scripts_ran += 1
+        assert len(xpaths) == 2 + len(extract.CELLS)
+        return [list(row) for row in zip(*self.columns)][offset:]
+
+
+class FakeLazyDriver(FakeElement):
+    """
+    A driver standing on a transactions table that renders batch more rows on every load more.
+    Counts the cells handed over so re-reading can be asserted.
+    """
+
+    def __init__(self, total: int, batch: int):
+        self.total = total
+        self.batch = batch
+        self.rendered = min(batch, total)
+        self.cells_read = 0
+
+    def find_element(self, _by: str, xpath: str):
+        """every locator is found, the load more button only while rows are left to load"""
+        if xpath == loc.max_loc['transactions_load_more'][1] and self.rendered == self.total:
+            raise NoSuchElementException(xpath)
+        return self
+
+    def execute_script(self, script: str, *args):
+        """answers the in-browser scripts the paging engine runs"""
+        if script == loc.max_js['scrape_rows']:
+            offset = args[0]
+            cells = [[f'{column}-{i}' for column in range(4)] for i in range(offset, self.rendered)]
+            self.cells_read += sum(len(row) for row in cells)
+            return cells
+
+        if script == loc.max_js['load_more']:
+            self.rendered = min(self.rendered + self.batch, self.total)
+            return None
+
+        if script == loc.max_js['count_nodes']:
+            return self.rendered
+
+        return 10 ** 6      # the page is quiet
+
+
+class TestExtract:
+    """
+    Unittest class to test the extraction engines turn the transactions table into rows
+    """
+
+    columns = [['01.02.24', '02.02.24'],
+               ['שופרסל', 'ארומה'],
+               ['1234', '5678'],
+               ['₪100.50', '$12.00']]
+
+    @pytest.mark.extract
+    def test_columns_to_rows(self):
+        """
+        case where every column has the same length
+        :return:
+        """
+        rows = extract.columns_to_rows(self.columns)
+
+        assert rows == [('01.02.24', 'שופרסל', '1234', '₪100.50'),
+                        ('02.02.24', 'ארומה', '5678', '$12.00')]
+
+    @pytest.mark.extract
+    def test_columns_to_rows_empty_table(self):
+        """
+        case where the table has no transactions
+        :return:
+        """
+        assert not extract.columns_to_rows([[], [], [], []])
+
+    @pytest.mark.extract
+    def test_script_rows_single_round_trip(self):
+        """
+        case where the script engine pulls the whole table with a single script call
+        :return:
+        """
+        driver = FakeDriver(self.columns)
+        rows = extract.script_rows(driver)
+
+        assert driver.scripts_ran == 1
+        assert len(rows) == 2
+
+    @staticmethod
+    def row_html(date: str, place: str | None, card: str, amount: str | None) -> str:
+        """
+        builds one transactions row with the same markup the locators target, None leaves the cell out
+        :return:
+        """
+        place_cell = '<div></div>' if place is None else f'<div><div>{place}</div></div>'
+        amount_cell = '<div></div>' if amount is None else f'<div><span>{amount}</span></div>'
+        return (f'<div class="row body"><div>{date}</div>{place_cell}'
+                f'<div>category</div><div>{card}</div><div>type</div>{amount_cell}</div>')
+
+    def page_html(self, rows: list, outside: str = '') -> str:
+        """
+        builds a transactions page with the same markup the locators target
+        :param rows: list of (date, place, card, amount) rows
+        :param outside: markup placed before the table
+        :return:
+        """
+        body = ''.join(self.row_html(*row) for row in rows)
+        return (f'<html><head><meta charset="utf-8"></head><body>{outside}'
+                f'<div class="table">{body}</div></body></html>')
+
+    @pytest.mark.extract
+    def test_html_rows(self):
+        """
+        case where the html engine parses a page source snapshot
+        :return:
+        """
+        expected = extract.columns_to_rows(self.columns)
+        rows = extract.html_rows(self.page_html(expected))
+
+        assert rows == expected
+
+    @pytest.mark.extract
+    def test_html_file_rows(self, tmp_path):
+        """
+        case where the html engine re-parses a page archived on disk
+        :return:
+        """
+        expected = extract.columns_to_rows(self.columns)
+        snapshot = tmp_path / 'transactions.html'
+        snapshot.write_text(self.page_html(expected), encoding='utf-8')
+
+        assert extract.html_file_rows(str(snapshot)) == expected
+
+    @pytest.mark.extract
+    def test_html_rows_every_container(self):
+        """
+        case where the rows are split between two containers, as a page grouping them by month does
+        :return:
+        """
+        first, second = ('01.02.24', 'ארומה', '1234', '₪14.00'), ('01.03.24', 'AMAZON', '1234', '$12.00')
+        page = self.page_html([first]).replace('</body>', f'<div class="table">{self.row_html(*second)}</div></body>')
+
+        assert extract.html_rows(page) == [first, second]
+
+    @pytest.mark.extract
+    def test_html_rows_no_table(self):
+        """
+        case where the snapshot has no transactions table
+        :return:
+        """
+        assert not extract.html_rows('<html><body><p>nothing here</p></body></html>')
+
+    @pytest.mark.extract
+    def test_paged_batches_reads_every_row_once(self):
+        """
+        case where a 6000 row table loads lazily in batches and paging stops once the count stabilised
+        :return:
+        """
+        driver = FakeLazyDriver(total=6000, batch=250)
+        start = time.perf_counter()
+        batches = list(extract.paged_batches(driver, timeout=5))
+        elapsed = time.perf_counter() - start
+        rows = [row for batch in batches for row in batch]
+
+        assert len(batches) == 24
+        assert len(rows) == 6000
+        assert rows[-1] == ('0-5999', '1-5999', '2-5999', '3-5999')
+        assert driver.cells_read == 6000 * 4
+        assert elapsed < 5
+
+    @pytest.mark.extract
+    def test_html_rows_missing_cells_never_shift(self):
+        """
+        case where a row lacks its place and another its amount, the other rows keep their own cells
+        :return:
+        """
+        rows = extract.html_rows(self.page_html([('01.02.24', None, '1234', '₪100.50'),
+                                                 ('02.02.24', 'ארומה', '5678', None),
+                                                 ('03.02.24', 'AMAZON', '1234', '$12.00')]))
+
+        assert rows == [('01.02.24', '', '1234', '₪100.50'), ('03.02.24', 'AMAZON', '1234', '$12.00')]
+
+    @pytest.mark.extract
+    def test_cells_to_rows_isolates_unreadable_rows(self):
+        """
+        case where the browser could not read one row, and two rows came with a blank date or amount
+        :return:
+        """
+        rows = extract.cells_to_rows([['01.02.24', 'שופרסל', None, '₪1.00'], None, ['02.02.24', 'ארומה', '1', '₪2.00'],
+                                      ['', 'פז', '1', '₪3.00'], ['03.02.24', 'פז', '1', ' ']])
+
+        assert rows == [('01.02.24', 'שופרסל', '', '₪1.00'), ('02.02.24', 'ארומה', '1', '₪2.00')]
@@ -0,0 +1,167 @@
+"""
+Module providing tests for the local fake site the end-to-end benchmarks run against.
+The site keeps the markup and the api the scraper depends on,
+these tests do not require actual login
+"""
+# pylint: disable=line-too-long
+import datetime
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+import capture
+import extract
+import http_fetch
+import normalize
+from benchmarks import bench_e2e, fake_max
+
+
+TIMEOUT: float = 10             # seconds a request to the fake site may take
+
+
+class TestFakeMax:
+    """
+    Unittest class to test the fake site serves what the scraper reads
+    """
+
+    @pytest.fixture()
+    def site(self):
+        """
+        a fixture serving the fake site in the background
+        :return:
+        """
+        with fake_max.Site(rows=500, days=120, page_size=200) as site:
+            yield site
+
+    @pytest.fixture()
+    def http(self, site):
+        """
+        a fixture with a session logged into the fake site
+        :return:
+        """
+        http = requests.Session()
+        http.post(f'{site.url}/login', json={'username': site.email, 'password': site.password}, timeout=TIMEOUT).raise_for_status()
+        return http
+
+    @staticmethod
+    def page_url(site, start: datetime.date, end: datetime.date) -> str:
+        """the transactions page of a window, with the filter func.transactions_url builds"""
+        return f'{site.url}/transaction-details/personal?filter=-1_-1_0_{start.year}-01-01_{start}_{end}_-1'
+
+    @pytest.mark.fake_max
+    def test_api_path(self):
+        """
+        case where the fake api answers on the path the capture engine listens for
+        :return:
+        """
+        assert fake_max.API_PATH == capture.TRANSACTIONS_API
+
+    @pytest.mark.fake_max
+    def test_login(self, site):
+        """
+        case where only the right credentials get a session cookie
+        :return:
+        """
+        wrong = requests.post(f'{site.url}/login', json={'username': site.email, 'password': 'wrong'}, timeout=TIMEOUT)
+        right = requests.post(f'{site.url}/login', json={'username': site.email, 'password': site.password}, timeout=TIMEOUT)
+
+        assert wrong.status_code == 401 and 'auth' not in wrong.cookies
+        assert right.status_code == 200 and right.cookies['auth'] in site.tokens
+
+    @pytest.mark.fake_max
+    def test_redirect_without_session(self, site):
+        """
+        case where the transactions page is asked for without logging in
+        :return:
+        """
+        response = requests.get(f'{site.url}/transaction-details/personal', allow_redirects=False, timeout=TIMEOUT)
+
+        assert response.status_code == 302
+        assert response.headers['Location'] == '/'
+
+    @pytest.mark.fake_max
+    def test_html_rows(self, site, http):
+        """
+        case where the html engine reads the whole table of a window, in the order the site lists it
+        :return:
+        """
+        site.page_size = 0
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=60)
+        expected = site.between(start, end)
+
+        rows = extract.html_rows(http.get(self.page_url(site, start, end), timeout=TIMEOUT).text)
+
+        assert expected
+        assert rows == [(f'{t.date:%d.%m.%y}', t.place, t.card, t.raw_amount) for t in expected]
+
+    @pytest.mark.fake_max
+    def test_lazy_rows(self, site, http):
+        """
+        case where the table shows its first page and the rest loads in batches
+        :return:
+        """
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=120)
+        expected = site.between(start, end)
+        url = self.page_url(site, start, end)
+
+        first_page = extract.html_rows(http.get(url, timeout=TIMEOUT).text)
+        batches, more, offset = [], True, len(first_page)
+        while more:
+            batch = http.get(f'{site.url}/rows', params={'filter': url.split('filter=')[1], 'offset': offset}, timeout=TIMEOUT).json()
+            batches.append(batch['count'])
+            more, offset = batch['more'], offset + batch['count']
+
+        assert len(first_page) == site.page_size
+        assert sum(batches) + len(first_page) == len(expected)
+        assert all(count <= site.page_size for count in batches)
+
+    @pytest.mark.fake_max
+    def test_api_rows(self, site, http):
+        """
+        case where the capture engine parses the api payload of a window
+        :return:
+        """
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=30)
+
+        payload = http.get(f'{site.url}{fake_max.API_PATH}', params={'from': str(start), 'to': str(end)}, timeout=TIMEOUT).json()
+
+        assert len(capture.payload_rows(payload)) == len(site.between(start, end))
+
+    @pytest.mark.fake_max
+    def test_fetch_window(self, site, http):
+        """
+        case where the http engine fetches a window billing month by billing month
+        :return:
+        """
+        end = datetime.date.today()
+        start = end - datetime.timedelta(days=90)
+
+        rows = http_fetch.fetch_window(http, start, end, concurrency=2, base_url=site.url)
+
+        # the api amounts come without thousands separators, they are compared normalized
+        assert sorted((*row[:3], normalize.parse_amount(row[3])) for row in rows) == sorted(
+            (f'{t.date:%d.%m.%y}', t.place, t.card, normalize.parse_amount(t.raw_amount))
+            for t in site.between(start, end))
+
+    @pytest.mark.fake_max
+    @pytest.mark.skipif(not os.path.isdir('/proc'), reason='reads the process tree from /proc')
+    def test_browser_rss_counts_grandchildren(self):
+        """
+        case where the memory is held by a grandchild, as chrome's renderers are below chromedriver
+        :return:
+        """
+        grandchild = 'import time; block = bytearray(64 * 2 ** 20); time.sleep(2)'
+        with subprocess.Popen([sys.executable, '-c', f'import subprocess, sys; '
+                               f'subprocess.run([sys.executable, "-c", {grandchild!r}])']):
+            time.sleep(1)
+            with bench_e2e.TreePeak(interval=0.05) as browser:
+                time.sleep(0.2)
+
+        assert browser.peak_mb > 64
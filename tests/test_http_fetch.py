@@ -0,0 +1,115 @@
+"""
+Module providing tests for the browserless http fetching.
+These tests run against a local stub server serving canned responses and do not require actual login
+"""
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import capture
+import http_fetch
+
+
+class FakeDriver:
+    """A logged in driver handing off its cookies"""
+
+    @staticmethod
+    def get_cookies() -> list:
+        """the cookies of the logged in session"""
+        return [{'name': 'auth', 'value': 'token', 'domain': '127.0.0.1', 'path': '/'}]
+
+    @staticmethod
+    def execute_script(_script: str) -> str:
+        """the browser user agent"""
+        return 'FakeChrome/1.0'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves one canned transaction per billing month to requests carrying the session cookie"""
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """answers the transactions endpoint"""
+        url = urlparse(self.path)
+        if url.path != capture.TRANSACTIONS_API or 'auth=token' not in self.headers.get('Cookie', ''):
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        month = json.loads(parse_qs(url.query)['filterData'][0])['date']
+        self.server.months.append(month)
+        payload = {'result': {'transactions': [
+            {'purchaseDate': month[:8] + '10T00:00:00', 'merchantName': f'shop {month[:7]}',
+             'shortCardNumber': '1234', 'actualPaymentAmount': 10.5, 'paymentCurrency': 376}]}}
+
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_):
+        """keeps the test output clean"""
+
+
+class TestHttpFetch:
+    """
+    Unittest class to test months are fetched over http with the handed off cookies
+    """
+
+    @pytest.fixture()
+    def stub_url(self):
+        """
+        a fixture running the stub server in the background
+        :return:
+        """
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        server.months = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield f'http://127.0.0.1:{server.server_port}', server.months
+        server.shutdown()
+        server.server_close()
+
+    @pytest.mark.http
+    def test_fetch_month(self, stub_url):
+        """
+        case where one billing month is fetched with the cookies of the driver
+        :return:
+        """
+        base_url, months = stub_url
+        http = http_fetch.session_from_driver(FakeDriver())
+
+        rows = http_fetch.fetch_month(http, datetime.date(2024, 3, 17), base_url)
+
+        assert months == ['2024-03-01']
+        assert rows == [('10.03.24', 'shop 2024-03', '1234', '₪10.5')]
+
+    @pytest.mark.http
+    def test_fetch_window(self, stub_url):
+        """
+        case where a window is fetched concurrently, rows come back in order and within the window
+        :return:
+        """
+        base_url, months = stub_url
+        http = http_fetch.session_from_driver(FakeDriver(), pool_size=3)
+
+        rows = http_fetch.fetch_window(http, datetime.date(2024, 1, 5), datetime.date(2024, 4, 9),
+                                       concurrency=3, base_url=base_url)
+
+        assert sorted(months) == ['2024-01-01', '2024-02-01', '2024-03-01', '2024-04-01', '2024-05-01']
+        assert [row[1] for row in rows] == ['shop 2024-01', 'shop 2024-02', 'shop 2024-03']
+
+    @pytest.mark.http
+    def test_fetch_without_cookies(self, stub_url):
+        """
+        case where the session is not logged in
+        :return:
+        """
+        base_url, _ = stub_url
+
+        with pytest.raises(http_fetch.requests.HTTPError):
+            http_fetch.fetch_month(http_fetch.requests.Session(), datetime.date(2024, 3, 1), base_url)
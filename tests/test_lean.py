@@ -0,0 +1,77 @@
+"""
+Module providing tests for the lean browsing profile.
+These tests do not require actual login
+"""
+import fnmatch
+
+import pytest
+from selenium.webdriver import ChromeOptions
+
+import lean
+
+
+class FakeDriver:
+    """A driver recording the DevTools commands it was sent"""
+
+    def __init__(self):
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, command: str, params: dict) -> dict:
+        """records the command"""
+        self.cdp_commands.append((command, params))
+        return {}
+
+
+class TestLean:
+    """
+    Unittest class to test the lean profile skips the heavy parts of the site and keeps the rest
+    """
+
+    @staticmethod
+    def blocked(url: str) -> bool:
+        """
+        whether any of the patterns blocks the url, as Chrome matches them
+        :return:
+        """
+        return any(fnmatch.fnmatchcase(url, pattern) for pattern in lean.BLOCKED_URLS)
+
+    @pytest.mark.lean
+    def test_configure_headless(self):
+        """
+        case where a headless browser gets the eager strategy, no images and a small fixed window
+        :return:
+        """
+        options = ChromeOptions()
+        lean.configure(options, headless=True)
+
+        assert options.page_load_strategy == 'eager'
+        assert '--window-size=1280,900' in options.arguments
+        assert options.experimental_options['prefs']['profile.managed_default_content_settings.images'] == 2
+
+    @pytest.mark.lean
+    def test_configure_with_window(self):
+        """
+        case where a visible browser keeps its window size
+        :return:
+        """
+        options = ChromeOptions()
+        lean.configure(options, headless=False)
+
+        assert not any(argument.startswith('--window-size') for argument in options.arguments)
+
+    @pytest.mark.lean
+    def test_block_patterns(self):
+        """
+        case where images, fonts and trackers are blocked but the pages, scripts and the api are not
+        :return:
+        """
+        driver = FakeDriver()
+        lean.block(driver)
+
+        assert driver.cdp_commands[-1] == ('Network.setBlockedURLs', {'urls': list(lean.BLOCKED_URLS)})
+        assert self.blocked('https://www.max.co.il/media/banner.jpg')
+        assert self.blocked('https://www.max.co.il/fonts/almoni.woff2')
+        assert self.blocked('https://www.googletagmanager.com/gtm.js?id=GTM-1')
+        assert not self.blocked('https://www.max.co.il/transaction-details/personal')
+        assert not self.blocked('https://www.max.co.il/main.js')
+        assert not self.blocked('https://onlinelcapi.max.co.il/api/registered/transactionDetails/getTransactionsAndGraphs')
@@ -0,0 +1,71 @@
+"""
+Module providing tests for normalizing raw amounts into minor units and currency codes.
+These tests do not require actual login
+"""
+from decimal import Decimal
+
+import pytest
+
+import func
+import normalize
+
+
+class TestNormalize:
+    """
+    Unittest class to test raw amounts of every shape the site shows come out exact
+    """
+
+    @pytest.mark.normalize
+    @pytest.mark.parametrize('raw, expected', [('₪100.50', (-10050, 'ILS')),
+                                               ('₪1,234,567.8', (-123456780, 'ILS')),
+                                               ('$12', (-1200, 'USD')),
+                                               ('12.50 €', (-1250, 'EUR')),
+                                               ('1,500.00 ש"ח', (-150000, 'ILS')),
+                                               ('-₪14.00', (1400, 'ILS')),
+                                               ('₪14.00-', (1400, 'ILS')),
+                                               ('(£3.20)', (320, 'GBP')),
+                                               ('14.00 זיכוי', (1400, '-')),
+                                               ('₪300.00 תשלום 2 מתוך 6', (-30000, 'ILS')),
+                                               ('3/12 ₪300.00', (-30000, 'ILS')),
+                                               ('תשלום 3 מתוך 12 ₪50.00', (-5000, 'ILS')),
+                                               ('תשלום 3 מתוך 12 50.00 ₪', (-5000, 'ILS')),
+                                               ('12 ₪50.00', (-5000, 'ILS')),
+                                               ('₪100.50, תשלום', (-10050, 'ILS'))])
+    def test_parse_amount(self, raw, expected):
+        """
+        case where thousands separators, refunds, installments and foreign currencies are parsed
+        :return:
+        """
+        assert normalize.parse_amount(raw) == expected
+
+    @pytest.mark.normalize
+    @pytest.mark.parametrize('raw', ['abc', '', '₪1,2345', '$12,34.00', '₪,123'])
+    def test_parse_amount_without_an_amount_raises(self, raw):
+        """
+        case where no amount or a misplaced thousands separator is read, never taken for a zero
+        :return:
+        """
+        with pytest.raises(ValueError):
+            normalize.parse_amount(raw)
+
+    @pytest.mark.normalize
+    def test_normalize_amounts_column(self):
+        """
+        case where a whole column comes back as minor units and codes, in order
+        :return:
+        """
+        minor_units, currencies = normalize.normalize_amounts(['₪100.50', '$12.00', '₪100.50', '-€1,000'])
+
+        assert list(minor_units) == [-10050, -1200, -10050, 100000]
+        assert currencies == ['ILS', 'USD', 'ILS', 'EUR']
+        assert normalize.to_decimal(minor_units[0]) == Decimal('-100.50')
+
+    @pytest.mark.normalize
+    def test_format_currency_reads_every_character(self):
+        """
+        case where the currency mark is not the first character of the raw amount
+        :return:
+        """
+        assert func.format_currency('100.50 ₪') == 'ILS'
+        assert func.format_currency('USD 7') == 'USD'
+        assert func.format_amounts('1,234.50 ₪') == Decimal('-1234.50')
@@ -0,0 +1,287 @@
+"""
+Module providing tests for the asyncio orchestration of many accounts and windows.
+The browsers and the site are stubbed with blocking fakes, these tests do not require actual login
+"""
+import asyncio
+import csv
+import datetime
+import threading
+import time
+
+import pytest
+
+import api
+import func
+import orchestrator
+
+
+PAGE_SECONDS: float = 0.1
+MONTH: tuple = (datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))
+
+
+class FakeDriver:                # pylint: disable=too-few-public-methods
+    """A browser of one account, it notes how many fetches ran on it at the same time"""
+
+    def __init__(self, email: str):
+        self.email = email
+        self.expired = False
+        self.logins = 1
+        self.busy = 0
+        self.most_busy = 0
+        self.quit_calls = 0
+
+    def quit(self) -> None:
+        """closes the browser"""
+        self.quit_calls += 1
+
+
+class FakeSite:
+    """Blocking logins and fetches, every page takes PAGE_SECONDS"""
+
+    def __init__(self, pages: int = 2):
+        self.pages = pages
+        self.drivers: list = []
+        self.pages_served = 0
+        self.lock = threading.Lock()
+
+    def login(self, email: str, password: str, **options) -> api.MaxSession:
+        """logs a new fake browser in"""
+        time.sleep(PAGE_SECONDS)
+        if password != 'password':
+            raise SystemExit("Error with credentials at Max")
+        driver = FakeDriver(email)
+        self.drivers.append(driver)
+        return api.MaxSession(driver, email, password=password, **options)
+
+    @staticmethod
+    def session_alive(driver) -> bool:
+        """whether the site still knows the session of the browser"""
+        return not driver.expired
+
+    @staticmethod
+    def max_login(driver, _email: str, password: str) -> None:
+        """logs the browser in again"""
+        if password != 'password':
+            raise SystemExit("Error with credentials at Max")
+        driver.expired = False
+        driver.logins += 1
+
+    def fetch_pages(self, driver, _max_request: str, credx: dict):
+        """one row per page, dated within the window"""
+        driver.busy += 1
+        driver.most_busy = max(driver.most_busy, driver.busy)
+        try:
+            for page in range(self.pages):
+                time.sleep(PAGE_SECONDS)
+                with self.lock:
+                    self.pages_served += 1
+                day: str = f'{page + 1:02}.{credx["start_date"][5:7]}.24'
+                yield [(day, driver.email, '1234', '₪10.00')]
+        finally:
+            driver.busy -= 1
+
+
+class TestOrchestrator:
+    """
+    Unittest class to test accounts and windows run concurrently, fail alone and can be cut short
+    """
+
+    @pytest.fixture()
+    def site(self, monkeypatch):
+        """
+        a fixture replacing the browsers and the site with the blocking fakes
+        :return:
+        """
+        fake = FakeSite()
+        monkeypatch.setattr(api.MaxSession, 'login', fake.login)
+        monkeypatch.setattr(func, 'fetch_pages', fake.fetch_pages)
+        monkeypatch.setattr(func, 'session_alive', fake.session_alive)
+        monkeypatch.setattr(func, 'max_login', fake.max_login)
+        return fake
+
+    @staticmethod
+    def requests(accounts: int, windows: int, password: str = 'password') -> list:
+        """windows of every account, a month each"""
+        return [orchestrator.FetchRequest(f'user{account}@example.com', password,
+                                          MONTH[0].replace(month=month + 1),
+                                          MONTH[1].replace(month=month + 1, day=28))
+                for account in range(accounts) for month in range(windows)]
+
+    def fetch_all(self, max_workers: int, accounts: int, windows: int,
+                  timeout: float | None = None) -> list:
+        """every result of the windows of every account, fetched from a new event loop"""
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=max_workers) as orchestra:
+                requests = self.requests(accounts, windows)
+                return [result async for result in orchestra.fetch_many(requests, timeout)]
+
+        return asyncio.run(run())
+
+    @pytest.mark.orchestrator
+    def test_accounts_run_concurrently(self, site):
+        """
+        case where many accounts are fetched at once, every account on its own browser,
+        one window at a time
+        :return:
+        """
+        start = time.perf_counter()
+        results = self.fetch_all(6, 6, 2)
+        elapsed = time.perf_counter() - start
+
+        # a login and two windows of two pages each, one after the other per account,
+        # the accounts side by side
+        assert elapsed < 5 * PAGE_SECONDS * 2
+        assert len(results) == 12 and all(result.ok for result in results)
+        assert {len(result.batch) for result in results} == {2}
+        assert len(site.drivers) == 6
+        assert all(driver.most_busy == 1 and driver.quit_calls == 1 for driver in site.drivers)
+
+    @pytest.mark.orchestrator
+    def test_timeout_stops_the_fetch(self, site):
+        """
+        case where a request runs out of time, it fails alone
+        and its thread stops before the next page
+        :return:
+        """
+        site.pages = 20
+
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=2) as orchestra:
+                results = [result async for result
+                           in orchestra.fetch_many(self.requests(1, 1), timeout=5 * PAGE_SECONDS)]
+                served = site.pages_served
+                await asyncio.sleep(3 * PAGE_SECONDS)
+                return results, served
+
+        (result,), served = asyncio.run(run())
+
+        assert isinstance(result.error, asyncio.TimeoutError)
+        assert site.pages_served <= served + 1 < site.pages
+
+    @pytest.mark.orchestrator
+    def test_timed_out_window_keeps_the_browser_until_it_stopped(self, site):
+        """
+        case where both windows of an account run out of time,
+        the second never drives the browser alongside the first
+        :return:
+        """
+        site.pages = 20
+
+        results = self.fetch_all(4, 1, 2, timeout=5 * PAGE_SECONDS)
+
+        assert all(isinstance(result.error, asyncio.TimeoutError) for result in results)
+        assert site.drivers[0].most_busy == 1
+
+    @pytest.mark.orchestrator
+    def test_waiting_for_the_browser_is_not_timed(self, site):
+        """
+        case where the second window of an account waits longer than its timeout for the first,
+        then runs within it
+        :return:
+        """
+        site.pages = 3
+
+        results = self.fetch_all(1, 1, 2, timeout=5 * PAGE_SECONDS)
+
+        assert all(result.ok for result in results)
+        assert max(result.seconds for result in results) > 5 * PAGE_SECONDS
+
+    @pytest.mark.orchestrator
+    @pytest.mark.usefixtures('site')
+    def test_wrong_password_fails_alone(self):
+        """
+        case where one account has the wrong password,
+        the other accounts are fetched and handed over first
+        :return:
+        """
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=4) as orchestra:
+                requests = self.requests(1, 1, password='wrong') + self.requests(3, 1)
+                return [result async for result in orchestra.fetch_many(requests)]
+
+        results = asyncio.run(run())
+        failed = [result for result in results if not result.ok]
+
+        assert results[0] is failed[0] and isinstance(failed[0].error, SystemExit)
+        assert failed[0].request.password == 'wrong'
+        assert sum(result.ok for result in results) == 3
+
+    @pytest.mark.orchestrator
+    def test_wrong_password_gets_no_logged_in_browser(self, site):
+        """
+        case where the account already has a logged in browser
+        and a request comes with another password, it has to log in on its own and fails
+        :return:
+        """
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=2) as orchestra:
+                right = await orchestra.fetch_result(self.requests(1, 1)[0])
+                wrong = await orchestra.fetch_result(self.requests(1, 1, password='wrong')[0])
+                return right, wrong
+
+        right, wrong = asyncio.run(run())
+
+        assert right.ok and isinstance(wrong.error, SystemExit)
+        assert len(site.drivers) == 1
+
+    @pytest.mark.orchestrator
+    def test_expired_session_logs_in_again(self, site):
+        """
+        case where the site expired the session between two fetches, the second logs in again first
+        :return:
+        """
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=2) as orchestra:
+                first = await orchestra.fetch('user@example.com', 'password', *MONTH)
+                site.drivers[0].expired = True
+                second = await orchestra.fetch('user@example.com', 'password', *MONTH)
+                return first, second
+
+        first, second = asyncio.run(run())
+
+        assert len(first) == len(second) == 2
+        assert site.drivers[0].logins == 2 and not site.drivers[0].expired
+
+    @pytest.mark.orchestrator
+    def test_consumer_stops_early(self, site):
+        """
+        case where the consumer takes the first result only,
+        the requests still running are cancelled
+        :return:
+        """
+        site.pages = 20
+
+        async def run():
+            async with orchestrator.Orchestrator(max_workers=4) as orchestra:
+                requests = self.requests(1, 1, password='wrong') + self.requests(2, 1)
+                results = orchestra.fetch_many(requests)
+                first = await anext(results)
+                await results.aclose()
+                await asyncio.sleep(2 * PAGE_SECONDS)
+                return first, site.pages_served
+
+        first, served = asyncio.run(run())
+
+        assert not first.ok
+        assert served < 2 * site.pages
+
+    @pytest.mark.orchestrator
+    @pytest.mark.usefixtures('site')
+    def test_export(self, tmp_path):
+        """
+        case where a fetched batch is written as csv from the event loop
+        :return:
+        """
+        path = tmp_path / 'transactions.csv'
+
+        async def run():
+            async with orchestrator.Orchestrator() as orchestra:
+                batch = await orchestra.fetch('user@example.com', 'password', *MONTH)
+                return await orchestra.export(batch, str(path))
+
+        totals = asyncio.run(run())
+        with open(path, encoding='utf-8-sig') as file:
+            rows = list(csv.reader(file))
+
+        assert str(totals['ILS']) == '-20.00'
+        assert [row[1] for row in rows[1:3]] == ['01/03/24', '02/03/24']
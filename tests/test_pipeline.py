@@ -0,0 +1,93 @@
+"""
+Module providing tests for the streaming pipeline from the scrape to the sinks.
+These tests do not require actual login
+"""
+import datetime
+import io
+
+import pytest
+
+import func
+import pipeline
+import store
+
+
+class TestPipeline:
+    """
+    Unittest class to test rows flow through the stages one at a time and reach pluggable sinks
+    """
+
+    pages = [[('01.03.24', 'ארומה', '1234', '₪14.00'), ('01.03.24', 'ארומה', '1234', '₪14.00')],
+             [('01.03.24', 'ארומה', '1234', '₪14.00'), ('02.03.24', 'AMAZON', 'כרטיס', '$12.00')]]
+
+    @pytest.mark.pipeline
+    def test_identical_rows_across_pages_are_kept(self):
+        """
+        case where three identical fares of one day are split by a page boundary, none of them is dropped
+        :return:
+        """
+        rows = list(pipeline.flatten(pipeline.normalize(self.pages, func.format_row)))
+
+        assert [row[0] for row in rows] == ['01/03/24', '01/03/24', '02/03/24', '01/03/24']
+        assert rows[2][1:] == ('AMAZON', '', '$12.00', rows[2][4], 'USD')
+
+    @pytest.mark.pipeline
+    def test_pages_are_sorted_like_the_whole_table(self, tmp_path):
+        """
+        case where a page comes oldest first, it is written in the order a whole table is written in
+        :return:
+        """
+        page = [('01.03.24', 'ארומה', '1234', '₪14.00'), ('15.03.24', 'AMAZON', 'כרטיס', '$12.00'),
+                ('02.03.24', 'שופרסל', '1234', '₪100.50')]
+        streamed, whole = tmp_path / 'streamed.csv', tmp_path / 'whole.csv'
+
+        pipeline.run([page], func.format_row, pipeline.csv_sink(str(streamed)))
+        pipeline.csv_sink(str(whole), sort=True)(func.format_row(row) for row in page)
+
+        assert streamed.read_text(encoding='utf-8-sig') == whole.read_text(encoding='utf-8-sig')
+        assert [row[0] for row in next(pipeline.normalize([page], func.format_row))] == [
+            '15/03/24', '02/03/24', '01/03/24']
+
+    @pytest.mark.pipeline
+    def test_first_row_reaches_the_sink_before_the_scrape_finishes(self):
+        """
+        case where the sink gets the first row while later pages were not fetched yet
+        :return:
+        """
+        fetched: list = []
+
+        def pages():
+            for index, page in enumerate(self.pages):
+                fetched.append(index)
+                yield page
+
+        def sink(rows):
+            first = next(rows)
+            seen_at_first_row = list(fetched)
+            return first, seen_at_first_row, sum(1 for _ in rows) + 1
+
+        first, seen_at_first_row, count = pipeline.run(pages(), func.format_row, sink)
+
+        assert first[0] == '01/03/24'
+        assert seen_at_first_row == [0]
+        assert count == 4
+
+    @pytest.mark.pipeline
+    def test_sqlite_and_stdout_sinks(self, tmp_path):
+        """
+        case where the same stages feed the sqlite store while echoing the rows
+        :return:
+        """
+        conn = store.connect(str(tmp_path / 'transactions.db'))
+        stream = io.StringIO()
+        try:
+            inserted = pipeline.run(self.pages, func.format_row,
+                                    pipeline.sqlite_sink(conn, 'user@example.com', datetime.date(2024, 3, 2)),
+                                    stream=stream)
+            stored = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+        finally:
+            conn.close()
+
+        assert inserted == stored == 4
+        assert stream.getvalue().splitlines()[2] == 'transaction 2: -12.00 at AMAZON on 02/03/24 with card  '
+        assert pipeline.stdout_sink(io.StringIO())(pipeline.flatten(pipeline.normalize(self.pages, func.format_row))) == 4
@@ -0,0 +1,127 @@
+"""
+Module providing tests for the month chunk planner and the parallel tab fetching.
+These tests do not require actual login
+"""
+import datetime
+from dataclasses import dataclass
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+import planner
+
+
+@dataclass
+class FakeTab:
+    """a tab of the fake driver, the page it navigated to renders after polls checks"""
+    url: str
+    polls: int
+
+
+class FakeSwitchTo:
+    """switch_to of the fake driver"""
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    def new_window(self, _kind: str) -> None:
+        """opens a new tab and focuses it"""
+        handle = f'tab-{len(self.driver.tabs)}'
+        self.driver.tabs[handle] = None
+        self.driver.current_window_handle = handle
+
+    def window(self, handle: str) -> None:
+        """focuses a tab"""
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    """
+    A browser whose tabs take load_polls checks to render the page they navigated to.
+    Tracks how many pages were loading at the same time.
+    """
+
+    def __init__(self, load_polls: int = 2):
+        self.load_polls = load_polls
+        self.tabs: dict[str, FakeTab | None] = {'tab-0': None}
+        self.current_window_handle = 'tab-0'
+        self.switch_to = FakeSwitchTo(self)
+        self.closed = []
+        self.max_loading = 0
+
+    def execute_script(self, script: str, *script_args):
+        """answers the navigation, freshness and readiness scripts"""
+        tab: FakeTab | None = self.tabs[self.current_window_handle]
+        if 'location.href' in script:
+            self.tabs[self.current_window_handle] = FakeTab(script_args[0], self.load_polls)
+            loading = sum(1 for other in self.tabs.values() if other and other.polls > 0)
+            self.max_loading = max(self.max_loading, loading)
+            return None
+        if '__maxStale' in script and tab is not None:
+            tab.polls -= 1
+            return tab.polls <= 0
+        return 'loading'
+
+    def find_element(self, _by: str, xpath: str):
+        """the table is rendered once the tab finished loading"""
+        tab: FakeTab | None = self.tabs[self.current_window_handle]
+        if tab is None or tab.polls > 0:
+            raise NoSuchElementException(xpath)
+        return self
+
+    @staticmethod
+    def is_displayed() -> bool:
+        """found elements are displayed"""
+        return True
+
+    def close(self) -> None:
+        """closes the current tab"""
+        self.closed.append(self.current_window_handle)
+
+
+class TestPlanner:
+    """
+    Unittest class to test long windows are split into months and fetched concurrently
+    """
+
+    @pytest.mark.planner
+    def test_month_chunks_partial_edges(self):
+        """
+        case where the window starts and ends in the middle of a month and crosses a year
+        :return:
+        """
+        chunks = planner.month_chunks(datetime.date(2023, 11, 15), datetime.date(2024, 2, 10))
+
+        assert chunks == [(datetime.date(2023, 11, 15), datetime.date(2023, 11, 30)),
+                          (datetime.date(2023, 12, 1), datetime.date(2023, 12, 31)),
+                          (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31)),
+                          (datetime.date(2024, 2, 1), datetime.date(2024, 2, 10))]
+
+    @pytest.mark.planner
+    def test_month_chunks_single_day(self):
+        """
+        case where the window is a single day
+        :return:
+        """
+        day = datetime.date(2024, 2, 29)
+
+        assert planner.month_chunks(day, day) == [(day, day)]
+
+    @pytest.mark.planner
+    def test_fetch_in_tabs_keeps_order(self):
+        """
+        case where chunks load in parallel tabs, results come back in chunk order
+        :return:
+        """
+        driver = FakeDriver()
+        urls = [f'https://example.com/chunk/{i}' for i in range(7)]
+
+        def scrape(drv: FakeDriver) -> list:
+            return [drv.tabs[drv.current_window_handle].url]
+
+        results = planner.fetch_in_tabs(driver, urls, scrape, concurrency=3)
+
+        assert results == [[url] for url in urls]
+        assert driver.max_loading == 3
+        assert driver.closed == ['tab-1', 'tab-2']
+        assert driver.current_window_handle == 'tab-0'
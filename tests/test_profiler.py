@@ -0,0 +1,91 @@
+"""
+Module providing tests for the phase by phase profiler.
+These tests do not require actual login
+"""
+import time
+import tracemalloc
+
+import pytest
+
+import profiler
+import spans
+
+
+def spike(size: int) -> int:
+    """allocates a short lived block of strings and frees it before returning"""
+    block = [str(i) * 4 for i in range(size)]
+    time.sleep(0.05)            # long enough for the sampler to notice the peak
+    count = len(block)
+    del block
+    return count
+
+
+def convert(size: int) -> int:
+    """allocates a short lived block of tuples and frees it before returning"""
+    block = [(i, float(i)) for i in range(size)]
+    time.sleep(0.05)
+    count = len(block)
+    del block
+    return count
+
+
+def slow_phase() -> None:
+    """burns the cpu for a while"""
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestProfiler:
+    """
+    Unittest class to test samples and allocations are attributed to the phase they happened in
+    """
+
+    @pytest.mark.profiler
+    def test_profile_attributes_phases(self, tmp_path):
+        """
+        case where memory spikes freed within nested phases and a busy phase all show up
+        under the innermost phase they happened in, not under the phase around them
+        :return:
+        """
+        with profiler.profile(str(tmp_path), interval=0.002) as running:
+            with spans.span('pipeline'):
+                with spans.span('parse'):
+                    spike(200_000)
+                with spans.span('format'):
+                    convert(200_000)
+                    with spans.span('wait rows'):
+                        slow_phase()
+
+        report = (tmp_path / 'allocations.txt').read_text(encoding='utf-8')
+        collapsed = (tmp_path / 'cpu.collapsed').read_text(encoding='utf-8').splitlines()
+        parse = running.allocations['pipeline;parse']
+        formatting = running.allocations['pipeline;format']
+
+        assert list(running.allocations) == ['pipeline', 'pipeline;parse', 'pipeline;format',
+                                             'pipeline;format;wait rows']
+        assert parse['peak'] > 5 * 2 ** 20 and parse['kept'] < parse['peak'] / 10
+        assert (parse['lines'].most_common(1)[0][0]
+                == f'{__file__}:{spike.__code__.co_firstlineno + 2}')
+        assert (formatting['lines'].most_common(1)[0][0]
+                == f'{__file__}:{convert.__code__.co_firstlineno + 2}')
+        assert running.allocations['pipeline']['peak'] < parse['peak'] / 10
+        assert report.startswith('pipeline: peak ')
+        assert any(line.startswith('pipeline;format;wait rows;')
+                   and 'test_profiler.py:slow_phase' in line for line in collapsed)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in collapsed)
+
+    @pytest.mark.profiler
+    def test_profile_cleans_up(self, tmp_path):
+        """
+        case where the run failed, the profile is still written and nothing keeps tracing afterwards
+        :return:
+        """
+        with pytest.raises(SystemExit):
+            with profiler.profile(str(tmp_path)):
+                with spans.span('login'):
+                    raise SystemExit('wrong credentials')
+
+        assert (tmp_path / 'cpu.collapsed').exists() and (tmp_path / 'allocations.txt').exists()
+        assert not tracemalloc.is_tracing()
+        assert not spans.enabled()
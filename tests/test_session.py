@@ -0,0 +1,133 @@
+"""
+Module providing tests for the persisted login session.
+These tests do not require actual login
+"""
+import os
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+import session
+
+
+class FakeDriver:
+    """
+    A driver holding cookies and local storage like a browser tab on max.co.il.
+    logged_in decides where the site sends the transactions page.
+    """
+
+    def __init__(self, cookies: list | None = None, local_storage: dict | None = None, logged_in: bool = True):
+        self.cookies = cookies or []
+        self.local_storage = local_storage or {}
+        self.logged_in = logged_in
+        self.current_url = 'https://www.max.co.il/'
+
+    def get_cookies(self) -> list:
+        """the cookies of the current domain"""
+        return self.cookies
+
+    def add_cookie(self, cookie: dict) -> None:
+        """sets a cookie on the current domain"""
+        self.cookies.append(cookie)
+
+    def get(self, url: str) -> None:
+        """navigates, the site redirects logged out users to the homepage"""
+        self.current_url = url if self.logged_in else 'https://www.max.co.il/homepage/welcome'
+
+    @staticmethod
+    def find_element(_by: str, xpath: str):
+        """nothing is rendered on the page"""
+        raise NoSuchElementException(xpath)
+
+    def execute_script(self, script: str, *script_args):
+        """answers the local storage and readiness scripts"""
+        if 'Object.assign' in script:
+            return dict(self.local_storage)
+        if 'setItem' in script:
+            self.local_storage.update(script_args[0])
+            return None
+        if 'readyState' in script:
+            return 'complete'
+        return 5000
+
+
+class TestSession:
+    """
+    Unittest class to test saving and restoring the encrypted login session
+    """
+
+    email = 'user@example.com'
+    password = 'secret-password'
+
+    @pytest.fixture(autouse=True)
+    def session_dir(self, tmp_path, monkeypatch):
+        """
+        a fixture keeping the sessions of the tests in a temporary directory
+        :return:
+        """
+        monkeypatch.setattr(session, 'SESSION_DIR', str(tmp_path))
+        monkeypatch.setattr(session, 'KDF_ITERATIONS', 1000)
+        yield tmp_path
+
+    def save(self) -> None:
+        """saves a logged in session"""
+        driver = FakeDriver(cookies=[{'name': 'auth', 'value': 'token'}], local_storage={'user': 'abc'})
+        session.save_session(driver, self.email, self.password)
+
+    @pytest.mark.session
+    def test_session_file_is_encrypted(self):
+        """
+        case where the session is saved, nothing sensitive is readable on disk
+        :return:
+        """
+        self.save()
+
+        with open(session.session_path(self.email), 'rb') as file:
+            content = file.read()
+
+        assert b'token' not in content
+        assert self.email.encode() not in content
+        assert oct(os.stat(session.session_path(self.email)).st_mode & 0o777) == '0o600'
+
+    @pytest.mark.session
+    def test_restore_session(self):
+        """
+        case where a saved session is still alive, the driver gets its cookies and local storage
+        :return:
+        """
+        self.save()
+        driver = FakeDriver()
+
+        assert session.restore_session(driver, self.email, self.password)
+        assert driver.cookies == [{'name': 'auth', 'value': 'token'}]
+        assert driver.local_storage == {'user': 'abc'}
+
+    @pytest.mark.session
+    def test_restore_without_session(self):
+        """
+        case where no session was saved yet
+        :return:
+        """
+        assert not session.restore_session(FakeDriver(), self.email, self.password)
+
+    @pytest.mark.session
+    def test_restore_wrong_password(self):
+        """
+        case where the session cannot be decrypted, it is discarded
+        :return:
+        """
+        self.save()
+
+        assert not session.restore_session(FakeDriver(), self.email, 'other-password')
+        assert not os.path.exists(session.session_path(self.email))
+
+    @pytest.mark.session
+    def test_restore_expired_session(self):
+        """
+        case where the site does not accept the session anymore, login is needed
+        :return:
+        """
+        self.save()
+
+        assert not session.restore_session(FakeDriver(logged_in=False), self.email, self.password)
+        assert not os.path.exists(session.session_path(self.email))
@@ -0,0 +1,130 @@
+"""
+Module providing tests for the per phase timing spans and their exports.
+These tests do not require actual login
+"""
+import json
+import os
+
+import pytest
+
+import func
+import pipeline
+import spans
+
+
+class FakeDriver:                # pylint: disable=too-few-public-methods
+    """A driver answering every WebDriver command"""
+
+    def __init__(self):
+        self.sent = 0
+
+    def execute(self, command: str, params: dict | None = None) -> dict:
+        """one WebDriver round trip"""
+        self.sent += 1
+        return {'value': (command, params)}
+
+
+class TestSpans:
+    """
+    Unittest class to test phases are timed only when asked to,
+    and written as a trace and as metrics
+    """
+
+    @pytest.fixture()
+    def recording(self):
+        """
+        a fixture recording spans for the test only
+        :return:
+        """
+        spans.enable()
+        yield
+        spans.disable()
+
+    @pytest.mark.spans
+    def test_disabled_spans_cost_nothing(self):
+        """
+        case where nothing is recorded, the same do nothing span is handed out
+        and the rows pass untouched
+        :return:
+        """
+        rows = iter([1, 2, 3])
+        driver = FakeDriver()
+        execute = driver.execute
+
+        with spans.span('login') as span:
+            counted = span.count(rows)
+
+        assert span is spans.span('quit')
+        assert counted is rows
+        assert spans.instrument(driver).execute == execute
+        assert not spans.enabled()
+
+    @pytest.mark.spans
+    @pytest.mark.usefixtures('recording')
+    def test_spans_record_rows_and_commands(self):
+        """
+        case where the spans of a run hold their rows and the WebDriver commands sent within them
+        :return:
+        """
+        driver = spans.instrument(FakeDriver())
+        pages = [[('01.03.24', 'ארומה', '1234', '₪14.00')], [('02.03.24', 'AMAZON', '', '$12.00')]]
+
+        with spans.span('login'):
+            driver.execute('get')
+            with spans.span('wait logged_in'):
+                driver.execute('executeScript')
+                driver.execute('executeScript')
+        pipeline.run(pages, func.format_row, list)
+
+        recorded = {one.name: one for one in spans.recorded()}
+
+        assert [one.name for one in spans.recorded()] == ['wait logged_in', 'login',
+                                                          'format page', 'format page', 'pipeline']
+        assert recorded['login'].commands == 3 and recorded['wait logged_in'].commands == 2
+        assert recorded['pipeline'].rows == 2
+        assert recorded['login'].duration >= recorded['wait logged_in'].duration
+        assert driver.sent == 3
+
+    @pytest.mark.spans
+    @pytest.mark.usefixtures('recording')
+    def test_write_trace(self, tmp_path):
+        """
+        case where the spans are written as trace events, in the order they started
+        :return:
+        """
+        with spans.span('login'):
+            with spans.span('wait logged_in'):
+                pass
+        path = tmp_path / 'trace.json'
+
+        spans.write_trace(str(path))
+        events = json.loads(path.read_text(encoding='utf-8'))['traceEvents']
+
+        assert [event['name'] for event in events] == ['login', 'wait logged_in']
+        assert {event['ph'] for event in events} == {'X'}
+        assert events[0]['ts'] <= events[1]['ts'] and events[0]['dur'] >= events[1]['dur']
+        assert events[0]['args'] == {'rows': None, 'webdriver_commands': 0}
+
+    @pytest.mark.spans
+    @pytest.mark.usefixtures('recording')
+    def test_write_prometheus(self, tmp_path):
+        """
+        case where phases that ran more than once are summed up into one sample each
+        :return:
+        """
+        for rows in (10, 5):
+            with spans.span('http month', rows=rows):
+                pass
+        with spans.span('wait rows or "idle"'):
+            pass
+        path = tmp_path / 'max_transactions.prom'
+
+        spans.write_prometheus(str(path))
+        text = path.read_text(encoding='utf-8')
+
+        assert 'max_transactions_phase_rows{phase="http month"} 15\n' in text
+        assert 'max_transactions_phase_calls{phase="http month"} 2\n' in text
+        assert 'max_transactions_phase_calls{phase="wait rows or \\"idle\\""} 1\n' in text
+        assert '# TYPE max_transactions_phase_duration_seconds gauge\n' in text
+        assert 'max_transactions_last_run_timestamp_seconds ' in text
+        assert os.listdir(tmp_path) == ['max_transactions.prom']
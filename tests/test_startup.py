@@ -0,0 +1,118 @@
+"""
+Module providing tests for a side-effect-free, lazily importing startup.
+These tests do not require actual login
+"""
+import subprocess
+import sys
+
+import pytest
+
+import argum
+
+
+class TestStartup:
+    """
+    Unittest class to test the arguments are parsed only when asked
+    and that validation does not pay for the heavy imports
+    """
+
+    heavy_modules = ('selenium', 'pandas', 'lxml', 'cryptography', 'webdriver_manager', 'loguru')
+    import_budget_us = 100_000
+
+    @staticmethod
+    def imported_modules(importtime_output: str) -> dict:
+        """
+        reads the -X importtime report
+        :return: module name -> cumulative import time in microseconds
+        """
+        modules = {}
+        for line in importtime_output.splitlines():
+            fields = line.split('|')
+            if line.startswith('import time:') and len(fields) == 3 and fields[1].strip().isdigit():
+                modules[fields[2].strip()] = int(fields[1])
+        return modules
+
+    @staticmethod
+    def run_python(*python_args) -> subprocess.CompletedProcess:
+        """
+        runs a python subprocess from the main directory
+        :return:
+        """
+        return subprocess.run([sys.executable, *python_args],
+                              capture_output=True, text=True, check=False)
+
+    @pytest.mark.startup
+    def test_import_parses_nothing(self):
+        """
+        case where the modules are imported by another program, its argv is left alone
+        :return:
+        """
+        result = self.run_python('-c', 'import main, argum; print("imported")', '--not-our-flag')
+
+        assert result.returncode == 0
+        assert 'imported' in result.stdout
+
+    @pytest.mark.startup
+    def test_main_import_skips_heavy_modules(self):
+        """
+        case where main is imported, none of the heavy modules is loaded yet
+        :return:
+        """
+        modules = ', '.join(repr(m) for m in self.heavy_modules)
+        result = self.run_python('-c', f'import sys, main; print([m for m in ({modules}) if m in sys.modules])')
+
+        assert result.stdout.strip() == '[]'
+
+    @pytest.mark.startup
+    def test_main_import_time_budget(self):
+        """
+        case where main and argum are imported within the import time budget
+        :return:
+        """
+        result = self.run_python('-X', 'importtime', '-c', 'import main')
+
+        assert self.imported_modules(result.stderr)['main'] < self.import_budget_us
+
+    @pytest.mark.startup
+    @pytest.mark.parametrize('module, budgeted', [('func', True), ('api', True), ('orchestrator', False)])
+    def test_library_import_skips_the_browser_modules(self, module, budgeted):
+        """
+        case where the library modules are imported, the browser, parsing, crypto and http modules are not loaded
+        until a function needs them, and the import fits the budget leaving out the logger every module shares.
+        the orchestrator is built on asyncio, which is not budgeted
+        :return:
+        """
+        browser_modules = ('selenium', 'lxml', 'cryptography', 'requests', 'webdriver_manager')
+        result = self.run_python('-X', 'importtime', '-c', f'import {module}')
+        modules = self.imported_modules(result.stderr)
+
+        assert not {name.split('.')[0] for name in modules}.intersection(browser_modules)
+        if budgeted:
+            assert modules[module] - modules.get('loguru', 0) < self.import_budget_us
+
+    @pytest.mark.startup
+    def test_validation_error_before_heavy_imports(self):
+        """
+        case where an invalid date exits before anything heavy is imported
+        :return:
+        """
+        result = self.run_python('-X', 'importtime', 'main.py', '-r', 'range',
+                                 '-e', 'test@example.com', '-p', '165121545', '-sd', '31/7/2024', '-ed', '2024')
+
+        imported = {name.split('.')[0] for name in self.imported_modules(result.stderr)}
+
+        assert 'date format needs' in result.stderr
+        assert 'argum' in imported
+        assert not imported.intersection(self.heavy_modules)
+
+    @pytest.mark.startup
+    def test_get_cli_arguments_from_argv(self):
+        """
+        case where the arguments are parsed from a given argv
+        :return:
+        """
+        creds = argum.get_cli_arguments(['-r', 'ytd', '-e', 'test@example.com', '-p', '165121545', '-nh'])
+
+        assert creds['request'] == 'ytd'
+        assert creds['headless_mode']
+        assert creds['engine'] == 'script'
@@ -0,0 +1,82 @@
+"""
+Module providing tests for the local SQLite transaction store and the incremental sync.
+These tests do not require actual login
+"""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+import store
+
+
+class TestStore:
+    """
+    Unittest class to test syncing overlapping windows keeps every transaction exactly once
+    """
+
+    account = 'user@example.com'
+    today = datetime.date(2024, 3, 20)
+
+    data = {'dates': ['01/03/24', '01/03/24', '02/03/24'],
+            'places': ['ארומה', 'ארומה', 'שופרסל'],
+            'cards': ['1234', '1234', '1234'],
+            'amounts': [Decimal('-14.00'), Decimal('-14.00'), Decimal('-250.30')],
+            'currency': ['ILS', 'ILS', 'ILS']}
+
+    @pytest.fixture()
+    def conn(self, tmp_path):
+        """
+        a fixture of an empty store
+        :return:
+        """
+        conn = store.connect(str(tmp_path / 'transactions.db'))
+        yield conn
+        conn.close()
+
+    @pytest.mark.store
+    def test_first_sync_window(self, conn):
+        """
+        case where the account was never synced, the whole first window is fetched
+        :return:
+        """
+        start = datetime.date(2024, 1, 1)
+
+        assert store.sync_window(conn, self.account, start, self.today) == (start, self.today)
+
+    @pytest.mark.store
+    def test_next_sync_window_overlaps_watermark(self, conn):
+        """
+        case where the account was synced before, only the days since the watermark are fetched
+        :return:
+        """
+        store.upsert(conn, self.account, self.data, datetime.date(2024, 3, 2))
+        start, end = store.sync_window(conn, self.account, datetime.date(2024, 1, 1), self.today)
+
+        assert start == datetime.date(2024, 3, 2) - datetime.timedelta(days=store.OVERLAP_DAYS)
+        assert end == self.today
+
+    @pytest.mark.store
+    def test_upsert_keeps_identical_transactions_once(self, conn):
+        """
+        case where two identical coffees were bought the same day and the window is synced twice
+        :return:
+        """
+        assert store.upsert(conn, self.account, self.data, datetime.date(2024, 3, 2)) == 3
+        assert store.upsert(conn, self.account, self.data, datetime.date(2024, 3, 2)) == 0
+
+        rows = conn.execute('SELECT date, place, amount, seq FROM transactions ORDER BY date, seq').fetchall()
+        assert rows == [('2024-03-01', 'ארומה', '-14.00', 0),
+                        ('2024-03-01', 'ארומה', '-14.00', 1),
+                        ('2024-03-02', 'שופרסל', '-250.30', 0)]
+
+    @pytest.mark.store
+    def test_upsert_accounts_are_separate(self, conn):
+        """
+        case where two accounts share the store
+        :return:
+        """
+        store.upsert(conn, self.account, self.data, datetime.date(2024, 3, 2))
+
+        assert store.upsert(conn, 'other@example.com', self.data, datetime.date(2024, 3, 2)) == 3
+        assert store.watermark(conn, 'other@example.com') == datetime.date(2024, 3, 2)
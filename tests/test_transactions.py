@@ -0,0 +1,65 @@
+"""
+Module providing tests for the compact transaction record and the columnar batch.
+These tests do not require actual login
+"""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+import daemon
+from transactions import Transaction, TransactionBatch
+
+
+class TestTransactions:
+    """
+    Unittest class to test transactions keep their values in compact form and read back the same
+    """
+
+    rows = [('01.02.24', 'שופרסל', '1234', '₪1,100.50'),
+            ('15.03.24', 'AMAZON', 'כרטיס', '$12.00'),
+            ('02.02.24', 'שופרסל', '1234', '₪14.00 זיכוי')]
+
+    @pytest.mark.transactions
+    def test_transaction_from_row(self):
+        """
+        case where a scraped row becomes a slotted record of ints and interned strings
+        :return:
+        """
+        transaction = Transaction.from_row(self.rows[0])
+
+        assert transaction.day == datetime.date(2024, 2, 1)
+        assert transaction.amount == -110050
+        assert transaction.currency == 'ILS'
+        assert not hasattr(transaction, '__dict__')
+        assert transaction.as_row() == ('01/02/24', 'שופרסל', '1234', '₪1,100.50', Decimal('-1100.50'), 'ILS')
+
+    @pytest.mark.transactions
+    def test_batch_columns(self):
+        """
+        case where the batch keeps every column aligned, the card that is not a number included
+        :return:
+        """
+        batch = TransactionBatch.from_rows(self.rows)
+
+        assert len(batch) == 3
+        assert batch[1] == Transaction(datetime.date(2024, 3, 15).toordinal(), 'AMAZON', '', -1200, 'USD', '$12.00')
+        assert batch.places.tolist() == [0, 1, 0]
+        assert batch.totals() == {'ILS': -108650, 'USD': -1200}
+        assert [row[3] for row in batch.rows()] == ['₪1,100.50', '$12.00', '₪14.00 זיכוי']
+        assert batch.amounts_raw.tolist() == [0, 0, 1]
+
+    @pytest.mark.transactions
+    def test_batch_between_and_data(self):
+        """
+        case where a window is taken out of the batch and handed on as a data dictionary
+        :return:
+        """
+        batch = TransactionBatch.from_rows(self.rows).between(datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))
+        data = batch.to_data()
+
+        assert data['dates'] == ['01/02/24', '02/02/24']
+        assert data['amounts'] == [Decimal('-1100.50'), Decimal('14.00')]
+        assert list(daemon.data_rows(batch))[1] == {'date': '02/02/24', 'place': 'שופרסל', 'card': '1234',
+                                                    'amount': '14.00', 'currency': 'ILS'}
+        assert TransactionBatch().to_data()['dates'] == []
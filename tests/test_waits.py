@@ -0,0 +1,202 @@
+"""
+Module providing tests for the readiness waits.
+These tests do not require actual login
+"""
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+
+import func
+import locators as loc
+import waits
+
+
+TRANSACTIONS_URL: str = 'https://www.max.co.il/transaction-details/personal'
+
+
+class FakeDriver:
+    """
+    A driver whose page state is set by the test.
+    visible holds the xpaths currently rendered on the page.
+    """
+
+    def __init__(self, current_url: str = 'https://www.max.co.il/', visible: tuple = (),
+                 ready_state: str = 'complete', quiet_ms: int = 0, rows: int = 0):
+        self.current_url = current_url
+        self.visible = visible
+        self.ready_state = ready_state
+        self.quiet_ms = quiet_ms
+        self.rows = rows
+
+    def find_element(self, _by: str, xpath: str):
+        """returns a displayed element when the xpath is rendered"""
+        if xpath not in self.visible:
+            raise NoSuchElementException(xpath)
+        return self
+
+    @staticmethod
+    def is_displayed() -> bool:
+        """every found element is displayed"""
+        return True
+
+    def execute_script(self, script: str, *_) -> str | int:
+        """answers the readiness scripts"""
+        if 'readyState' in script:
+            return self.ready_state
+        if 'count(' in script:
+            return self.rows
+        return self.quiet_ms
+
+
+class TestWaits:
+    """
+    Unittest class to test the waits return on the first signal instead of a fixed time
+    """
+
+    @pytest.mark.waits
+    def test_first_of_returns_first_met_condition(self):
+        """
+        case where the second condition is met, its name is returned
+        :return:
+        """
+        result = waits.first_of(FakeDriver(), 1, never=lambda _: False, always=lambda _: True)
+
+        assert result == 'always'
+
+    @pytest.mark.waits
+    def test_first_of_timeout(self):
+        """
+        case where no condition is met in time
+        :return:
+        """
+        start = time.perf_counter()
+        result = waits.first_of(FakeDriver(), 0.3, never=lambda _: False)
+
+        assert result is None
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.waits
+    def test_login_outcome_error_box(self):
+        """
+        case where the site shows the login error box
+        :return:
+        """
+        driver = FakeDriver(visible=('//*[contains(@class, "error-msg bio-error")]',))
+
+        assert waits.login_outcome(driver, 1) == 'login_error'
+
+    @pytest.mark.waits
+    def test_login_outcome_personal_area(self):
+        """
+        case where the site moved to the personal area, no waiting for the absent error box
+        :return:
+        """
+        driver = FakeDriver(current_url='https://www.max.co.il/homepage/personal')
+        start = time.perf_counter()
+
+        assert waits.login_outcome(driver, 5) == 'logged_in'
+        assert time.perf_counter() - start < 1
+
+    @pytest.mark.waits
+    def test_login_outcome_form_still_showing(self):
+        """
+        case where the login form sits on the transactions page,
+        the personal area url alone is no login
+        :return:
+        """
+        driver = FakeDriver(current_url=TRANSACTIONS_URL, visible=('//input[@id="user-name"]',))
+
+        assert waits.login_outcome(driver, 0.3) is None
+
+        driver.visible = ()
+        assert waits.login_outcome(driver, 1) == 'logged_in'
+
+    @pytest.mark.waits
+    def test_login_form_still_showing_is_no_login(self, monkeypatch):
+        """
+        case where the login resolved to nothing and the form is still there,
+        it must not pass for logged in
+        :return:
+        """
+        driver = FakeDriver(current_url=TRANSACTIONS_URL, visible=('//input[@id="user-name"]',))
+        monkeypatch.setattr(waits, 'login_outcome', lambda *_: None)
+
+        with pytest.raises(TimeoutException):
+            func.validate_max_login(driver)
+
+    @pytest.mark.waits
+    def test_table_ready_rows(self):
+        """
+        case where the transactions table rendered
+        :return:
+        """
+        driver = FakeDriver(visible=('//*[@class="row body"]',))
+
+        assert waits.table_ready(driver, 1) == 'rows'
+
+    @pytest.mark.waits
+    def test_table_ready_idle_without_rows(self):
+        """
+        case where the page has no transactions and the network went quiet
+        :return:
+        """
+        driver = FakeDriver(current_url=TRANSACTIONS_URL, quiet_ms=5000)
+
+        assert waits.table_ready(driver, 1) == 'idle'
+
+    @pytest.mark.waits
+    @pytest.mark.parametrize('current_url, visible',
+                             [('https://www.max.co.il/', ()),
+                              (TRANSACTIONS_URL, ('//input[@id="user-name"]',))])
+    def test_table_ready_expired_session_raises(self, current_url, visible):
+        """
+        case where the session expired, the quiet page is sent away or shows the login form,
+        it is no empty table
+        :return:
+        """
+        driver = FakeDriver(current_url=current_url, visible=visible, quiet_ms=5000)
+
+        with pytest.raises(TimeoutException, match='session expired'):
+            waits.table_ready(driver, 1)
+
+    @pytest.mark.waits
+    def test_table_ready_timeout_raises(self):
+        """
+        case where the page neither rendered a row nor went quiet, it must not pass for an empty table
+        :return:
+        """
+        driver = FakeDriver(ready_state='loading')
+
+        with pytest.raises(TimeoutException):
+            waits.table_ready(driver, 0.3)
+
+    @pytest.mark.waits
+    def test_more_rows_timeout_raises(self):
+        """
+        case where a load more neither added rows nor settled, the table must not pass for complete
+        :return:
+        """
+        driver = FakeDriver()
+
+        with pytest.raises(TimeoutException):
+            waits.more_rows(driver, 10, 0.3)
+
+    @pytest.mark.waits
+    def test_more_rows_waits_while_load_more_shows(self):
+        """
+        case where the page went quiet but the load more button is still there, a slow load more
+        must not pass for the end of the table
+        :return:
+        """
+        load_more: str = loc.max_loc['transactions_load_more'][1]
+        driver = FakeDriver(visible=(load_more,), quiet_ms=5000, rows=10)
+
+        with pytest.raises(TimeoutException):
+            waits.more_rows(driver, 10, 0.3)
+
+        driver.rows = 20
+        assert waits.more_rows(driver, 10, 1) == 'grew'
+
+        driver.rows, driver.visible = 10, ()
+        assert waits.more_rows(driver, 10, 1) == 'settled'
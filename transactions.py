@@ -0,0 +1,218 @@
+"""
+Module responsible for the compact in-memory representation of transactions.
+A Transaction is one slotted record of small ints and interned strings,
+a TransactionBatch holds many of them column by column in typed arrays,
+with places, cards, currencies and raw amounts stored once each and referenced by index.
+A raw amount shown the way the site shows nearly all of them is not stored,
+it is rendered back the same.
+"""
+import datetime
+import sys
+from array import array
+from dataclasses import dataclass
+
+import normalize
+
+
+# the symbols the site puts in front of an amount, see site_amount
+SYMBOLS: dict = {'ILS': '₪', 'USD': '$', 'EUR': '€', 'GBP': '£'}
+
+# the distinct strings tables of a batch, column -> (string -> code, strings by code)
+_EMPTY_TABLES: dict = {'places': ({}, []), 'cards': ({}, []), 'currencies': ({}, []),
+                       'amounts_raw': ({}, [])}
+
+
+@dataclass(frozen=True, slots=True)
+class Transaction:
+    """
+    One transaction
+    date: the purchase day as a proleptic Gregorian ordinal, see datetime.date.toordinal
+    amount: minor units (agorot, cents), purchases negative and refunds positive
+    amount_raw: the amount as the site shows it, written as is under the amounts_raw column
+    """
+    date: int
+    place: str
+    card: str
+    amount: int
+    currency: str
+    amount_raw: str = ''
+
+    @classmethod
+    def from_row(cls, row: tuple) -> 'Transaction':
+        """
+        Builds a transaction from a scraped row
+        :param row: a (date 'dd.mm.yy', place, card, raw amount) row of the extract module
+        :return:
+        """
+        date, place, card, amount_raw = row
+        amount, currency = normalize.parse_amount(amount_raw)
+        return cls(parse_date(date), sys.intern(place), sys.intern(card if card.isdigit() else ''),
+                   amount, currency, sys.intern(amount_raw))
+
+    @property
+    def day(self) -> datetime.date:
+        """the purchase day"""
+        return datetime.date.fromordinal(self.date)
+
+    def as_row(self) -> tuple:
+        """The formatted (date, place, card, raw amount, amount, currency) row the sinks write"""
+        return format_row(self.date, self.place, self.card, self.amount, self.currency,
+                          self.amount_raw)
+
+
+def parse_date(date: str) -> int:
+    """The ordinal of a 'dd.mm.yy' date, without going through strptime"""
+    day, month, year = date.split('.')
+    return datetime.date(2000 + int(year), int(month), int(day)).toordinal()
+
+
+def site_amount(amount: int, currency: str) -> str:
+    """
+    The amount the way the site shows nearly all of them,
+    e.g. '₪1,100.50' for a purchase and '-₪14.00' for a credit
+    :return: the raw amount, empty for a currency without a symbol
+    """
+    symbol: str | None = SYMBOLS.get(currency)
+    if symbol is None:
+        return ''
+    return f"{'-' if amount > 0 else ''}{symbol}{abs(normalize.to_decimal(amount)):,}"
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def format_row(date: int, place: str, card: str, amount: int, currency: str,
+               amount_raw: str) -> tuple:
+    """
+    The formatted row of a transaction
+    :return: (date 'dd/mm/yy', place, card, raw amount, amount, currency) row
+    """
+    return (f'{datetime.date.fromordinal(date):%d/%m/%y}', place, card, amount_raw,
+            normalize.to_decimal(amount), currency)
+
+
+class TransactionBatch:
+    """
+    Many transactions stored column by column.
+    Dates and amounts are typed arrays, places, cards, currencies and raw amounts are indexes
+    into tables of distinct strings, so a row costs a few bytes plus its share of those strings.
+    """
+    __slots__ = ('dates', 'amounts', 'places', 'cards', 'currencies', 'amounts_raw', '_tables')
+
+    def __init__(self, tables: dict | None = None):
+        """
+        :param tables: the distinct strings tables of another batch, copied so the codes
+                       of its columns mean the same in this one, empty tables by default
+        """
+        self.dates: array = array('i')
+        self.amounts: array = array('q')
+        self.places: array = array('I')
+        self.cards: array = array('I')
+        self.currencies: array = array('B')       # a handful of currencies ever show up
+        self.amounts_raw: array = array('I')
+        self._tables: dict = {column: (dict(index), list(values))
+                              for column, (index, values) in (tables or _EMPTY_TABLES).items()}
+
+    @classmethod
+    def from_rows(cls, rows) -> 'TransactionBatch':
+        """
+        Builds a batch from scraped rows
+        :param rows: iterable of (date 'dd.mm.yy', place, card, raw amount) rows
+        :return:
+        """
+        batch = cls()
+        batch.extend_rows(rows)
+        return batch
+
+    def _code(self, column: str, value: str) -> int:
+        """The index of a value in the distinct strings table of a column, adding it when new"""
+        index, values = self._tables[column]
+        code: int | None = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(sys.intern(value))
+        return code
+
+    def _raw_code(self, amount: int, currency: str, amount_raw: str) -> int:
+        """The index of a raw amount, only the ones site_amount does not render back are kept"""
+        rendered: bool = amount_raw == site_amount(amount, currency)
+        return self._code('amounts_raw', '' if rendered else amount_raw)
+
+    def _raw(self, i: int) -> str:
+        """The raw amount of the i-th transaction"""
+        return (self._tables['amounts_raw'][1][self.amounts_raw[i]]
+                or site_amount(self.amounts[i], self._tables['currencies'][1][self.currencies[i]]))
+
+    def append(self, transaction: Transaction) -> None:
+        """Adds one transaction"""
+        self.dates.append(transaction.date)
+        self.amounts.append(transaction.amount)
+        self.places.append(self._code('places', transaction.place))
+        self.cards.append(self._code('cards', transaction.card))
+        self.currencies.append(self._code('currencies', transaction.currency))
+        self.amounts_raw.append(self._raw_code(transaction.amount, transaction.currency,
+                                               transaction.amount_raw))
+
+    def extend_rows(self, rows) -> None:
+        """
+        Adds scraped rows, the raw amounts are normalized as they come
+        :param rows: iterable of (date 'dd.mm.yy', place, card, raw amount) rows
+        :return:
+        """
+        for date, place, card, amount_raw in rows:
+            amount, currency = normalize.parse_amount(amount_raw)
+            self.dates.append(parse_date(date))
+            self.amounts.append(amount)
+            self.places.append(self._code('places', place))
+            self.cards.append(self._code('cards', card if card.isdigit() else ''))
+            self.currencies.append(self._code('currencies', currency))
+            self.amounts_raw.append(self._raw_code(amount, currency, amount_raw))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __getitem__(self, i: int) -> Transaction:
+        return Transaction(self.dates[i], self._tables['places'][1][self.places[i]],
+                           self._tables['cards'][1][self.cards[i]], self.amounts[i],
+                           self._tables['currencies'][1][self.currencies[i]], self._raw(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def rows(self):
+        """Yields the formatted (date, place, card, raw amount, amount, currency) rows to write"""
+        places, cards, currencies, amounts_raw = (self._tables[column][1] for column in
+                                                  ('places', 'cards', 'currencies', 'amounts_raw'))
+        for date, place, card, amount, currency, amount_raw in zip(self.dates, self.places,
+                                                                   self.cards, self.amounts,
+                                                                   self.currencies,
+                                                                   self.amounts_raw):
+            yield format_row(date, places[place], cards[card], amount, currencies[currency],
+                             amounts_raw[amount_raw] or site_amount(amount, currencies[currency]))
+
+    def totals(self) -> dict:
+        """The sum of the amounts per currency, in minor units"""
+        currencies: list = self._tables['currencies'][1]
+        sums: list = [0] * len(currencies)
+        for amount, currency in zip(self.amounts, self.currencies):
+            sums[currency] += amount
+        return dict(zip(currencies, sums))
+
+    def between(self, start: datetime.date, end: datetime.date) -> 'TransactionBatch':
+        """The transactions purchased within the window, both ends included"""
+        first, last = start.toordinal(), end.toordinal()
+        batch = TransactionBatch(self._tables)
+        for i, date in enumerate(self.dates):
+            if first <= date <= last:
+                batch.dates.append(date)
+                batch.amounts.append(self.amounts[i])
+                batch.places.append(self.places[i])
+                batch.cards.append(self.cards[i])
+                batch.currencies.append(self.currencies[i])
+                batch.amounts_raw.append(self.amounts_raw[i])
+        return batch
+
+    def to_data(self) -> dict:
+        """The data dictionary of func.rows_to_data, for the code working with whole columns"""
+        columns: list = [list(column) for column in zip(*self.rows())] or [[] for _ in range(6)]
+        return dict(zip(('dates', 'places', 'cards', 'amounts_raw', 'amounts', 'currency'),
+                        columns))
@@ -9,13 +9,10 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver import ChromeOptions as ChromeOptions
 from selenium.webdriver import ChromeService as ChromeService
 from selenium.webdriver import ActionChains as AC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 
 # webdriver_manager
 from webdriver_manager.chrome import ChromeDriverManager
 
 # logging
 from loguru import logger
-
-# pandas
-import pandas as pd
@@ -0,0 +1,221 @@
+"""
+Module responsible for readiness waits.
+Instead of sleeping a fixed time every wait here returns as soon as a concrete signal shows up.
+"""
+from loguru import logger
+
+import utils as u
+import locators as loc
+import spans
+
+
+POLL_FREQUENCY: float = 0.1
+
+
+# CONDITIONS
+def dom_ready():
+    """Condition met once the document finished loading"""
+    def _predicate(driver) -> bool:
+        return driver.execute_script(loc.max_js['ready_state']) == 'complete'
+
+    return _predicate
+
+
+def network_idle(quiet_ms: int = 1000):
+    """Condition met once the page fetched nothing for quiet_ms milliseconds"""
+    def _predicate(driver) -> bool:
+        return driver.execute_script(loc.max_js['network_quiet_ms']) >= quiet_ms
+
+    return _predicate
+
+
+def personal_area():
+    """Condition met once the browser moved into the personal area"""
+    return u.EC.url_contains('/personal')
+
+
+def login_form():
+    """Condition met while the login form is showing"""
+    return u.EC.visibility_of_element_located(loc.max_loc['input_username'])
+
+
+def logged_in():
+    """
+    Condition met once the browser is in the personal area and the login form is gone,
+    the transactions page of an expired session is in the personal area with the form showing
+    """
+    def _predicate(driver) -> bool:
+        return bool(personal_area()(driver)) and not check(driver, login_form=login_form())
+
+    return _predicate
+
+
+def left_transactions():
+    """Condition met once the browser left the transactions page, an expired session is sent away"""
+    def _predicate(driver) -> bool:
+        return 'transaction-details' not in driver.current_url
+
+    return _predicate
+
+
+def login_error():
+    """Condition met once the login error box shows up"""
+    return u.EC.visibility_of_element_located(loc.max_loc['login_error_msg'])
+
+
+def table_rendered():
+    """Condition met once the first transaction row is visible"""
+    return u.EC.visibility_of_element_located(loc.max_loc['transactions_list'])
+
+
+def rows_beyond(count: int):
+    """Condition met once the transactions table holds more than count rows"""
+    def _predicate(driver) -> bool:
+        return driver.execute_script(loc.max_js['count_nodes'], loc.max_loc['transactions_rows'][1]) > count
+
+    return _predicate
+
+
+def load_more_shown():
+    """Condition met while the load more button is showing, the table holds rows not loaded yet"""
+    return u.EC.visibility_of_element_located(loc.max_loc['transactions_load_more'])
+
+
+def paging_settled(quiet_ms: int = 1500):
+    """Condition met once nothing was fetched for quiet_ms milliseconds since the last load more"""
+    def _predicate(driver) -> bool:
+        return driver.execute_script(loc.max_js['paging_quiet_ms']) >= quiet_ms
+
+    return _predicate
+
+
+def fresh_page():
+    """Condition met once a navigation started with loc.max_js['navigate_fresh'] replaced the old document"""
+    def _predicate(driver) -> bool:
+        return driver.execute_script(loc.max_js['is_fresh'])
+
+    return _predicate
+
+
+# WAITS
+def check(driver, **conditions) -> str | None:
+    """
+    Checks the conditions once without waiting
+    :param driver: the driver
+    :param conditions: name=condition pairs, checked in the given order
+    :return: the name of the first condition met, None when none is met
+    """
+    for name, condition in conditions.items():
+        try:
+            if condition(driver):
+                return name
+        except (u.NoSuchElementException, u.StaleElementReferenceException):
+            continue            # element is not on the page yet, check the next condition
+    return None
+
+
+def first_of(driver, timeout: float, **conditions) -> str | None:
+    """
+    Waits until any of the conditions is met
+    :param driver: the driver
+    :param timeout: seconds to wait before giving up
+    :param conditions: name=condition pairs, checked in the given order on every poll
+    :return: the name of the first condition met, None on timeout
+    """
+    with spans.span(f"wait {' or '.join(conditions)}"):
+        try:
+            return u.WDW(driver, timeout, poll_frequency=POLL_FREQUENCY).until(lambda drv: check(drv, **conditions) or False)
+
+        except u.TimeoutException:
+            logger.warning(f"none of {list(conditions)} happened within {timeout} seconds")
+            return None
+
+
+def page_ready(driver, timeout: float = 10) -> bool:
+    """Waits for the current page document to finish loading"""
+    return first_of(driver, timeout, dom_ready=dom_ready()) is not None
+
+
+def login_outcome(driver, timeout: float = 30) -> str | None:
+    """
+    Waits for the login form submission to resolve
+    :return: 'logged_in', 'login_error' or None when neither happened in time
+    """
+    return first_of(driver, timeout, login_error=login_error(), logged_in=logged_in())
+
+
+def table_ready(driver, timeout: float = 30) -> str:
+    """
+    Waits for the transactions table, a page with no transactions never renders a row
+    so the page going quiet on the network ends the wait as well, as long as it is still
+    the transactions page and no login form is showing
+    :return: 'rows' or 'idle'
+    :raises TimeoutException: when neither happened in time, or the session expired,
+                              the table is not known to be empty
+    """
+    def _idle(drv) -> bool:
+        return dom_ready()(drv) and network_idle()(drv)
+
+    outcome: str | None = first_of(driver, timeout, rows=table_rendered(),
+                                   expired=left_transactions(), login_form=login_form(), idle=_idle)
+    if outcome is None:
+        raise u.TimeoutException(f"the transactions table did not render within {timeout} seconds")
+    _raise_expired(driver, outcome)
+    return outcome
+
+
+def _raise_expired(driver, outcome: str | None) -> None:
+    """raises when the outcome shows the session expired instead of a transactions table"""
+    if outcome in ('expired', 'login_form'):
+        raise u.TimeoutException(f"the session expired, the transactions page showed {outcome}: "
+                                 f"{driver.current_url}")
+
+
+def more_rows(driver, count: int, timeout: float = 30, quiet_ms: int = 1500) -> str:
+    """
+    Waits for a load more to add rows beyond count, the table is complete once the page
+    went quiet without any and no load more button is left,
+    so a slow load more never passes for the end of the table
+    :return: 'grew' or 'settled'
+    :raises TimeoutException: when neither happened in time, the table may hold rows not read yet
+    """
+    def _settled(drv) -> bool:
+        return paging_settled(quiet_ms)(drv) and not check(drv, load_more=load_more_shown())
+
+    outcome: str | None = first_of(driver, timeout, grew=rows_beyond(count), settled=_settled)
+    if outcome is None:
+        raise u.TimeoutException(f"the transactions table neither grew past {count} rows "
+                                 f"nor settled without a load more button within {timeout} seconds")
+    return outcome
+
+
+def session_state(driver, timeout: float = 15) -> str | None:
+    """
+    Waits for the transactions page to show whether a restored session is still logged in,
+    an expired session is sent away from the page or shown the login form
+    :return: 'alive', 'expired' or None when neither happened in time
+    """
+    def _alive(drv) -> bool:
+        return not left_transactions()(drv) and dom_ready()(drv) and network_idle()(drv)
+
+    return first_of(driver, timeout,
+                    expired=left_transactions(),
+                    login_form=login_form(),
+                    rows=table_rendered(),
+                    alive=_alive)
+
+
+def tab_state(driver) -> str | None:
+    """
+    Checks once, without waiting, whether a tab navigated with loc.max_js['navigate_fresh'] is ready to scrape
+    :return: 'rows', 'idle' or None while the tab is still loading
+    :raises TimeoutException: when the session expired, see table_ready
+    """
+    if not check(driver, fresh=fresh_page()):
+        return None
+
+    outcome: str | None = check(driver, rows=table_rendered(), expired=left_transactions(),
+                                login_form=login_form(),
+                                idle=lambda drv: dom_ready()(drv) and network_idle()(drv))
+    _raise_expired(driver, outcome)
+    return outcome